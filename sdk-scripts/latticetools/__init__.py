@@ -0,0 +1,8 @@
+"""Geometry engines shared by the LatticeTools Grasshopper components.
+    The modules in this package are plain Python and run under both the
+    IronPython interpreter used by GhPython and CPython, so they can be used
+    outside of Rhino. Only rhinogeometry talks to RhinoCommon, and it is only
+    imported by the components."""
+
+__author__ = "irw"
+__version__ = "20261018"
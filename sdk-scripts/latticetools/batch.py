@@ -0,0 +1,234 @@
+"""Headless batch driver generating part families from a manifest.
+    Run with "python -m latticetools.batch manifest.json" from the sdk-scripts
+    folder. The manifest is a JSON list of parts, or an object with a "parts"
+    list and "defaults" applied to every part. A part gives its primitive file
+    (STL or OBJ, relative to the manifest), unit_cell (a unitcells name),
+    cell_size, radius and optionally voxel_size, symmetry ("octant" or
+    "quarter"), cut, mesh_from ("struts" or "points"), sample_mode,
+    max_points, repair_stages and part_id.
+
+    Each part runs the component stages from latticetools on plain arrays, with
+    a host.LocalHost where the components use rhinogeometry.RhinoHost: prepare
+    the primitive and voxelize it, then populate.generate_lattice maps, trims
+    and merges the lattice graph as the Uniform Lattice component does. With
+    mesh_from "points" the graph is sampled by sampling.sample_lattice, as the
+    Segment Lattice component samples it, and meshed as points. The native
+    volume engine meshes it, writing it to the part's STL as it goes unless it
+    is mirrored or cut, and meshing.finish_mesh mirrors, reports, repairs and
+    cuts it as the Mesh components do. It is exported again only if it was not
+    streamed or a repair changed it. Parts are fanned out over a process pool,
+    one part per task, and each writes its STL and its JSON log, keyed as
+    CombineJson combines the component outputs. A failing part is logged with
+    its error and does not stop the batch. With --log-lines every part's log is
+    also appended to one JSON Lines build log, indexed by part_id as buildlog
+    reads it."""
+
+from __future__ import division, print_function
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+from collections import OrderedDict
+
+from latticetools import buildlog
+from latticetools import meshing
+from latticetools import populate
+from latticetools import sampling
+from latticetools import segment as lattice_segment
+from latticetools.host import LocalHost
+from latticetools.mapping import StrutMapping
+from latticetools.profiling import Profiler
+from latticetools.scheduler import clock
+from latticetools.symmetry import SymmetryDomain
+from latticetools.unitcells import UNIT_BOUNDS, unit_cell
+
+DEFAULTS = OrderedDict([
+    ("unit_cell", "bcc"),
+    ("voxel_size", None),
+    ("symmetry", None),
+    ("cut", False),
+    ("mesh_from", "struts"),
+    ("sample_mode", lattice_segment.FIXED),
+    ("max_points", None),
+    ("repair_stages", None)])
+REQUIRED = ("primitive", "cell_size", "radius")
+#   Mesh volume samples per strut radius when no voxel_size is given
+SAMPLES_PER_RADIUS = 3
+#   Parts run one per process, so the stages inside a part run serially
+STAGE_WORKERS = 1
+
+def load_manifest(path):
+    """Parameter sets of the manifest's parts, with defaults applied and primitive paths resolved."""
+    with open(path, "r") as manifest:
+        data = json.load(manifest, object_pairs_hook = OrderedDict)
+    defaults = OrderedDict(DEFAULTS)
+    if isinstance(data, dict):
+        defaults.update(data.get("defaults", {}))
+        parts = data.get("parts", [])
+    else:
+        parts = data
+    base = os.path.dirname(os.path.abspath(path))
+    parameter_sets = []
+    for index, part in enumerate(parts):
+        params = OrderedDict(defaults)
+        params.update(part)
+        missing = [name for name in REQUIRED if params.get(name) is None]
+        if missing:
+            raise ValueError("Part {} of {} is missing {}".format(index, path, ", ".join(missing)))
+        params["primitive"] = os.path.join(base, params["primitive"])
+        parameter_sets.append(params)
+    return parameter_sets
+
+def generate_lattice(params, host, prepared, domain, profiler):
+    """Lattice graph of the unit cells mapped into the primitive's voxels and trimmed, as the Uniform Lattice component makes it."""
+    with profiler.stage("voxelize") as stage:
+        core, boundary = host.voxelize(prepared, float(params["cell_size"]))
+        stage.count(voxels = len(core) + len(boundary))
+    if domain:
+        core = populate.symmetry_voxels(host, core, domain)
+        boundary = populate.symmetry_voxels(host, boundary, domain)
+
+    struts = unit_cell(params["unit_cell"])
+    strut_mapping = StrutMapping(struts, UNIT_BOUNDS)
+    unit_radii = populate.unit_strut_radii([1]*len(struts), [params["radius"]])
+    outputs = populate.generate_lattice(
+        host, core, boundary,
+        lambda voxel: populate.map_lattice(host, voxel, strut_mapping),
+        lambda voxel: populate.map_boundary_trilinear(host, voxel, strut_mapping, None, None),
+        unit_radii, prepared, None, STAGE_WORKERS, profiler)
+    return len(core), len(boundary), outputs[5]
+
+def lattice_struts(params, host, graph, profiler):
+    """Struts and radii to mesh: the graph's struts, or its samples as zero-length struts as the Segment Lattice and Meshing - Points components mesh them."""
+    radius = float(params["radius"])
+    if params["mesh_from"] == "struts":
+        return graph.strut_points(), graph.strut_radii(radius), None
+    if params["mesh_from"] != "points":
+        raise ValueError("Unknown mesh_from: {}".format(params["mesh_from"]))
+    points, offsets, indices, removed, radii = sampling.sample_lattice(
+        host, [], [radius], graph, None, STAGE_WORKERS,
+        params["sample_mode"], lattice_segment.DEFAULT_TOLERANCE, params["max_points"], profiler)
+    segment = OrderedDict([("points", len(points)), ("removed", removed)])
+    return meshing.point_struts(points), radii, segment
+
+def generate_part(params, host, profiler, mesh_path = None):
+    """Mesh arrays and log entries of one part, and whether the mesh is already written to mesh_path."""
+    log = OrderedDict()
+    radius = float(params["radius"])
+    voxel_size = float(params["voxel_size"] or radius/SAMPLES_PER_RADIUS)
+
+    with profiler.stage("primitive"):
+        prepared = host.load_primitive(params["primitive"])
+    domain = None
+    if params["symmetry"]:
+        if params["symmetry"] not in ("octant", "quarter"):
+            raise ValueError("Unknown symmetry: {}".format(params["symmetry"]))
+        planes = prepared.symmetry_planes if params["symmetry"] == "octant" else prepared.symmetry_planes[1:3]
+        domain = SymmetryDomain(planes)
+
+    core_count, boundary_count, graph = generate_lattice(params, host, prepared, domain, profiler)
+    log["lattice"] = OrderedDict([
+        ("core_voxels", core_count),
+        ("boundary_voxels", boundary_count),
+        ("node_count", graph.node_count),
+        ("strut_count", graph.strut_count)])
+    struts, radii, segment = lattice_struts(params, host, graph, profiler)
+    if segment:
+        log["segment"] = segment
+
+    #   Without symmetry or a cut the mesh is written block by block while it is extracted
+    stream_path = mesh_path if not (domain or params["cut"]) else None
+    with profiler.stage("mesh", struts = len(struts)) as stage:
+        mesh = meshing.native_mesh(struts, radii, voxel_size, workers = STAGE_WORKERS, path = stream_path)
+        stage.count(faces = len(mesh[1]))
+    #   Mirror, repair and cut as the Mesh components do; their reports are the log's report entries
+    state, reports = meshing.finish_mesh(host, mesh, [prepared] if params["cut"] else None, domain, params["repair_stages"], profiler)
+    for report in reports:
+        if report:
+            log.update(report.entries)
+    vertices, faces = state.get("arrays")
+    return vertices, faces, log, bool(stream_path) and not meshing.repaired(reports[1])
+
+def run_part(params, output_dir, index = 0, host = None, log_lines = None):
+    """Generate, export and log one part, returning its summary."""
+    host = host or LocalHost()
+    part_id, date_utc = buildlog.make_id([params[name] for name in sorted(params)], index)
+    part_id = params.get("part_id") or part_id
+    mesh_path = os.path.join(output_dir, part_id + ".stl")
+    log_path = os.path.join(output_dir, part_id + ".json")
+    log = OrderedDict([
+        ("part_id", part_id),
+        ("date_utc", date_utc),
+        ("mesh_path", mesh_path),
+        ("log_path", log_path),
+        ("parameters", params)])
+    profiler = Profiler("batch")
+    start = clock()
+    try:
+        vertices, faces, part_log, exported = generate_part(params, host, profiler, mesh_path)
+        log.update(part_log)
+        if not exported:
+            with profiler.stage("export", faces = len(faces)):
+                host.write_mesh(mesh_path, vertices, faces)
+        status = "ok"
+    except Exception as error:
+        log["error"] = "{}: {}".format(type(error).__name__, error)
+        log["traceback"] = traceback.format_exc()
+        status = "failed"
+    log["timings"] = OrderedDict([(profiler.name, profiler.report())])
+    log["seconds"] = clock() - start
+    with open(log_path, "w") as log_file:
+        json.dump(log, log_file, indent = 4, separators = (',', ': '))
+    if log_lines:
+        buildlog.append_record(log_lines, log)
+    return OrderedDict([("part_id", part_id), ("status", status), ("seconds", log["seconds"]), ("log_path", log_path)])
+
+def run_indexed(task):
+    index, params, output_dir, log_lines = task
+    return run_part(params, output_dir, index, log_lines = log_lines)
+
+def run_batch(parts, output_dir, workers = None, log_lines = None):
+    """Run every part, in a process pool unless workers is 1, returning the summaries in manifest order."""
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    tasks = [(index, params, output_dir, log_lines) for index, params in enumerate(parts)]
+    workers = workers or multiprocessing.cpu_count()
+    if workers == 1 or len(tasks) <= 1:
+        return [run_indexed(task) for task in tasks]
+    pool = multiprocessing.Pool(min(workers, len(tasks)))
+    try:
+        return pool.map(run_indexed, tasks, chunksize = 1)
+    finally:
+        pool.close()
+        pool.join()
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Generate lattice parts from a manifest of parameter sets.")
+    parser.add_argument("manifest", help = "JSON manifest of parts")
+    parser.add_argument("-o", "--output", help = "Folder for the STL files and logs; next to the manifest by default")
+    parser.add_argument("-j", "--workers", type = int, help = "Number of worker processes; one per processor by default")
+    parser.add_argument("-l", "--log-lines", help = "JSON Lines build log to append every part's log to")
+    arguments = parser.parse_args(argv)
+
+    parts = load_manifest(arguments.manifest)
+    output_dir = arguments.output or os.path.join(os.path.dirname(os.path.abspath(arguments.manifest)), "output")
+    start = clock()
+    summaries = run_batch(parts, output_dir, arguments.workers, arguments.log_lines)
+    summary = OrderedDict([
+        ("parts", len(summaries)),
+        ("failed", sum(1 for part in summaries if part["status"] != "ok")),
+        ("seconds", clock() - start),
+        ("results", summaries)])
+    with open(os.path.join(output_dir, "batch.json"), "w") as summary_file:
+        json.dump(summary, summary_file, indent = 4, separators = (',', ': '))
+    print(json.dumps(summary, indent = 4))
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+"""Benchmarks for the lattice engines, runnable without Rhino.
+    Run with "python -m latticetools.benchmark" from the sdk-scripts folder, or
+    "--help" for the options. Every pure-Python stage is timed on synthetic
+    inputs across scale: mapping, graph dedup and segmentation on cubic voxel
+    grids of 10^3 to 100^3 for each standard unit cell, and voxelization,
+    trimming, the mesh report and export on analytic sphere, cylinder and torus
+    primitives voxelized at the same resolutions. The trimmed lattice of each
+    cell is then meshed natively: sampled into the signed distance volume,
+    polygonized into its iso-surface and clipped through the primitive's
+    middle.
+
+    Stages are timed with profiling.Profiler, and the results are written as
+    JSON with the commit, Python version and platform, so runs on different
+    commits can be compared with "--compare baseline.json". Each stage records
+    the count it handles as its input, and rates are per input item. Stages
+    whose inputs exceed the item budgets run on a deterministic prefix of their
+    items and are marked sampled, so the per-item rates stay comparable. The
+    struts meshed per primitive and cell scale with the grid size unless
+    "--max-volume-struts" fixes them, and each result records how many of the
+    trimmed struts were meshed.
+
+    "--chunk-sizes" also times the scheduler's chunk sizes on the mapping stage.
+    The scheduler runs on threads, so the results record the backend and whether
+    its threads ran in parallel: under CPython the global interpreter lock
+    serializes them, and the timings show scheduling overhead rather than the
+    speedup IronPython gets in Grasshopper."""
+
+from __future__ import division, print_function
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from collections import OrderedDict
+
+from latticetools import clip as mesh_clip
+from latticetools import export as mesh_export
+from latticetools import isosurface
+from latticetools import primitive as primitive_registry
+from latticetools import scheduler
+from latticetools import segment as lattice_segment
+from latticetools import trim as lattice_trim
+from latticetools import volume as lattice_volume
+from latticetools.diagnostics import MeshDiagnostics
+from latticetools.graph import LatticeGraph
+from latticetools.host import LocalHost
+from latticetools.mapping import StrutMapping
+from latticetools.profiling import Profiler
+from latticetools.unitcells import UNIT_BOUNDS, UNIT_CELLS, unit_cell
+
+CHUNK_SIZES = (1, 4, 16, 64, 256, 1024, None)
+SIZES = (10, 20, 50, 100)
+CELLS = ("bcc", "fcc", "octet", "kelvin")
+PRIMITIVES = ("sphere", "cylinder", "torus")
+MAX_STRUTS = 1000000
+MAX_TRIM_STRUTS = 20000
+#   Trimmed struts meshed per primitive and cell, per voxel along the grid: 20 at size 10, 200 at size 100
+VOLUME_STRUTS_PER_SIZE = 2
+MAX_VOLUME_STRUTS = None
+#   Strut radius in voxels, and signed distance samples per strut radius as the Mesh components default to
+STRUT_RADIUS = 0.1
+SAMPLES_PER_RADIUS = 4
+#   Primitive tessellation segments per voxel along its largest extent
+SEGMENTS_PER_VOXEL = 4
+STAGE_FIELDS = ("wall_seconds", "cpu_seconds", "memory_delta_mb", "peak_growth_mb", "process_peak_memory_mb", "calls", "input", "sampled")
+
+def voxel_grid(count, size = 1.0, limit = None):
+    """Corners of a count^3 grid of size cubes, in i, j, k order, stopping after limit voxels."""
+    voxels = []
+    for i in range(count):
+        for j in range(count):
+            for k in range(count):
+                if limit is not None and len(voxels) >= limit:
+                    return voxels
+                x, y, z = i*size, j*size, k*size
+                voxels.append([
+                    (x, y, z), (x + size, y, z), (x + size, y + size, z), (x, y + size, z),
+                    (x, y, z + size), (x + size, y, z + size), (x + size, y + size, z + size), (x, y + size, z + size)])
+    return voxels
+
+def revolve(profile, segments, closed = True):
+    """Mesh of an (r, z) profile revolved about the z axis; an open profile leaves its end rings open."""
+    vertices = []
+    for n in range(segments):
+        angle = 2*math.pi*n/segments
+        c, s = math.cos(angle), math.sin(angle)
+        vertices.extend((r*c, r*s, z) for r, z in profile)
+    count = len(profile)
+    faces = []
+    for n in range(segments):
+        m = (n + 1) % segments
+        for i in range(count if closed else count - 1):
+            j = (i + 1) % count
+            a, b, c, d = n*count + i, m*count + i, m*count + j, n*count + j
+            faces.append((a, b, c))
+            faces.append((a, c, d))
+    return vertices, faces
+
+def sphere_mesh(segments, radius = 1.0):
+    #   Rings at the middle of each latitude band, closed with a fan to each pole
+    rings = max(2, segments//2)
+    profile = [(radius*math.sin(math.pi*(k + 0.5)/rings), -radius*math.cos(math.pi*(k + 0.5)/rings)) for k in range(rings)]
+    vertices, faces = revolve(profile, segments, closed = False)
+    bottom = len(vertices)
+    top = bottom + 1
+    vertices.extend([(0.0, 0.0, -radius), (0.0, 0.0, radius)])
+    for n in range(segments):
+        m = (n + 1) % segments
+        faces.append((bottom, m*rings, n*rings))
+        faces.append((top, n*rings + rings - 1, m*rings + rings - 1))
+    return vertices, faces
+
+def cylinder_mesh(segments, radius = 0.6, height = 2.0):
+    rows = max(1, segments//4)
+    side = [(radius, -0.5*height + height*k/rows) for k in range(rows + 1)]
+    profile = [(radius*0.5, -0.5*height)] + side + [(radius*0.5, 0.5*height)]
+    vertices, faces = revolve(profile, segments, closed = False)
+    count = len(profile)
+    bottom = len(vertices)
+    top = bottom + 1
+    vertices.extend([(0.0, 0.0, -0.5*height), (0.0, 0.0, 0.5*height)])
+    for n in range(segments):
+        m = (n + 1) % segments
+        faces.append((bottom, m*count, n*count))
+        faces.append((top, n*count + count - 1, m*count + count - 1))
+    return vertices, faces
+
+def torus_mesh(segments, major = 0.7, minor = 0.3):
+    sides = max(8, segments//2)
+    profile = [(major + minor*math.cos(2*math.pi*k/sides), minor*math.sin(2*math.pi*k/sides)) for k in range(sides)]
+    return revolve(profile, segments)
+
+PRIMITIVE_MESHES = {
+    "sphere": sphere_mesh,
+    "cylinder": cylinder_mesh,
+    "torus": torus_mesh}
+
+def primitive_mesh(name, segments):
+    vertices, faces = PRIMITIVE_MESHES[name](segments)
+    if MeshDiagnostics(vertices, faces).volume < 0:
+        faces = [tuple(reversed(face)) for face in faces]
+    return vertices, faces
+
+def stage_results(profiler, sampled = None):
+    results = profiler.report()
+    for name in sampled or ():
+        results[name]["sampled"] = True
+    return results
+
+def benchmark_cell(size, cell, max_struts = MAX_STRUTS):
+    """Mapping, graph dedup, segmentation and sample merging on a size^3 grid of unit cells."""
+    struts = unit_cell(cell)
+    voxel_count = size**3
+    limit = min(voxel_count, max(1, max_struts//len(struts)))
+    voxels = voxel_grid(size, limit = limit)
+    profiler = Profiler("cell")
+    mapping = StrutMapping(struts, UNIT_BOUNDS)
+
+    with profiler.stage("mapping", voxels = len(voxels)) as stage:
+        lattice = mapping.map_voxels(voxels)
+        stage.count(struts = len(lattice))
+    with profiler.stage("dedup", struts = len(lattice)) as stage:
+        graph = LatticeGraph.from_struts(lattice)
+        stage.count(nodes = graph.node_count, unique_struts = graph.strut_count)
+    unique = graph.strut_points()
+    with profiler.stage("segmentation", struts = len(unique)) as stage:
+        lengths = [lattice_segment.strut_length(start, end) for start, end in unique]
+        spacings = lattice_segment.sample_spacings([STRUT_RADIUS]*len(unique), lengths)
+        points, offsets = lattice_segment.segment_struts(unique, spacings)
+        stage.count(points = len(points))
+    with profiler.stage("merge", points = len(points)) as stage:
+        merged, indices, removed = lattice_segment.merge_strut_ends(points, offsets, lattice_segment.merge_tolerance(STRUT_RADIUS))
+        stage.count(removed = removed)
+
+    sampled = ["mapping", "dedup", "segmentation", "merge"] if limit < voxel_count else []
+    return OrderedDict([
+        ("size", size),
+        ("unit_cell", cell),
+        ("voxels", voxel_count),
+        ("stages", stage_results(profiler, sampled))])
+
+def volume_strut_limit(size, max_volume_struts = MAX_VOLUME_STRUTS):
+    """Struts meshed per primitive and cell: max_volume_struts if given, otherwise scaled with the grid size."""
+    return max(1, int(max_volume_struts) if max_volume_struts else VOLUME_STRUTS_PER_SIZE*size)
+
+def benchmark_lattice_mesh(profiler, cell, struts, radius, middle, limit):
+    """Signed distance volume, iso-surface and clip stages of the first limit struts of a lattice, returning how many were meshed."""
+    struts = struts[:max(1, limit)]
+    with profiler.stage("volume_" + cell, struts = len(struts)) as stage:
+        volume = lattice_volume.lattice_volume(struts, radius, radius/SAMPLES_PER_RADIUS)
+        stage.count(blocks = len(volume.blocks))
+    with profiler.stage("isosurface_" + cell, blocks = len(volume.blocks)) as stage:
+        vertices, faces = isosurface.volume_to_mesh(volume)
+        stage.count(faces = len(faces))
+    with profiler.stage("clip_" + cell, faces = len(faces)) as stage:
+        clipped = mesh_clip.clip_mesh(vertices, faces, [(middle, (0.0, 0.0, 1.0))])
+        stage.count(clipped_faces = len(clipped.faces))
+    return len(struts)
+
+def benchmark_primitive(size, name, cells, max_trim_struts = MAX_TRIM_STRUTS, max_volume_struts = MAX_VOLUME_STRUTS, directory = None):
+    """Voxelization, per-cell trimming and lattice meshing, mesh report and export of a primitive on a size^3 grid."""
+    host = LocalHost()
+    profiler = Profiler("primitive")
+    vertices, faces = primitive_mesh(name, SEGMENTS_PER_VOXEL*size)
+
+    with profiler.stage("index", faces = len(faces)):
+        prepared = primitive_registry.PreparedPrimitive("benchmark-{}-{}".format(name, size), vertices, faces)
+        prepared.index
+    extent = max(prepared.bounds[1][i] - prepared.bounds[0][i] for i in range(3))
+    middle = tuple(0.5*(prepared.bounds[0][i] + prepared.bounds[1][i]) for i in range(3))
+    with profiler.stage("voxelization", voxels = size**3) as stage:
+        core, boundary = host.voxelize(prepared, extent/size)
+        stage.count(core_voxels = len(core), boundary_voxels = len(boundary))
+
+    sampled = []
+    volume_limit = volume_strut_limit(size, max_volume_struts)
+    volume_struts = OrderedDict()
+    for cell in cells:
+        struts = unit_cell(cell)
+        mapping = StrutMapping(struts, UNIT_BOUNDS)
+        limit = min(len(boundary), max(1, max_trim_struts//len(struts)))
+        if limit < len(boundary):
+            sampled.append("trimming_" + cell)
+        lattice = mapping.map_voxels(boundary[:limit])
+        with profiler.stage("trimming_" + cell, struts = len(lattice)) as stage:
+            trimmed = lattice_trim.trim_struts(prepared.index, lattice)
+            stage.count(trimmed_struts = len(trimmed))
+        meshed = benchmark_lattice_mesh(profiler, cell, trimmed, STRUT_RADIUS*extent/size, middle, volume_limit) if trimmed else 0
+        volume_struts[cell] = OrderedDict([("trimmed", len(trimmed)), ("meshed", meshed)])
+        if meshed < len(trimmed):
+            sampled.extend(stage + "_" + cell for stage in ("volume", "isosurface", "clip"))
+
+    with profiler.stage("mesh_report", faces = len(faces)):
+        MeshDiagnostics(vertices, faces).report_items()
+    handle, path = tempfile.mkstemp(suffix = ".stl", dir = directory)
+    os.close(handle)
+    try:
+        with profiler.stage("export", faces = len(faces)):
+            mesh_export.write_mesh(path, vertices, faces)
+    finally:
+        os.remove(path)
+
+    return OrderedDict([
+        ("size", size),
+        ("primitive", name),
+        ("voxels", size**3),
+        ("volume_strut_limit", volume_limit),
+        ("volume_struts", volume_struts),
+        ("stages", stage_results(profiler, sampled))])
+
+def benchmark_chunk_sizes(function, items, chunk_sizes = CHUNK_SIZES, workers = None):
+    """Items per second of scheduler.run for each chunk size; None is the adaptive size."""
+    results = []
+    for chunk_size in chunk_sizes:
+        start = scheduler.clock()
+        scheduler.run(function, items, chunk_size = chunk_size, workers = workers)
+        elapsed = scheduler.clock() - start
+        results.append({
+            "chunk_size": chunk_size if chunk_size else "adaptive",
+            "seconds": elapsed,
+            "items_per_second": len(items)/elapsed if elapsed > 0 else None})
+    return results
+
+def git_commit():
+    try:
+        directory = os.path.dirname(os.path.abspath(__file__))
+        output = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd = directory, stderr = subprocess.STDOUT)
+        return output.decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmarks(sizes = SIZES, cells = CELLS, primitives = PRIMITIVES, max_struts = MAX_STRUTS, max_trim_struts = MAX_TRIM_STRUTS, max_volume_struts = MAX_VOLUME_STRUTS, chunk_sizes = False):
+    report = OrderedDict([
+        ("version", __version__),
+        ("commit", git_commit()),
+        ("python", sys.version.split()[0]),
+        ("implementation", platform.python_implementation()),
+        ("platform", platform.platform()),
+        ("processors", scheduler.cpu_count()),
+        ("cells", [benchmark_cell(size, cell, max_struts) for size in sizes for cell in cells]),
+        ("primitives", [benchmark_primitive(size, name, cells, max_trim_struts, max_volume_struts) for size in sizes for name in primitives])])
+    if chunk_sizes:
+        mapping = StrutMapping(unit_cell("bcc"), UNIT_BOUNDS)
+        voxels = voxel_grid(20)
+        report["chunk_sizes"] = OrderedDict([
+            ("stage", "mapping"),
+            ("backend", scheduler.BACKEND),
+            ("parallel", scheduler.threads_parallel()),
+            ("items", len(voxels)),
+            ("results", benchmark_chunk_sizes(mapping.map_voxel, voxels))])
+    return report
+
+def stage_times(report):
+    """Wall seconds per input item of every stage, keyed by (input, size, stage)."""
+    times = {}
+    for group, label in (("cells", "unit_cell"), ("primitives", "primitive")):
+        for result in report.get(group, []):
+            for stage, record in result["stages"].items():
+                if "input" in record:
+                    items = record.get(record["input"], 1) if record["input"] else 1
+                else:
+                    #   Results written before stages recorded their input; take the first count
+                    counts = [value for key, value in record.items() if key not in STAGE_FIELDS]
+                    items = counts[0] if counts else 1
+                times[(result[label], result["size"], stage)] = record["wall_seconds"]/max(1, items)
+    return times
+
+def compare(report, baseline):
+    """Ratio of per-item wall time to the baseline for every stage both runs have, slowest first."""
+    current = stage_times(report)
+    previous = stage_times(baseline)
+    ratios = [
+        OrderedDict([("input", key[0]), ("size", key[1]), ("stage", key[2]), ("ratio", current[key]/previous[key])])
+        for key in sorted(current) if key in previous and previous[key] > 0]
+    ratios.sort(key = lambda item: -item["ratio"])
+    return OrderedDict([("baseline_commit", baseline.get("commit")), ("stages", ratios)])
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Time the lattice engines on synthetic lattices and primitives.")
+    parser.add_argument("--sizes", type = int, nargs = "+", default = list(SIZES), help = "Voxels per side of the grids")
+    parser.add_argument("--cells", nargs = "+", default = list(CELLS), choices = sorted(UNIT_CELLS), help = "Unit cells")
+    parser.add_argument("--primitives", nargs = "+", default = list(PRIMITIVES), choices = sorted(PRIMITIVE_MESHES), help = "Primitives")
+    parser.add_argument("--max-struts", type = int, default = MAX_STRUTS, help = "Struts mapped per grid before sampling")
+    parser.add_argument("--max-trim-struts", type = int, default = MAX_TRIM_STRUTS, help = "Struts trimmed per primitive and cell before sampling")
+    parser.add_argument("--max-volume-struts", type = int, default = MAX_VOLUME_STRUTS, help = "Trimmed struts meshed per primitive and cell before sampling; {} per voxel of the grid size if not given".format(VOLUME_STRUTS_PER_SIZE))
+    parser.add_argument("--chunk-sizes", action = "store_true", help = "Also time the scheduler's chunk sizes, on its thread backend")
+    parser.add_argument("--output", help = "Write the JSON results to this file instead of printing them")
+    parser.add_argument("--compare", help = "JSON results of a baseline run to compare against")
+    arguments = parser.parse_args(argv)
+
+    report = run_benchmarks(arguments.sizes, arguments.cells, arguments.primitives, arguments.max_struts, arguments.max_trim_struts, arguments.max_volume_struts, arguments.chunk_sizes)
+    if arguments.compare:
+        with open(arguments.compare, "r") as baseline:
+            report["comparison"] = compare(report, json.load(baseline, object_pairs_hook = OrderedDict))
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            json.dump(report, output, indent = 4)
+    else:
+        print(json.dumps(report, indent = 4))
+
+if __name__ == "__main__":
+    main()
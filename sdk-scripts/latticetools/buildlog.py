@@ -0,0 +1,278 @@
+"""JSON Lines build logs: one compact JSON record per part, appended atomically.
+    append_record writes a whole record as a single line with one write to a
+    file opened for appending, so Logger components and batch workers can share
+    a log without locking and a reader never sees two records interleaved. A
+    line torn by a crash is skipped by the reader, and the next append starts
+    on a fresh line.
+
+    iter_records streams (offset, record) pairs lazily, so a log of any size is
+    read a line at a time. BuildLogIndex maps each part_id to the byte offset of
+    its latest record and is kept next to the log, so looking up a part reads
+    one line. The index remembers how much of the log it has seen and only
+    scans records appended since.
+
+    legacy_records reads the comma-joined logs written before this format, for
+    converting a build history with convert_legacy.
+
+    make_id gives the part_id of a new part, shared by the SystemInfo component
+    and the batch driver."""
+
+from __future__ import division, print_function
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+
+from latticetools import logrecord
+
+PART_ID = "part_id"
+INDEX_SUFFIX = ".index"
+INDEX_VERSION = 1
+SEPARATORS = logrecord.SEPARATORS
+NEWLINE = b"\n"
+APPEND_FLAGS = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0)
+
+def make_id(properties, index = None):
+    """Part ID as (date)-(properties fragment)-(instance fragment), and the UTC time it was made at."""
+    properties_string = ','.join(map(str, properties))
+    properties_fragment = (hashlib.md5(properties_string.encode("UTF-8")).hexdigest())[:3]
+
+    date_info = datetime.now().strftime("%y%m%d")
+    date_utc = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+    #   Parts made in the same second, as a batch makes them, are told apart by their index
+    instance = date_utc if index is None else "{}-{}".format(date_utc, index)
+    instance_fragment = (hashlib.sha256(instance.encode("UTF-8")).hexdigest())[:2]
+
+    return '-'.join([date_info, properties_fragment, instance_fragment]), date_utc
+
+def encode_record(record):
+    """UTF-8 bytes of a record, a dict or LogRecord, as one compact JSON line."""
+    return logrecord.dumps(record).encode("utf-8") + NEWLINE
+
+def last_byte(path):
+    try:
+        with open(path, "rb") as log:
+            log.seek(0, os.SEEK_END)
+            if log.tell() == 0:
+                return None
+            log.seek(-1, os.SEEK_END)
+            return log.read(1)
+    except (IOError, OSError):
+        return None
+
+def append_record(path, record):
+    """Append a record to the log at path as one line, returning its byte offset."""
+    return append_records(path, [record])[0]
+
+def append_records(path, records):
+    """Append records to the log in a single write, returning their byte offsets."""
+    lines = [encode_record(record) for record in records]
+    end = last_byte(path)
+    if end is not None and end != NEWLINE:
+        #   An earlier write was torn; keep its remains on a line of their own
+        lines.insert(0, NEWLINE)
+    data = b"".join(lines)
+    handle = os.open(path, APPEND_FLAGS, 0o644)
+    try:
+        written = os.write(handle, data)
+        if written != len(data):
+            raise IOError("Short write of {} of {} bytes to {}".format(written, len(data), path))
+        #   The file position after an appending write is its end
+        end_offset = os.lseek(handle, 0, os.SEEK_CUR)
+    finally:
+        os.close(handle)
+    offsets = []
+    offset = end_offset - len(data)
+    for line in lines:
+        if line != NEWLINE:
+            offsets.append(offset)
+        offset += len(line)
+    return offsets
+
+def decode_line(line):
+    """Record of a log line, or None for a blank or torn line."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        return json.loads(line.decode("utf-8"), object_pairs_hook = OrderedDict)
+    except ValueError:
+        return None
+
+def iter_records(path, start = 0):
+    """Lazily yield (offset, record) for every complete record of the log from byte offset start."""
+    with open(path, "rb") as log:
+        log.seek(start)
+        offset = start
+        while True:
+            line = log.readline()
+            if not line:
+                break
+            if line.endswith(NEWLINE):
+                record = decode_line(line)
+                if record is not None:
+                    yield offset, record
+            offset += len(line)
+
+def read_record(path, offset):
+    """The record starting at a byte offset of the log."""
+    with open(path, "rb") as log:
+        log.seek(offset)
+        record = decode_line(log.readline())
+    if record is None:
+        raise ValueError("No record at offset {} of {}".format(offset, path))
+    return record
+
+def complete_size(path):
+    """Size of the log up to the end of its last complete line."""
+    with open(path, "rb") as log:
+        log.seek(0, os.SEEK_END)
+        size = log.tell()
+        #   A line still being written is indexed on a later refresh
+        while size > 0:
+            step = min(size, 4096)
+            log.seek(size - step)
+            block = log.read(step)
+            position = block.rfind(NEWLINE)
+            if position >= 0:
+                return size - step + position + 1
+            size -= step
+    return 0
+
+class BuildLogIndex(object):
+    """part_id to byte offset of the latest record with it, persisted beside the log."""
+
+    def __init__(self, path, index_path = None, key = PART_ID):
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.key = key
+        self.size = 0
+        self.offsets = {}
+        self.load()
+        self.refresh()
+
+    def load(self):
+        try:
+            with open(self.index_path, "r") as index:
+                data = json.load(index)
+        except (IOError, OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION and data.get("key") == self.key:
+            self.size = data["size"]
+            self.offsets = data["offsets"]
+
+    def valid(self):
+        #   A log that shrank, or no longer has a line ending where the index stopped, was replaced
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < self.size:
+            return False
+        if self.size == 0:
+            return True
+        with open(self.path, "rb") as log:
+            log.seek(self.size - 1)
+            return log.read(1) == NEWLINE
+
+    def refresh(self):
+        """Index the records appended since the last refresh, returning how many were added."""
+        if not self.valid():
+            self.size = 0
+            self.offsets = {}
+        if not os.path.exists(self.path):
+            return 0
+        size = complete_size(self.path)
+        if size == self.size:
+            return 0
+        added = 0
+        for offset, record in iter_records(self.path, self.size):
+            if offset >= size:
+                break
+            part_id = record.get(self.key) if isinstance(record, dict) else None
+            if part_id is not None:
+                self.offsets[str(part_id)] = offset
+                added += 1
+        self.size = size
+        self.save()
+        return added
+
+    def save(self):
+        data = OrderedDict([
+            ("version", INDEX_VERSION),
+            ("key", self.key),
+            ("size", self.size),
+            ("offsets", self.offsets)])
+        directory = os.path.dirname(os.path.abspath(self.index_path))
+        handle, temporary = tempfile.mkstemp(suffix = ".tmp", dir = directory)
+        with os.fdopen(handle, "w") as index:
+            json.dump(data, index, separators = SEPARATORS)
+        try:
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            os.rename(temporary, self.index_path)
+        except OSError:
+            #   Another reader saved the index first; it is rebuilt from the log if stale
+            os.remove(temporary)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __contains__(self, part_id):
+        return str(part_id) in self.offsets
+
+    def offset(self, part_id):
+        return self.offsets.get(str(part_id))
+
+    def get(self, part_id, default = None):
+        """The latest record of a part, read from its offset, or default."""
+        offset = self.offset(part_id)
+        if offset is None:
+            return default
+        return read_record(self.path, offset)
+
+def legacy_records(path):
+    """Records of a comma-joined log written by the Logger before JSON Lines."""
+    with open(path, "r") as log:
+        text = log.read().strip()
+    if not text:
+        return []
+    return json.loads("[" + text + "]", object_pairs_hook = OrderedDict)
+
+def convert_legacy(source, target):
+    """Append the records of a legacy log to a JSON Lines log, returning how many were appended."""
+    records = legacy_records(source)
+    if records:
+        append_records(target, records)
+    return len(records)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Look up parts in a JSON Lines build log.")
+    parser.add_argument("log", help = "JSON Lines build log")
+    parser.add_argument("part_ids", nargs = "*", help = "Parts to print; every indexed part_id if none")
+    parser.add_argument("--convert", metavar = "LEGACY", help = "First append the records of a comma-joined legacy log")
+    arguments = parser.parse_args(argv)
+
+    if arguments.convert:
+        print("Appended {} records".format(convert_legacy(arguments.convert, arguments.log)), file = sys.stderr)
+    index = BuildLogIndex(arguments.log)
+    if not arguments.part_ids:
+        for part_id in sorted(index.offsets):
+            print(part_id)
+        return 0
+    missing = 0
+    for part_id in arguments.part_ids:
+        record = index.get(part_id)
+        if record is None:
+            print("No record of {}".format(part_id), file = sys.stderr)
+            missing += 1
+        else:
+            print(json.dumps(record, indent = 4, separators = (',', ': ')))
+    return 1 if missing else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""Content-addressed on-disk cache for the results of lattice stages.
+    A stage's result is stored under a stable hash of its name and inputs, so the
+    same inputs find the same entry in any session. Inputs are hashed from plain
+    data: numbers, strings, byte arrays, sequences, dicts and arrays, or objects providing a
+    cache_key() method that returns plain data. Floats are hashed by their exact
+    binary value.
+
+    Entries hold plain data only: None, booleans, numbers, strings, flat
+    array("d") and array("i") buffers, and lists and string-keyed dicts of
+    these. Each value is written as a one-byte type tag and a fixed-size header
+    followed by its little-endian data, so loading an entry never constructs
+    anything but these types, whoever wrote the file. Stages pack their results
+    into such buffers, e.g. struts as six coordinates each, and rebuild their
+    objects from them, see flat_struts and flat_faces.
+
+    An entry is the format header followed by the zlib-compressed values, and
+    is written to a temporary file that is renamed into place, so a reader never
+    sees a partial entry. Reading an entry touches it, and when the cache grows
+    past max_bytes the least recently used entries are evicted. Hits, misses,
+    writes and evictions are counted for the JSON log."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from collections import OrderedDict
+
+from latticetools.logrecord import LogRecord
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+try:
+    integer_types = (int, long)
+except NameError:
+    integer_types = (int,)
+
+CACHE_VERSION = b"LTC2"
+CACHE_SUFFIX = ".cache"
+DEFAULT_MAX_BYTES = 2*1024**3
+DOUBLE = struct.Struct("<d")
+INTEGER = struct.Struct("<q")
+LENGTH = struct.Struct("<I")
+#   Typecodes of the stored buffers and their item sizes, checked on load
+ARRAY_TYPES = {"d": 8, "i": 4}
+#   Corner count of a stored face; a triangle's fourth corner is NO_CORNER
+FACE_CORNERS = 4
+NO_CORNER = -1
+
+def update_hash(digest, value):
+    if value is None:
+        digest.update(b"N")
+    elif value is True or value is False:
+        digest.update(b"T" if value else b"F")
+    elif isinstance(value, float):
+        digest.update(b"f" + DOUBLE.pack(value))
+    elif isinstance(value, integer_types):
+        digest.update(b"i" + str(value).encode("ascii") + b";")
+    elif isinstance(value, bytearray):
+        digest.update(b"b" + str(len(value)).encode("ascii") + b":" + bytes(value))
+    elif isinstance(value, string_types):
+        encoded = value.encode("utf-8")
+        digest.update(b"s" + str(len(encoded)).encode("ascii") + b":" + encoded)
+    elif isinstance(value, array):
+        data = value.tobytes() if hasattr(value, "tobytes") else value.tostring()
+        digest.update(b"a" + value.typecode.encode("ascii") + str(len(data)).encode("ascii") + b":" + data)
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"(" + str(len(value)).encode("ascii") + b":")
+        for item in value:
+            update_hash(digest, item)
+        digest.update(b")")
+    elif isinstance(value, dict):
+        digest.update(b"{" + str(len(value)).encode("ascii") + b":")
+        for key in sorted(value):
+            update_hash(digest, key)
+            update_hash(digest, value[key])
+        digest.update(b"}")
+    elif hasattr(value, "cache_key"):
+        digest.update(b"o" + type(value).__name__.encode("ascii"))
+        update_hash(digest, value.cache_key())
+    else:
+        raise TypeError("Cannot hash {} for the result cache".format(type(value).__name__))
+
+def array_bytes(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes() if hasattr(values, "tobytes") else values.tostring()
+
+def bytes_array(typecode, data):
+    values = array(typecode)
+    if hasattr(values, "frombytes"):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+def encode_value(value, chunks):
+    """Append the tagged binary form of plain data to chunks; TypeError for anything else."""
+    if value is None:
+        chunks.append(b"N")
+    elif value is True or value is False:
+        chunks.append(b"T" if value else b"F")
+    elif isinstance(value, float):
+        chunks.append(b"f" + DOUBLE.pack(value))
+    elif isinstance(value, integer_types):
+        chunks.append(b"i" + INTEGER.pack(value))
+    elif isinstance(value, string_types):
+        encoded = value.encode("utf-8")
+        chunks.append(b"s" + LENGTH.pack(len(encoded)) + encoded)
+    elif isinstance(value, array):
+        if ARRAY_TYPES.get(value.typecode) != value.itemsize:
+            raise TypeError("Cannot store array of type {} in the result cache".format(value.typecode))
+        data = array_bytes(value)
+        chunks.append(b"a" + value.typecode.encode("ascii") + LENGTH.pack(len(data)) + data)
+    elif isinstance(value, (list, tuple)):
+        chunks.append(b"l" + LENGTH.pack(len(value)))
+        for item in value:
+            encode_value(item, chunks)
+    elif isinstance(value, dict):
+        chunks.append(b"d" + LENGTH.pack(len(value)))
+        for key, item in value.items():
+            if not isinstance(key, string_types):
+                raise TypeError("Result cache dict keys must be strings")
+            encode_value(key, chunks)
+            encode_value(item, chunks)
+    else:
+        raise TypeError("Cannot store {} in the result cache".format(type(value).__name__))
+
+def decode_value(data, offset = 0):
+    """(value, next offset) of the tagged value at offset; ValueError for malformed data."""
+    tag = data[offset:offset + 1]
+    offset += 1
+    if tag == b"N":
+        return None, offset
+    if tag == b"T" or tag == b"F":
+        return tag == b"T", offset
+    if tag == b"f":
+        return DOUBLE.unpack_from(data, offset)[0], offset + DOUBLE.size
+    if tag == b"i":
+        return INTEGER.unpack_from(data, offset)[0], offset + INTEGER.size
+    if tag == b"s":
+        length = LENGTH.unpack_from(data, offset)[0]
+        offset += LENGTH.size
+        return data[offset:offset + length].decode("utf-8"), offset + length
+    if tag == b"a":
+        typecode = data[offset:offset + 1].decode("ascii")
+        length = LENGTH.unpack_from(data, offset + 1)[0]
+        offset += 1 + LENGTH.size
+        if typecode not in ARRAY_TYPES or length % ARRAY_TYPES[typecode] or offset + length > len(data):
+            raise ValueError("Malformed array in cache entry")
+        return bytes_array(typecode, data[offset:offset + length]), offset + length
+    if tag == b"l":
+        count = LENGTH.unpack_from(data, offset)[0]
+        offset += LENGTH.size
+        items = []
+        for n in range(count):
+            item, offset = decode_value(data, offset)
+            items.append(item)
+        return items, offset
+    if tag == b"d":
+        count = LENGTH.unpack_from(data, offset)[0]
+        offset += LENGTH.size
+        items = OrderedDict()
+        for n in range(count):
+            key, offset = decode_value(data, offset)
+            items[key], offset = decode_value(data, offset)
+        return items, offset
+    raise ValueError("Unknown tag in cache entry: {!r}".format(tag))
+
+def encode(value):
+    chunks = []
+    encode_value(value, chunks)
+    return b"".join(chunks)
+
+def decode(data):
+    value, offset = decode_value(data)
+    if offset != len(data):
+        raise ValueError("Trailing data in cache entry")
+    return value
+
+def flat_points(points):
+    """array("d") of three coordinates per point."""
+    values = array("d")
+    for point in points:
+        values.extend(point)
+    return values
+
+def flat_struts(struts):
+    """array("d") of six coordinates per (start, end) strut."""
+    values = array("d")
+    for start, end in struts:
+        values.extend(start)
+        values.extend(end)
+    return values
+
+def points_from_flat(values):
+    return [(values[n], values[n + 1], values[n + 2]) for n in range(0, len(values), 3)]
+
+def struts_from_flat(values):
+    return [((values[n], values[n + 1], values[n + 2]), (values[n + 3], values[n + 4], values[n + 5])) for n in range(0, len(values), 6)]
+
+def flat_faces(faces):
+    """array("i") of four corners per triangle or quad face."""
+    values = array("i")
+    for face in faces:
+        values.extend(face)
+        if len(face) < FACE_CORNERS:
+            values.append(NO_CORNER)
+    return values
+
+def faces_from_flat(values):
+    faces = []
+    for n in range(0, len(values), FACE_CORNERS):
+        face = tuple(values[n:n + FACE_CORNERS])
+        faces.append(face[:3] if face[3] == NO_CORNER else face)
+    return faces
+
+def pack_mesh_arrays(vertices, faces):
+    return OrderedDict([("vertices", flat_points(vertices)), ("faces", flat_faces(faces))])
+
+def unpack_mesh_arrays(packed):
+    """(vertices, faces) of pack_mesh_arrays' plain data."""
+    vertices = points_from_flat(packed["vertices"])
+    faces = faces_from_flat(packed["faces"])
+    if faces and not -1 < min(min(face) for face in faces) <= max(max(face) for face in faces) < len(vertices):
+        raise ValueError("Cached face references a missing vertex")
+    return vertices, faces
+
+def stable_hash(*values):
+    """Hex digest of plain data that is the same in every session and on every machine."""
+    digest = hashlib.sha1()
+    for value in values:
+        update_hash(digest, value)
+    return digest.hexdigest()
+
+class ResultCache(object):
+    """Stage results stored by input hash in a directory, within a size budget."""
+
+    def __init__(self, directory = None, max_bytes = DEFAULT_MAX_BYTES):
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "latticetools-cache")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def key(self, stage, *inputs):
+        return stable_hash(stage, inputs)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def load(self, key):
+        """(True, value) for a stored entry, else (False, None)."""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as entry:
+                data = entry.read()
+        except (IOError, OSError):
+            return False, None
+        if not data.startswith(CACHE_VERSION):
+            self.remove(path)
+            return False, None
+        try:
+            value = decode(zlib.decompress(data[len(CACHE_VERSION):]))
+        except Exception:
+            #   A corrupt or incompatible entry is a miss and is replaced on store
+            self.remove(path)
+            return False, None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return True, value
+
+    def store(self, key, value):
+        data = CACHE_VERSION + zlib.compress(encode(value))
+        handle, temporary = tempfile.mkstemp(suffix = ".tmp", dir = self.directory)
+        with os.fdopen(handle, "wb") as entry:
+            entry.write(data)
+        path = self.path(key)
+        try:
+            if os.path.exists(path):
+                #   Same key, same content: keep the entry already in place
+                self.remove(temporary)
+            else:
+                os.rename(temporary, path)
+        except OSError:
+            self.remove(temporary)
+        self.writes += 1
+        self.evict()
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def entries(self):
+        """(mtime, size, path) of every entry, least recently used first."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(CACHE_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+        entries.sort()
+        return entries
+
+    def size(self):
+        return sum(size for mtime, size, path in self.entries())
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(path)
+            total -= size
+            self.evictions += 1
+
+    def cached(self, key, function):
+        """The stored result for key, or function() stored under key."""
+        found, value = self.load(key)
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+            value = function()
+            self.store(key, value)
+        return value
+
+    def report(self):
+        return OrderedDict([
+            ("cache_hits", self.hits),
+            ("cache_misses", self.misses),
+            ("cache_writes", self.writes),
+            ("cache_evictions", self.evictions),
+            ("cache_directory", self.directory)])
+
+    def log_record(self, name):
+        """Counts as a log record entry under name, for CombineJson."""
+        return LogRecord.entry(name, self.report())
@@ -0,0 +1,294 @@
+"""Half-space clipping of triangle meshes by planes.
+    A plane is an (origin, normal) pair and the clip keeps the side the normal
+    points towards, as the cut and symmetry surfaces of the Primitive component
+    are oriented. Every face is clipped against the plane in one pass: faces on
+    the kept side are copied, faces on the other side dropped and faces crossing
+    the plane cut along it. Cut points are keyed by the mesh edge they lie on, so
+    neighbouring faces share them and the clipped mesh stays welded.
+
+    With cap set, the naked edges left on the plane are chained into loops and
+    the loops are triangulated in the plane by ear clipping, holes bridged into
+    their outer loop first. The caps reuse the cut points, so a closed mesh
+    stays closed without any hole filling. Without cap the mesh is left open
+    along the plane, e.g. for mirroring across a symmetry plane."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import math
+
+DEFAULT_TOLERANCE = 1e-9
+
+class ClipResult(object):
+    """Clipped mesh arrays and counts of what the clip did."""
+
+    def __init__(self, vertices, faces):
+        self.vertices = vertices
+        self.faces = faces
+        self.removed_faces = 0
+        self.cut_faces = 0
+        self.cap_faces = 0
+        self.cap_loops = 0
+        self.open_loops = 0
+
+def unit_vector(vector):
+    length = math.sqrt(vector[0]**2 + vector[1]**2 + vector[2]**2)
+    if length == 0:
+        raise ValueError("Plane normal must not be zero")
+    return (vector[0]/length, vector[1]/length, vector[2]/length)
+
+def cross(a, b):
+    return (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0])
+
+def plane_basis(normal):
+    """Unit vectors u, v with u x v = -normal, so caps facing away from the kept side are counter-clockwise."""
+    w = (-normal[0], -normal[1], -normal[2])
+    axis = min(range(3), key = lambda i: abs(w[i]))
+    helper = [0.0, 0.0, 0.0]
+    helper[axis] = 1.0
+    u = unit_vector(cross(helper, w))
+    return u, cross(w, u)
+
+def triangles(faces):
+    for face in faces:
+        yield (face[0], face[1], face[2])
+        if len(face) == 4 and face[3] != face[2]:
+            yield (face[0], face[2], face[3])
+
+def signed_area(loop, points):
+    area = 0.0
+    for n in range(len(loop)):
+        x0, y0 = points[loop[n - 1]]
+        x1, y1 = points[loop[n]]
+        area += x0*y1 - x1*y0
+    return 0.5*area
+
+def turn(a, b, c):
+    return (b[0] - a[0])*(c[1] - a[1]) - (b[1] - a[1])*(c[0] - a[0])
+
+def in_triangle(p, a, b, c):
+    return turn(a, b, p) >= 0 and turn(b, c, p) >= 0 and turn(c, a, p) >= 0
+
+def in_polygon(p, loop, points):
+    inside = False
+    for n in range(len(loop)):
+        x0, y0 = points[loop[n - 1]]
+        x1, y1 = points[loop[n]]
+        if (y0 > p[1]) != (y1 > p[1]) and p[0] < x0 + (p[1] - y0)*(x1 - x0)/(y1 - y0):
+            inside = not inside
+    return inside
+
+def segments_cross(p, q, a, b):
+    return turn(p, q, a)*turn(p, q, b) < 0 and turn(a, b, p)*turn(a, b, q) < 0
+
+def bridge_hole(outer, hole, points, obstacles):
+    """Splice a clockwise hole into a counter-clockwise outer loop through a mutually visible vertex pair."""
+    m = max(range(len(hole)), key = lambda n: points[hole[n]][0])
+    start = points[hole[m]]
+    edges = [(loop[n - 1], loop[n]) for loop in [outer] + obstacles for n in range(len(loop))]
+    order = sorted(range(len(outer)), key = lambda n: (points[outer[n]][0] - start[0])**2 + (points[outer[n]][1] - start[1])**2)
+    bridge = order[0]
+    for n in order:
+        end = points[outer[n]]
+        if not any(segments_cross(start, end, points[a], points[b]) for a, b in edges if hole[m] not in (a, b) and outer[n] not in (a, b)):
+            bridge = n
+            break
+    return outer[:bridge + 1] + hole[m:] + hole[:m + 1] + outer[bridge:]
+
+def ear_clip(loop, points):
+    """Triangulate a counter-clockwise loop of point indices."""
+    indices = list(loop)
+    result = []
+    #   Only reflex vertices can lie inside an ear, and clipping never makes a vertex reflex.
+    #   Vertices repeated by hole bridges stay candidates throughout.
+    count = len(indices)
+    repeated = set(index for index in indices if indices.count(index) > 1) if count != len(set(indices)) else set()
+    reflex = set(indices[i] for i in range(count) if turn(points[indices[i - 1]], points[indices[i]], points[indices[(i + 1) % count]]) <= 0)
+    n = 0
+    while len(indices) > 3:
+        count = len(indices)
+        for attempt in range(count):
+            i = (n + attempt) % count
+            a, b, c = indices[i - 1], indices[i], indices[(i + 1) % count]
+            pa, pb, pc = points[a], points[b], points[c]
+            if turn(pa, pb, pc) <= 0:
+                continue
+            if any(in_triangle(points[p], pa, pb, pc) for p in reflex if p != a and p != b and p != c):
+                continue
+            break
+        else:
+            #   No strict ear, e.g. collinear remnants; clip where the search stopped
+            i = n % count
+            a, b, c = indices[i - 1], indices[i], indices[(i + 1) % count]
+        result.append((a, b, c))
+        del indices[i]
+        count -= 1
+        n = i % count
+        for k in (n - 1, n):
+            index = indices[k]
+            if index in reflex and index not in repeated and turn(points[indices[k - 1]], points[index], points[indices[(k + 1) % count]]) > 0:
+                reflex.discard(index)
+    result.append(tuple(indices))
+    return result
+
+def chain_loops(edges):
+    """Chain directed (start, end) edges into closed loops of vertex indices."""
+    following = {}
+    for start, end in edges:
+        following.setdefault(start, []).append(end)
+    loops = []
+    open_loops = 0
+    for first in list(following):
+        while following.get(first):
+            loop = [first]
+            current = following[first].pop()
+            while current != first:
+                ends = following.get(current)
+                if not ends:
+                    break
+                loop.append(current)
+                current = ends.pop()
+            if current == first and len(loop) >= 3:
+                loops.append(loop)
+            else:
+                open_loops += 1
+    return loops, open_loops
+
+def cap_loops(loops, vertices, origin, normal):
+    """Triangles filling the loops, which lie on the plane and run clockwise seen from the kept side."""
+    u, v = plane_basis(normal)
+    points = {}
+    for loop in loops:
+        for index in loop:
+            x, y, z = vertices[index][0] - origin[0], vertices[index][1] - origin[1], vertices[index][2] - origin[2]
+            points[index] = (x*u[0] + y*u[1] + z*u[2], x*v[0] + y*v[1] + z*v[2])
+
+    outers = []
+    holes = []
+    for loop in loops:
+        area = signed_area(loop, points)
+        if area > 0:
+            outers.append((area, loop))
+        elif area < 0:
+            holes.append(loop)
+    outers.sort(key = lambda item: item[0])
+
+    outer_holes = [[] for _ in outers]
+    for hole in holes:
+        for n, (area, outer) in enumerate(outers):
+            if in_polygon(points[hole[0]], outer, points):
+                outer_holes[n].append(hole)
+                break
+
+    faces = []
+    for (area, outer), inner in zip(outers, outer_holes):
+        inner.sort(key = lambda hole: -max(points[index][0] for index in hole))
+        for n, hole in enumerate(inner):
+            outer = bridge_hole(outer, hole, points, inner[n + 1:])
+        faces.extend(ear_clip(outer, points))
+    return faces
+
+def clip_plane(vertices, faces, origin, normal, cap = True, tolerance = DEFAULT_TOLERANCE):
+    """Clip a mesh by one plane, keeping the side the normal points towards."""
+    normal = unit_vector(normal)
+    distances = []
+    for x, y, z in vertices:
+        distance = (x - origin[0])*normal[0] + (y - origin[1])*normal[1] + (z - origin[2])*normal[2]
+        distances.append(0.0 if abs(distance) <= tolerance else distance)
+
+    points = list(vertices)
+    on_plane = set(index for index, distance in enumerate(distances) if distance == 0.0)
+    cut_points = {}
+    kept = []
+    removed = 0
+    cut = 0
+    for face in triangles(faces):
+        d0 = distances[face[0]]
+        d1 = distances[face[1]]
+        d2 = distances[face[2]]
+        if d0 >= 0 and d1 >= 0 and d2 >= 0:
+            if d0 > 0 or d1 > 0 or d2 > 0:
+                kept.append(face)
+            else:
+                removed += 1
+            continue
+        if d0 <= 0 and d1 <= 0 and d2 <= 0:
+            removed += 1
+            continue
+        cut += 1
+        polygon = []
+        for n in range(3):
+            a = face[n]
+            b = face[(n + 1) % 3]
+            da = distances[a]
+            db = distances[b]
+            if da >= 0:
+                polygon.append(a)
+            if (da > 0 and db < 0) or (da < 0 and db > 0):
+                key = (a, b) if a < b else (b, a)
+                index = cut_points.get(key)
+                if index is None:
+                    p, q = key
+                    t = distances[p]/(distances[p] - distances[q])
+                    index = len(points)
+                    points.append(tuple(points[p][i] + (points[q][i] - points[p][i])*t for i in range(3)))
+                    cut_points[key] = index
+                    on_plane.add(index)
+                polygon.append(index)
+        for n in range(1, len(polygon) - 1):
+            kept.append((polygon[0], polygon[n], polygon[n + 1]))
+
+    cap_faces = []
+    loops = []
+    open_loops = 0
+    if cap:
+        #   Naked edges on the plane, reversed so the caps face away from the kept side
+        plane_edges = set()
+        for face in kept:
+            for n in range(3):
+                a = face[n]
+                b = face[(n + 1) % 3]
+                if a in on_plane and b in on_plane:
+                    plane_edges.add((a, b))
+        loops, open_loops = chain_loops([(b, a) for a, b in plane_edges if (b, a) not in plane_edges])
+        cap_faces = cap_loops(loops, points, origin, normal)
+
+    #   Compact the vertices to those still in use
+    remap = {}
+    out_vertices = []
+    out_faces = []
+    for face in kept + cap_faces:
+        mapped = []
+        for index in face:
+            new = remap.get(index)
+            if new is None:
+                new = len(out_vertices)
+                remap[index] = new
+                out_vertices.append(points[index])
+            mapped.append(new)
+        out_faces.append(tuple(mapped))
+
+    result = ClipResult(out_vertices, out_faces)
+    result.removed_faces = removed
+    result.cut_faces = cut
+    result.cap_faces = len(cap_faces)
+    result.cap_loops = len(loops)
+    result.open_loops = open_loops
+    return result
+
+def clip_mesh(vertices, faces, planes, cap = True, tolerance = DEFAULT_TOLERANCE):
+    """Clip a mesh by (origin, normal) planes in turn, keeping the intersection of their positive sides."""
+    result = ClipResult(list(vertices), list(faces))
+    totals = ClipResult(None, None)
+    for origin, normal in planes:
+        result = clip_plane(result.vertices, result.faces, origin, normal, cap, tolerance)
+        totals.removed_faces += result.removed_faces
+        totals.cut_faces += result.cut_faces
+        totals.cap_faces += result.cap_faces
+        totals.cap_loops += result.cap_loops
+        totals.open_loops += result.open_loops
+    totals.vertices = result.vertices
+    totals.faces = result.faces
+    return totals
@@ -0,0 +1,179 @@
+"""Mesh diagnostics from a single walk over vertex and face arrays.
+    Vertices are (x, y, z) tuples and faces are triangles or quads of vertex
+    indices, as returned by rhinogeometry.mesh_arrays. Like Rhino's topology,
+    vertices at identical locations are treated as one topological vertex, so an
+    unwelded mesh is still recognised as closed.
+
+    One pass over the faces builds the edge to face adjacency, joins the face
+    vertices into components and accumulates the area and signed volume. Naked,
+    non-manifold and inconsistently oriented edges are then read off the edge
+    table, so every property of the report costs one topology walk in total."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import math
+from collections import OrderedDict
+
+#   Everything a MeshDiagnostics holds, as pack stores it
+PACKED_FIELDS = (
+    "vertex_count", "face_count", "invalid_faces", "repeated_index_faces", "degenerate_faces", "quad_count",
+    "area", "volume", "non_finite_vertices", "edge_count", "naked_edges", "non_manifold_edges",
+    "misoriented_edges", "disjoint_count")
+
+class MeshDiagnostics(object):
+    """Topology, validity and mass properties of an indexed mesh."""
+
+    def __init__(self, vertices, faces, area_tolerance = 0.0):
+        self.vertex_count = len(vertices)
+        self.face_count = len(faces)
+        self.invalid_faces = 0
+        self.repeated_index_faces = 0
+        self.degenerate_faces = 0
+        self.quad_count = 0
+        self.area = 0.0
+        self.volume = 0.0
+        self.non_finite_vertices = sum(1 for vertex in vertices if not all(map(is_finite, vertex)))
+
+        #   Topological vertex of every vertex, by exact location
+        topology_index = {}
+        topology = []
+        for vertex in vertices:
+            key = (vertex[0], vertex[1], vertex[2])
+            index = topology_index.get(key)
+            if index is None:
+                index = len(topology_index)
+                topology_index[key] = index
+            topology.append(index)
+        parents = list(range(len(topology_index)))
+
+        edge_faces = {}
+        edge_balance = {}
+        vertex_count = self.vertex_count
+        for face in faces:
+            if len(face) == 4 and face[3] == face[2]:
+                face = face[:3]
+            elif len(face) == 4:
+                self.quad_count += 1
+            if any(index < 0 or index >= vertex_count for index in face):
+                self.invalid_faces += 1
+                continue
+            if len(set(face)) < len(face):
+                self.repeated_index_faces += 1
+
+            face_area = 0.0
+            p0 = vertices[face[0]]
+            for n in range(1, len(face) - 1):
+                p1 = vertices[face[n]]
+                p2 = vertices[face[n + 1]]
+                ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+                vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+                nx, ny, nz = uy*vz - uz*vy, uz*vx - ux*vz, ux*vy - uy*vx
+                face_area += 0.5*math.sqrt(nx*nx + ny*ny + nz*nz)
+                self.volume += (p0[0]*nx + p0[1]*ny + p0[2]*nz)/6.0
+            self.area += face_area
+
+            nodes = [topology[index] for index in face]
+            if face_area <= area_tolerance or len(set(nodes)) < 3:
+                self.degenerate_faces += 1
+
+            root = find_root(parents, nodes[0])
+            for n in range(len(nodes)):
+                a = nodes[n]
+                b = nodes[(n + 1) % len(nodes)]
+                if a == b:
+                    continue
+                other = find_root(parents, b)
+                if other != root:
+                    parents[other] = root
+                key = (a, b) if a < b else (b, a)
+                edge_faces[key] = edge_faces.get(key, 0) + 1
+                edge_balance[key] = edge_balance.get(key, 0) + (1 if a < b else -1)
+
+        self.edge_count = len(edge_faces)
+        self.naked_edges = 0
+        self.non_manifold_edges = 0
+        self.misoriented_edges = 0
+        for key, count in edge_faces.items():
+            if count == 1:
+                self.naked_edges += 1
+            elif count > 2:
+                self.non_manifold_edges += 1
+            elif edge_balance[key] != 0:
+                self.misoriented_edges += 1
+
+        used = set(topology[index] for face in faces for index in face if 0 <= index < vertex_count)
+        self.disjoint_count = len(set(find_root(parents, node) for node in used))
+
+    def pack(self):
+        """Counts and mass properties as plain data, e.g. for the result cache."""
+        return OrderedDict((name, getattr(self, name)) for name in PACKED_FIELDS)
+
+    @classmethod
+    def unpack(cls, data):
+        diagnostics = cls.__new__(cls)
+        for name in PACKED_FIELDS:
+            setattr(diagnostics, name, data[name])
+        return diagnostics
+
+    @property
+    def manifold(self):
+        return self.non_manifold_edges == 0
+
+    @property
+    def closed(self):
+        return self.face_count > 0 and self.naked_edges == 0 and self.non_manifold_edges == 0
+
+    @property
+    def oriented(self):
+        return self.misoriented_edges == 0
+
+    @property
+    def valid(self):
+        return self.face_count > 0 and not self.invalid_faces and not self.repeated_index_faces and not self.non_finite_vertices
+
+    def problems(self):
+        """Reasons the mesh is invalid, as text; empty for a valid mesh."""
+        problems = []
+        if not self.face_count:
+            problems.append("mesh has no faces")
+        if self.invalid_faces:
+            problems.append("{} faces reference missing vertices".format(self.invalid_faces))
+        if self.repeated_index_faces:
+            problems.append("{} faces repeat a vertex index".format(self.repeated_index_faces))
+        if self.non_finite_vertices:
+            problems.append("{} vertices are not finite".format(self.non_finite_vertices))
+        return "; ".join(problems)
+
+    def report_items(self):
+        """(key, value) pairs for the JSON mesh report, in report order."""
+        return [
+            ("valid_mesh", self.valid),
+            ("naked_edges", self.naked_edges),
+            ("closed_mesh", self.closed),
+            ("manifold_mesh", self.manifold),
+            ("oriented_mesh", self.oriented),
+            ("disjoint_count", self.disjoint_count),
+            ("vertex_count", self.vertex_count),
+            ("face_count", self.face_count),
+            ("degenerate_face_count", self.degenerate_faces),
+            ("non_manifold_edges", self.non_manifold_edges),
+            ("volume", self.volume),
+            ("area", self.area),
+            ("log_invalid", self.problems())]
+
+def is_finite(value):
+    return not (math.isinf(value) or math.isnan(value))
+
+def find_root(parents, node):
+    root = node
+    while parents[root] != root:
+        root = parents[root]
+    while parents[node] != root:
+        parents[node], node = root, parents[node]
+    return root
+
+def mesh_diagnostics(vertices, faces, area_tolerance = 0.0):
+    return MeshDiagnostics(vertices, faces, area_tolerance)
@@ -0,0 +1,243 @@
+"""Direct binary STL and 3MF writers for mesh vertex and face buffers.
+    Triangles are packed in chunks of chunk_faces and each chunk is written with
+    a single call, so large meshes are written in a few large contiguous writes.
+    The writers also accept triangles incrementally, e.g. the blocks streamed by
+    isosurface.iter_mesh_blocks, so a mesh never has to be held in memory in full.
+    A 3MF writer welds the blocks' vertices by their keys as it goes, so the file
+    holds the same indexed mesh as isosurface.weld_blocks gives. Faces may be
+    triangles or quads; quads are split along their first diagonal.
+
+    A 3MF model carries its unit, given by name, e.g. the document's "Millimeters",
+    and millimeters by default. STL files have no unit."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import math
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+
+DEFAULT_CHUNK_FACES = 65536
+DEFAULT_UNIT = "millimeter"
+#   3MF model units by the singular and plural names of Rhino's unit systems
+THREEMF_UNITS = {
+    "micron": "micron", "microns": "micron",
+    "millimeter": "millimeter", "millimeters": "millimeter",
+    "centimeter": "centimeter", "centimeters": "centimeter",
+    "meter": "meter", "meters": "meter",
+    "inch": "inch", "inches": "inch",
+    "foot": "foot", "feet": "foot"}
+STL_HEADER = b"Binary STL written by LatticeTools"
+STL_TRIANGLE = struct.Struct("<12fH")
+STL_COUNT = struct.Struct("<I")
+
+THREEMF_MODEL = "3D/3dmodel.model"
+THREEMF_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="model" ContentType="application/vnd.ms-package.3dmanufacturing-3dmodel+xml"/>'
+    '</Types>')
+THREEMF_RELS = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Target="/3D/3dmodel.model" Id="rel0" Type="http://schemas.microsoft.com/3dmanufacturing/2013/01/3dmodel"/>'
+    '</Relationships>')
+
+def clean_path(path):
+    """Strip whitespace and the quotes SystemInfo adds around mesh_path for Rhino commands."""
+    return str(path).strip().strip('"').strip("'")
+
+def threemf_unit(name):
+    """3MF model unit of a unit system name; ValueError if 3MF has no such unit."""
+    unit = THREEMF_UNITS.get(str(name).strip().lower())
+    if unit is None:
+        raise ValueError("Unit not supported by 3MF: {}".format(name))
+    return unit
+
+def triangulate(faces):
+    for face in faces:
+        yield (face[0], face[1], face[2])
+        if len(face) == 4 and face[3] != face[2]:
+            yield (face[0], face[2], face[3])
+
+def mesh_triangles(vertices, faces):
+    for a, b, c in triangulate(faces):
+        yield (vertices[a], vertices[b], vertices[c])
+
+def facet_normal(p0, p1, p2):
+    ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+    vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+    nx, ny, nz = uy*vz - uz*vy, uz*vx - ux*vz, ux*vy - uy*vx
+    length = math.sqrt(nx*nx + ny*ny + nz*nz)
+    if length == 0:
+        return (0.0, 0.0, 0.0)
+    return (nx/length, ny/length, nz/length)
+
+class StlWriter(object):
+    """Binary STL written incrementally; the triangle count is patched in on close."""
+
+    def __init__(self, path, chunk_faces = DEFAULT_CHUNK_FACES):
+        self.path = path
+        self.chunk_faces = chunk_faces
+        self.count = 0
+        self.file = open(path, "wb")
+        self.file.write(STL_HEADER.ljust(80, b" "))
+        self.file.write(STL_COUNT.pack(0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_triangles(self, triangles):
+        pack = STL_TRIANGLE.pack
+        chunk = []
+        for p0, p1, p2 in triangles:
+            normal = facet_normal(p0, p1, p2)
+            chunk.append(pack(normal[0], normal[1], normal[2], p0[0], p0[1], p0[2], p1[0], p1[1], p1[2], p2[0], p2[1], p2[2], 0))
+            if len(chunk) >= self.chunk_faces:
+                self._flush(chunk)
+                chunk = []
+        if chunk:
+            self._flush(chunk)
+
+    def _flush(self, chunk):
+        self.file.write(b"".join(chunk))
+        self.count += len(chunk)
+
+    def write_mesh(self, vertices, faces):
+        self.write_triangles(mesh_triangles(vertices, faces))
+
+    def write_block(self, block):
+        #   STL lists every triangle's corners, so there is nothing to weld
+        self.write_triangles(block.triangles())
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.file.seek(80)
+        self.file.write(STL_COUNT.pack(self.count))
+        self.file.close()
+
+class ThreeMfWriter(object):
+    """3MF package written incrementally.
+
+    Vertices and triangles are spooled to temporary files, since the model lists
+    all vertices before any triangle, and zipped into the package on close."""
+
+    def __init__(self, path, unit = DEFAULT_UNIT, chunk_faces = DEFAULT_CHUNK_FACES):
+        self.path = path
+        self.unit = threemf_unit(unit)
+        self.chunk_faces = chunk_faces
+        self.vertex_count = 0
+        self.vertex_keys = {}
+        self.count = 0
+        self.directory = tempfile.mkdtemp()
+        self.vertex_file = open(os.path.join(self.directory, "vertices"), "w")
+        self.triangle_file = open(os.path.join(self.directory, "triangles"), "w")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_mesh(self, vertices, faces):
+        offset = self.vertex_count
+        self.write_vertices(vertices)
+        self.write_faces((a + offset, b + offset, c + offset) for a, b, c in triangulate(faces))
+
+    def write_block(self, block):
+        """Write an isosurface.MeshBlock, welding its vertices to those already written by their keys."""
+        remap = []
+        vertices = []
+        for key, point in zip(block.keys, block.vertices):
+            index = self.vertex_keys.get(key)
+            if index is None:
+                index = self.vertex_count + len(vertices)
+                self.vertex_keys[key] = index
+                vertices.append(point)
+            remap.append(index)
+        self.write_vertices(vertices)
+        self.write_faces((remap[a], remap[b], remap[c]) for a, b, c in block.faces)
+
+    def write_vertices(self, vertices):
+        chunk = []
+        for x, y, z in vertices:
+            chunk.append('<vertex x="{!r}" y="{!r}" z="{!r}"/>'.format(float(x), float(y), float(z)))
+            if len(chunk) >= self.chunk_faces:
+                self.vertex_file.write("".join(chunk))
+                chunk = []
+        self.vertex_file.write("".join(chunk))
+        self.vertex_count += len(vertices)
+
+    def write_faces(self, triangles):
+        chunk = []
+        for a, b, c in triangles:
+            chunk.append('<triangle v1="{}" v2="{}" v3="{}"/>'.format(a, b, c))
+            if len(chunk) >= self.chunk_faces:
+                self._flush(chunk)
+                chunk = []
+        if chunk:
+            self._flush(chunk)
+
+    def _flush(self, chunk):
+        self.triangle_file.write("".join(chunk))
+        self.count += len(chunk)
+
+    def write_triangles(self, triangles):
+        vertices = []
+        faces = []
+        for triangle in triangles:
+            faces.append((len(vertices), len(vertices) + 1, len(vertices) + 2))
+            vertices.extend(triangle)
+        self.write_mesh(vertices, faces)
+
+    def close(self):
+        if self.vertex_file.closed:
+            return
+        self.vertex_file.close()
+        self.triangle_file.close()
+        model_path = os.path.join(self.directory, "model")
+        with open(model_path, "w") as model:
+            model.write(
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<model unit="{}" xml:lang="en-US" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">'
+                '<resources><object id="1" type="model"><mesh><vertices>'.format(self.unit))
+            with open(self.vertex_file.name, "r") as vertices:
+                shutil.copyfileobj(vertices, model)
+            model.write('</vertices><triangles>')
+            with open(self.triangle_file.name, "r") as triangles:
+                shutil.copyfileobj(triangles, model)
+            model.write('</triangles></mesh></object></resources><build><item objectid="1"/></build></model>')
+        with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as package:
+            package.writestr("[Content_Types].xml", THREEMF_CONTENT_TYPES)
+            package.writestr("_rels/.rels", THREEMF_RELS)
+            package.write(model_path, THREEMF_MODEL)
+        shutil.rmtree(self.directory, True)
+
+def mesh_writer(path, chunk_faces = DEFAULT_CHUNK_FACES, unit = DEFAULT_UNIT):
+    """Writer for the file type given by the path's extension, .stl or .3mf."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".stl":
+        return StlWriter(path, chunk_faces)
+    if extension == ".3mf":
+        return ThreeMfWriter(path, unit, chunk_faces)
+    raise ValueError("Unsupported mesh file type: {}".format(extension))
+
+def write_mesh(path, vertices, faces, chunk_faces = DEFAULT_CHUNK_FACES, unit = DEFAULT_UNIT):
+    with mesh_writer(path, chunk_faces, unit) as writer:
+        writer.write_mesh(vertices, faces)
+
+def write_blocks(path, blocks, chunk_faces = DEFAULT_CHUNK_FACES, unit = DEFAULT_UNIT):
+    """Write a stream of isosurface.MeshBlock triangle batches, welded by their vertex keys."""
+    with mesh_writer(path, chunk_faces, unit) as writer:
+        for block in blocks:
+            writer.write_block(block)
@@ -0,0 +1,188 @@
+"""Array-backed lattice graph with node merging and strut deduplication.
+    Nodes are stored as a flat float64 array of coordinates and struts as a flat
+    int32 array of node index pairs. Each strut also carries a radius and an
+    integer tag, e.g. the index of the voxel it was mapped into. A radius of 0
+    means the radius is left to the consumer of the graph."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import math
+from array import array
+from collections import OrderedDict
+
+DEFAULT_TOLERANCE = 1e-6
+NO_TAG = -1
+
+class PointHash(object):
+    """Spatial hash that merges points closer than the tolerance."""
+
+    def __init__(self, tolerance = DEFAULT_TOLERANCE):
+        if tolerance <= 0:
+            raise ValueError("Merge tolerance must be positive")
+        self.tolerance = tolerance
+        self.points = []
+        self.cells = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def cell(self, point):
+        size = self.tolerance
+        return (int(math.floor(point[0]/size)), int(math.floor(point[1]/size)), int(math.floor(point[2]/size)))
+
+    def find(self, point):
+        i, j, k = self.cell(point)
+        limit = self.tolerance*self.tolerance
+        for di in (-1, 0, 1):
+            for dj in (-1, 0, 1):
+                for dk in (-1, 0, 1):
+                    for index in self.cells.get((i + di, j + dj, k + dk), ()):
+                        other = self.points[index]
+                        dx = other[0] - point[0]
+                        dy = other[1] - point[1]
+                        dz = other[2] - point[2]
+                        if dx*dx + dy*dy + dz*dz <= limit:
+                            return index
+        return None
+
+    def add(self, point):
+        index = self.find(point)
+        if index is None:
+            index = len(self.points)
+            self.points.append((float(point[0]), float(point[1]), float(point[2])))
+            self.cells.setdefault(self.cell(point), []).append(index)
+        return index
+
+def merge_points(points, tolerance = DEFAULT_TOLERANCE):
+    """Merge coincident points, returning the unique points and the index of each input point."""
+    point_hash = PointHash(tolerance)
+    indices = [point_hash.add(point) for point in points]
+    return point_hash.points, indices
+
+class LatticeGraph(object):
+    """Lattice stored as a node table and a strut index table."""
+
+    def __init__(self, tolerance = DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+        self.nodes = array("d")
+        self.struts = array("i")
+        self.radii = array("d")
+        self.tags = array("i")
+        self.merged_nodes = 0
+        self.dropped_struts = 0
+        self._node_hash = PointHash(tolerance)
+        self._strut_index = {}
+
+    @classmethod
+    def from_struts(cls, struts, tolerance = DEFAULT_TOLERANCE, radii = None, tags = None):
+        graph = cls(tolerance)
+        for i, (start, end) in enumerate(struts):
+            radius = radii[i] if radii is not None else 0.0
+            tag = tags[i] if tags is not None else NO_TAG
+            graph.add_strut(start, end, radius, tag)
+        return graph
+
+    @property
+    def node_count(self):
+        return len(self.nodes)//3
+
+    @property
+    def strut_count(self):
+        return len(self.struts)//2
+
+    def __len__(self):
+        return self.strut_count
+
+    def add_node(self, point):
+        count = len(self._node_hash)
+        index = self._node_hash.add(point)
+        if index == count:
+            self.nodes.extend(self._node_hash.points[index])
+        else:
+            self.merged_nodes += 1
+        return index
+
+    def add_strut(self, start, end, radius = 0.0, tag = NO_TAG):
+        """Add a strut between two points, returning its index or None if it was dropped."""
+        a = self.add_node(start)
+        b = self.add_node(end)
+        key = (a, b) if a < b else (b, a)
+        if a == b:
+            self.dropped_struts += 1
+            return None
+        existing = self._strut_index.get(key)
+        if existing is not None:
+            self.dropped_struts += 1
+            self.radii[existing] = max(self.radii[existing], radius)
+            return None
+        index = self.strut_count
+        self._strut_index[key] = index
+        self.struts.extend(key)
+        self.radii.append(radius)
+        self.tags.append(tag)
+        return index
+
+    def cache_key(self):
+        return (self.nodes, self.struts, self.radii, self.tags)
+
+    def pack(self):
+        """The graph's arrays and counts as plain data, e.g. for the result cache."""
+        return OrderedDict([
+            ("tolerance", self.tolerance),
+            ("nodes", self.nodes),
+            ("struts", self.struts),
+            ("radii", self.radii),
+            ("tags", self.tags),
+            ("merged_nodes", self.merged_nodes),
+            ("dropped_struts", self.dropped_struts)])
+
+    @classmethod
+    def unpack(cls, data):
+        """Graph of pack's plain data, with its node hash and strut index rebuilt."""
+        graph = cls(data["tolerance"])
+        graph.nodes = array("d", data["nodes"])
+        graph.struts = array("i", data["struts"])
+        graph.radii = array("d", data["radii"])
+        graph.tags = array("i", data["tags"])
+        graph.merged_nodes = data["merged_nodes"]
+        graph.dropped_struts = data["dropped_struts"]
+        if len(graph.nodes) % 3 or len(graph.struts) % 2 or not len(graph.radii) == len(graph.tags) == graph.strut_count:
+            raise ValueError("Inconsistent lattice graph arrays")
+        if graph.struts and not 0 <= min(graph.struts) <= max(graph.struts) < graph.node_count:
+            raise ValueError("Lattice graph strut references a missing node")
+        #   Stored nodes are already further apart than the tolerance, so they are hashed without merging
+        node_hash = graph._node_hash
+        for index in range(graph.node_count):
+            point = graph.node(index)
+            node_hash.points.append(point)
+            node_hash.cells.setdefault(node_hash.cell(point), []).append(index)
+        for index in range(graph.strut_count):
+            graph._strut_index[graph.strut_nodes(index)] = index
+        return graph
+
+    def node(self, index):
+        return (self.nodes[3*index], self.nodes[3*index + 1], self.nodes[3*index + 2])
+
+    def strut_nodes(self, index):
+        return (self.struts[2*index], self.struts[2*index + 1])
+
+    def strut_points(self, index = None):
+        if index is not None:
+            a, b = self.strut_nodes(index)
+            return (self.node(a), self.node(b))
+        return [self.strut_points(i) for i in range(self.strut_count)]
+
+    def strut_radii(self, default = 0.0):
+        """Radius of every strut, taking default, one value or one per strut, where the graph leaves it to the consumer."""
+        if not isinstance(default, (list, tuple)):
+            return [radius if radius > 0 else default for radius in self.radii]
+        if len(default) != self.strut_count:
+            raise ValueError("Expected {} default radii, got {}".format(self.strut_count, len(default)))
+        return [radius if radius > 0 else fallback for radius, fallback in zip(self.radii, default)]
+
+    def strut_length(self, index):
+        start, end = self.strut_points(index)
+        return math.sqrt(sum((end[i] - start[i])**2 for i in range(3)))
@@ -0,0 +1,267 @@
+"""Local stand-in for the Rhino calls of the pipeline, for running without a Rhino document.
+    LocalHost provides what the batch driver would otherwise get from the
+    Grasshopper components: the primitive read from an STL or OBJ file and
+    prepared as by the Primitive component, a voxel grid over it split into core
+    and boundary voxels, and mesh export. Everything is plain vertex and face
+    arrays, so it runs under CPython with no Rhino installed.
+
+    It is also the array counterpart of rhinogeometry.RhinoHost for the shared
+    stages of populate, sampling and meshing: voxels are lists of eight corners,
+    curves are struts, meshes are (vertices, faces) pairs and the repair stages
+    edit those arrays as the Rhino mesh methods edit a Rhino mesh. A unit cell
+    connectivity mesh maps to its arrays, but its skin needs Rhino's mesh
+    intersection and is left empty.
+
+    File primitives are welded and oriented outwards, in place of the healing,
+    welding and normal unification Rhino does in clean_primitive. Their cut and
+    symmetry planes are placed as the Primitive component places its surfaces."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import math
+import os
+import struct
+
+from latticetools import export as mesh_export
+from latticetools import primitive as primitive_registry
+from latticetools import trim as lattice_trim
+from latticetools.cache import stable_hash
+from latticetools.diagnostics import MeshDiagnostics
+from latticetools.graph import PointHash
+
+WELD_TOLERANCE = 1e-6
+STL_HEADER = 80
+STL_TRIANGLE = struct.Struct("<12fH")
+
+def read_stl(path):
+    """Triangle soup of a binary or ASCII STL file, as a vertex per triangle corner."""
+    with open(path, "rb") as stl:
+        data = stl.read()
+    vertices = []
+    if len(data) >= STL_HEADER + 4:
+        count = struct.unpack("<I", data[STL_HEADER:STL_HEADER + 4])[0]
+        if len(data) == STL_HEADER + 4 + count*STL_TRIANGLE.size:
+            for n in range(count):
+                values = STL_TRIANGLE.unpack_from(data, STL_HEADER + 4 + n*STL_TRIANGLE.size)
+                vertices.extend([values[3:6], values[6:9], values[9:12]])
+            return vertices
+    for line in data.decode("ascii", "replace").splitlines():
+        words = line.split()
+        if words and words[0] == "vertex":
+            vertices.append(tuple(float(value) for value in words[1:4]))
+    return vertices
+
+def read_obj(path):
+    """Vertices and faces of an OBJ file; polygons are fanned into triangles."""
+    vertices = []
+    faces = []
+    with open(path, "r") as obj:
+        for line in obj:
+            words = line.split()
+            if not words:
+                continue
+            if words[0] == "v":
+                vertices.append(tuple(float(value) for value in words[1:4]))
+            elif words[0] == "f":
+                #   Indices are one-based, or negative from the end, with optional /texture/normal parts
+                indices = []
+                for word in words[1:]:
+                    index = int(word.split("/")[0])
+                    indices.append(index - 1 if index > 0 else len(vertices) + index)
+                for n in range(1, len(indices) - 1):
+                    faces.append((indices[0], indices[n], indices[n + 1]))
+    return vertices, faces
+
+def weld(vertices, faces, tolerance = WELD_TOLERANCE):
+    """Merge coincident vertices, dropping faces that collapse."""
+    point_hash = PointHash(tolerance)
+    remap = [point_hash.add(vertex) for vertex in vertices]
+    welded = []
+    for face in faces:
+        mapped = tuple(remap[index] for index in face)
+        if len(set(mapped)) == len(mapped):
+            welded.append(mapped)
+    return point_hash.points, welded
+
+def read_mesh(path):
+    """Welded vertices and faces of an STL or OBJ file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".stl":
+        soup = read_stl(path)
+        return weld(soup, [(n, n + 1, n + 2) for n in range(0, len(soup), 3)])
+    if extension == ".obj":
+        return weld(*read_obj(path))
+    raise ValueError("Unsupported primitive file: {}".format(path))
+
+def face_area(vertices, face):
+    area = 0.0
+    p0 = vertices[face[0]]
+    for n in range(1, len(face) - 1):
+        p1 = vertices[face[n]]
+        p2 = vertices[face[n + 1]]
+        ux, uy, uz = p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]
+        vx, vy, vz = p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2]
+        area += 0.5*math.sqrt((uy*vz - uz*vy)**2 + (uz*vx - ux*vz)**2 + (ux*vy - uy*vx)**2)
+    return area
+
+def unify_faces(vertices, faces):
+    """Faces reversed to agree with their neighbours, each patch keeping its majority orientation, and how many were reversed."""
+    topology = {}
+    nodes = [[topology.setdefault(tuple(vertices[index]), len(topology)) for index in face] for face in faces]
+    edge_faces = {}
+    for f, face in enumerate(nodes):
+        for n in range(len(face)):
+            a, b = face[n], face[(n + 1) % len(face)]
+            if a != b:
+                edge_faces.setdefault((a, b) if a < b else (b, a), []).append(f)
+    reversed_faces = [None]*len(faces)
+    for seed in range(len(faces)):
+        if reversed_faces[seed] is not None:
+            continue
+        reversed_faces[seed] = False
+        patch = [seed]
+        stack = [seed]
+        while stack:
+            f = stack.pop()
+            face = nodes[f][::-1] if reversed_faces[f] else nodes[f]
+            for n in range(len(face)):
+                a, b = face[n], face[(n + 1) % len(face)]
+                neighbours = edge_faces.get((a, b) if a < b else (b, a), ())
+                #   Orientation is only carried across manifold edges
+                if len(neighbours) != 2:
+                    continue
+                g = neighbours[1] if neighbours[0] == f else neighbours[0]
+                if reversed_faces[g] is not None:
+                    continue
+                other = nodes[g]
+                #   A consistent neighbour runs the shared edge from b to a
+                reversed_faces[g] = any(other[m] == a and other[(m + 1) % len(other)] == b for m in range(len(other)))
+                patch.append(g)
+                stack.append(g)
+        if 2*sum(1 for f in patch if reversed_faces[f]) > len(patch):
+            for f in patch:
+                reversed_faces[f] = not reversed_faces[f]
+    unified = [tuple(reversed(face)) if flip else tuple(face) for face, flip in zip(faces, reversed_faces)]
+    return unified, sum(1 for flip in reversed_faces if flip)
+
+def cut_planes(bounds):
+    #   Top and bottom of the bounding box, facing into the part
+    (x0, y0, z0), (x1, y1, z1) = bounds
+    center = (0.5*(x0 + x1), 0.5*(y0 + y1))
+    return [((center[0], center[1], z1), (0.0, 0.0, -1.0)), ((center[0], center[1], z0), (0.0, 0.0, 1.0))]
+
+def symmetry_planes(bounds):
+    #   XY, YZ and ZX planes through the center, keeping the (-1, -1, -1) octant
+    center = tuple(0.5*(bounds[0][i] + bounds[1][i]) for i in range(3))
+    return [(center, (0.0, 0.0, -1.0)), (center, (-1.0, 0.0, 0.0)), (center, (0.0, -1.0, 0.0))]
+
+class LocalHost(object):
+    """Primitive files, voxels and export on plain arrays."""
+
+    def __init__(self, weld_tolerance = WELD_TOLERANCE):
+        self.weld_tolerance = weld_tolerance
+
+    def load_primitive(self, path):
+        """PreparedPrimitive of a mesh file, from the registry if the file is unchanged."""
+        with open(path, "rb") as source:
+            key = stable_hash(os.path.splitext(path)[1].lower(), bytearray(source.read()))
+        return primitive_registry.prepare(key, lambda: self.prepare(key, path))
+
+    def prepare(self, key, path):
+        vertices, faces = read_mesh(path)
+        if not faces:
+            raise ValueError("No faces in primitive file: {}".format(path))
+        if MeshDiagnostics(vertices, faces).volume < 0:
+            faces = [tuple(reversed(face)) for face in faces]
+        prepared = primitive_registry.PreparedPrimitive(key, vertices, faces)
+        prepared.cut_planes = cut_planes(prepared.bounds)
+        prepared.symmetry_planes = symmetry_planes(prepared.bounds)
+        return prepared.build()
+
+    def voxelize(self, prepared, cell_size):
+        """Core and boundary voxels of a grid of cell_size cubes over the primitive's bounds."""
+        if cell_size <= 0:
+            raise ValueError("Cell size must be positive")
+        lower, upper = prepared.bounds
+        counts = [max(1, int(math.ceil((upper[i] - lower[i])/cell_size - 1e-9))) for i in range(3)]
+        core = []
+        boundary = []
+        for i in range(counts[0]):
+            for j in range(counts[1]):
+                for k in range(counts[2]):
+                    x, y, z = lower[0] + i*cell_size, lower[1] + j*cell_size, lower[2] + k*cell_size
+                    #   Corners ordered as Rhino.Geometry.Box.GetCorners()
+                    corners = [
+                        (x, y, z), (x + cell_size, y, z), (x + cell_size, y + cell_size, z), (x, y + cell_size, z),
+                        (x, y, z + cell_size), (x + cell_size, y, z + cell_size),
+                        (x + cell_size, y + cell_size, z + cell_size), (x, y + cell_size, z + cell_size)]
+                    voxel_class = lattice_trim.classify_voxel(prepared.index, corners)
+                    if voxel_class == lattice_trim.INSIDE:
+                        core.append(corners)
+                    elif voxel_class == lattice_trim.STRADDLING:
+                        boundary.append(corners)
+        return core, boundary
+
+    def write_mesh(self, path, vertices, faces):
+        mesh_export.write_mesh(path, vertices, faces)
+        return path
+
+    def voxel_corners(self, voxel):
+        return list(voxel)
+
+    def curve_strut(self, curve):
+        """A curve is already a (start, end) strut."""
+        return tuple(curve)
+
+    def mesh_arrays(self, mesh):
+        return mesh
+
+    def arrays_to_mesh(self, vertices, faces):
+        return list(vertices), list(faces)
+
+    def mesh_with_vertices(self, mesh, vertices):
+        return list(vertices), list(mesh[1])
+
+    def skin(self, connect, primitive):
+        return []
+
+    def polyline_points(self, polyline):
+        return list(polyline)
+
+    def points_to_polyline(self, points):
+        return list(points)
+
+    def memory_estimate_mb(self, mesh):
+        #   Single precision vertices and normals and four indices per face, as a Rhino mesh holds them
+        return (len(mesh[0])*24 + len(mesh[1])*16)*1e-6
+
+    def cut_plane(self, geometry):
+        """A cut plane is already an (origin, normal) pair."""
+        return geometry
+
+    def remove_zero_area_faces(self, mesh):
+        vertices, faces = mesh
+        kept = [face for face in faces if face_area(vertices, face) > 0.0]
+        return len(faces) - len(kept), (vertices, kept)
+
+    def convert_quads(self, mesh):
+        vertices, faces = mesh
+        triangles = []
+        for face in faces:
+            if len(face) == 4 and face[2] != face[3]:
+                triangles.extend([(face[0], face[1], face[2]), (face[0], face[2], face[3])])
+            else:
+                triangles.append(tuple(face[:3]))
+        return len(triangles) - len(faces), (vertices, triangles)
+
+    def unify_normals(self, mesh):
+        vertices, faces = mesh
+        unified, count = unify_faces(vertices, faces)
+        return count, (vertices, unified)
+
+    def flip(self, mesh):
+        vertices, faces = mesh
+        return len(faces), (vertices, [tuple(reversed(face)) for face in faces])
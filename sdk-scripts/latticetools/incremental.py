@@ -0,0 +1,95 @@
+"""Incremental re-population of a lattice from the previous solve's results.
+    A LatticeState keeps the per-voxel results of a solve, keyed by the voxel's
+    role (core or boundary) and its rounded corners, together with the triangle
+    set of the primitive it was trimmed against and a hash of the settings that
+    shape every voxel (unit cell, connectivity, mapping). On the next solve
+    with the same settings, voxels whose key is new are mapped from scratch and
+    the rest reuse their record unless the primitive changed around them.
+
+    Primitive changes are found by diffing the rounded triangle sets of the two
+    primitives. Boundary voxels are always reclassified, which is cheap with the
+    primitive index, and a record is reused only if the class is unchanged and,
+    for straddling voxels, no added or removed triangle reaches the voxel."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+from collections import OrderedDict
+
+from latticetools.logrecord import LogRecord
+from latticetools.spatial import MeshIndex, triangulate_faces
+
+KEY_DIGITS = 9
+CORE = "core"
+BOUNDARY = "boundary"
+
+def round_point(point, digits = KEY_DIGITS):
+    return (round(point[0], digits), round(point[1], digits), round(point[2], digits))
+
+def voxel_key(role, corners, digits = KEY_DIGITS):
+    return (role,) + tuple(round_point(corner, digits) for corner in corners)
+
+def triangle_keys(vertices, faces, digits = KEY_DIGITS):
+    """Rounded, order-independent keys of a mesh's triangles."""
+    points = [round_point(vertex, digits) for vertex in vertices]
+    return set(tuple(sorted((points[a], points[b], points[c]))) for a, b, c in triangulate_faces(faces))
+
+class ChangedRegion(object):
+    """Triangles added to or removed from the primitive since the previous solve."""
+
+    def __init__(self, previous_triangles, triangles):
+        vertices = []
+        faces = []
+        for triangle in previous_triangles ^ triangles:
+            faces.append((len(vertices), len(vertices) + 1, len(vertices) + 2))
+            vertices.extend(triangle)
+        self.count = len(faces)
+        self.index = MeshIndex(vertices, faces) if faces else None
+
+    def touches(self, corners):
+        if self.index is None:
+            return False
+        lower = tuple(min(corner[i] for corner in corners) for i in range(3))
+        upper = tuple(max(corner[i] for corner in corners) for i in range(3))
+        return bool(self.index.box_triangles(lower, upper))
+
+class LatticeState(object):
+    """Per-voxel results of one solve, kept on the component for the next."""
+
+    def __init__(self, settings = None, triangles = None):
+        self.settings = settings
+        self.triangles = triangles if triangles is not None else set()
+        self.records = {}
+
+    def __len__(self):
+        return len(self.records)
+
+    def matches(self, settings):
+        return self.settings == settings
+
+class UpdateStats(object):
+    """Counts of how the voxels of a solve were obtained."""
+
+    def __init__(self):
+        self.reused = 0
+        self.mapped = 0
+        self.reclassified = 0
+        self.retrimmed = 0
+        self.removed = 0
+        self.changed_triangles = 0
+        self.full_rebuild = False
+
+    def report(self):
+        return OrderedDict([
+            ("reused_voxels", self.reused),
+            ("mapped_voxels", self.mapped),
+            ("reclassified_voxels", self.reclassified),
+            ("retrimmed_voxels", self.retrimmed),
+            ("removed_voxels", self.removed),
+            ("changed_triangles", self.changed_triangles),
+            ("full_rebuild", self.full_rebuild)])
+
+    def log_record(self, name):
+        return LogRecord.entry(name, self.report())
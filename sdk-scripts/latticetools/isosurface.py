@@ -0,0 +1,162 @@
+"""Iso-surface extraction from a volume.SparseVolume.
+    Each cell is split into six tetrahedra around its main diagonal and every
+    tetrahedron is polygonized on its own (marching tetrahedra). The split is the
+    same in every cell, so faces shared between cells are cut identically and the
+    surface is watertight. Surface vertices are keyed by the grid edge they lie on,
+    which welds the mesh across cells and blocks without a tolerance.
+
+    Samples within ISO_MARGIN voxels of the iso value are moved just outside it
+    before polygonizing. Every surface vertex then lies strictly inside its grid
+    edge, so no two edges put a vertex at the same point, e.g. at a sample that
+    falls exactly on the surface of an axis-aligned strut, and no triangle
+    collapses to zero area. The surface moves by at most the margin.
+
+    Extraction streams over the blocks in sorted key order, a window of at most
+    max_blocks blocks at a time. Blocks in a window are sampled and polygonized
+    in parallel, emitted as MeshBlock triangle batches and then released, so the
+    volume samples held in memory are bounded by the window size. Welding the
+    batches in order gives the same indexed mesh on every run."""
+
+from __future__ import division
+
+from latticetools import scheduler
+
+__author__ = "irw"
+__version__ = "20261018"
+
+CORNERS = ((0, 0, 0), (1, 0, 0), (0, 1, 0), (1, 1, 0), (0, 0, 1), (1, 0, 1), (0, 1, 1), (1, 1, 1))
+TETRAHEDRA = ((0, 1, 3, 7), (0, 3, 2, 7), (0, 2, 6, 7), (0, 6, 4, 7), (0, 4, 5, 7), (0, 5, 1, 7))
+DEFAULT_MAX_BLOCKS = 64
+ISO_MARGIN = 1e-3
+
+class MeshBuilder(object):
+    """Indexed triangle mesh whose vertices are welded by key."""
+
+    def __init__(self):
+        self.vertices = []
+        self.keys = []
+        self.faces = []
+        self.vertex_index = {}
+
+    def vertex(self, key, point):
+        index = self.vertex_index.get(key)
+        if index is None:
+            index = len(self.vertices)
+            self.vertex_index[key] = index
+            self.vertices.append(point)
+            self.keys.append(key)
+        return index
+
+    def triangle(self, a, b, c):
+        if a != b and b != c and a != c:
+            self.faces.append((a, b, c))
+
+    def add_block(self, block):
+        remap = [self.vertex(key, point) for key, point in zip(block.keys, block.vertices)]
+        for a, b, c in block.faces:
+            self.triangle(remap[a], remap[b], remap[c])
+
+class MeshBlock(object):
+    """Triangles extracted from one volume block, with the weld key of every vertex."""
+
+    def __init__(self, key, vertices, keys, faces):
+        self.key = key
+        self.vertices = vertices
+        self.keys = keys
+        self.faces = faces
+
+    def __len__(self):
+        return len(self.faces)
+
+    def triangles(self):
+        vertices = self.vertices
+        return [(vertices[a], vertices[b], vertices[c]) for a, b, c in self.faces]
+
+def edge_vertex(builder, grid_a, grid_b, value_a, value_b, voxel_size, iso):
+    t = (iso - value_a)/(value_b - value_a)
+    key = (grid_a, grid_b) if grid_a < grid_b else (grid_b, grid_a)
+    point = tuple((grid_a[i] + (grid_b[i] - grid_a[i])*t)*voxel_size for i in range(3))
+    return builder.vertex(key, point)
+
+def oriented_triangle(builder, vertices, midpoints, order, direction):
+    #   Orientation is decided on the grid edge midpoints rather than the interpolated
+    #   points, which can form slivers whose normals are unreliable
+    a, b, c = order
+    p0 = midpoints[a]
+    p1 = midpoints[b]
+    p2 = midpoints[c]
+    u = (p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2])
+    v = (p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2])
+    normal = (u[1]*v[2] - u[2]*v[1], u[2]*v[0] - u[0]*v[2], u[0]*v[1] - u[1]*v[0])
+    if normal[0]*direction[0] + normal[1]*direction[1] + normal[2]*direction[2] < 0:
+        builder.triangle(vertices[a], vertices[c], vertices[b])
+    else:
+        builder.triangle(vertices[a], vertices[b], vertices[c])
+
+def polygonize_tetrahedron(builder, grid, values, voxel_size, iso):
+    inside = [n for n in range(4) if values[n] < iso]
+    if not inside or len(inside) == 4:
+        return
+    outside = [n for n in range(4) if values[n] >= iso]
+    edges = [(a, b) for a in inside for b in outside]
+    vertices = [edge_vertex(builder, grid[a], grid[b], values[a], values[b], voxel_size, iso) for a, b in edges]
+    midpoints = [tuple(grid[a][i] + grid[b][i] for i in range(3)) for a, b in edges]
+    #   Normals point from the inside corners towards the outside corners
+    direction = tuple(
+        sum(grid[n][i] for n in outside)*len(inside) - sum(grid[n][i] for n in inside)*len(outside)
+        for i in range(3))
+    if len(vertices) == 3:
+        oriented_triangle(builder, vertices, midpoints, (0, 1, 2), direction)
+    else:
+        #   Two inside corners: edges (a0 b0), (a0 b1), (a1 b0), (a1 b1) form a quad
+        oriented_triangle(builder, vertices, midpoints, (0, 1, 3), direction)
+        oriented_triangle(builder, vertices, midpoints, (0, 3, 2), direction)
+
+def polygonize_cells(builder, volume, key, values, iso = 0.0):
+    size = volume.block_size
+    count = size + 1
+    voxel_size = volume.voxel_size
+    margin = ISO_MARGIN*voxel_size
+    values = [iso + margin if -margin < value - iso < margin else value for value in values]
+    if min(values) >= iso or max(values) < iso:
+        return
+    origin = volume.block_origin(key)
+    for i in range(size):
+        for j in range(size):
+            for k in range(size):
+                corner_values = [values[((i + dx)*count + j + dy)*count + k + dz] for dx, dy, dz in CORNERS]
+                if min(corner_values) >= iso or max(corner_values) < iso:
+                    continue
+                corner_grid = [(origin[0] + i + dx, origin[1] + j + dy, origin[2] + k + dz) for dx, dy, dz in CORNERS]
+                for tetrahedron in TETRAHEDRA:
+                    polygonize_tetrahedron(
+                        builder,
+                        [corner_grid[n] for n in tetrahedron],
+                        [corner_values[n] for n in tetrahedron],
+                        voxel_size, iso)
+
+def polygonize_block(volume, key, iso = 0.0):
+    builder = MeshBuilder()
+    polygonize_cells(builder, volume, key, volume.block_values(key), iso)
+    return MeshBlock(key, builder.vertices, builder.keys, builder.faces)
+
+def iter_mesh_blocks(volume, iso = 0.0, max_blocks = DEFAULT_MAX_BLOCKS, chunk_size = None, workers = None):
+    """Yield non-empty MeshBlocks in block key order, holding at most max_blocks blocks at a time."""
+    keys = volume.block_keys()
+    max_blocks = max(1, int(max_blocks))
+    for first in range(0, len(keys), max_blocks):
+        window = keys[first:first + max_blocks]
+        for block in scheduler.run(lambda key: polygonize_block(volume, key, iso), window, chunk_size, workers):
+            if block.faces:
+                yield block
+
+def weld_blocks(blocks):
+    """Weld a stream of MeshBlocks into one indexed mesh."""
+    builder = MeshBuilder()
+    for block in blocks:
+        builder.add_block(block)
+    return builder.vertices, builder.faces
+
+def volume_to_mesh(volume, iso = 0.0, max_blocks = DEFAULT_MAX_BLOCKS, chunk_size = None, workers = None):
+    """Vertices and triangles of the iso-surface, extracted block by block."""
+    return weld_blocks(iter_mesh_blocks(volume, iso, max_blocks, chunk_size, workers))
@@ -0,0 +1,111 @@
+"""Structured log entries passed between components, serialized once when written.
+    A LogRecord holds top-level log entries, e.g. {"original_report": {...}},
+    as native values: numbers stay numbers and flags stay booleans. Components
+    output records instead of JSON text, CombineJson merges them and the Logger
+    serializes the merged record once, compactly, at write time.
+
+    A record is deliberately not iterable, so Grasshopper passes it along a wire
+    as one item rather than enumerating its keys.
+
+    merge is shallow: entries are shared with the records they came from, and
+    only the objects under MERGED_KEYS, e.g. the per-component timings, are new
+    dicts that every record adds to. JSON text from older components or cached
+    results is parsed and merged alongside."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import json
+from collections import OrderedDict
+
+#   Objects every component adds to rather than replaces
+MERGED_KEYS = ("timings",)
+SEPARATORS = (',', ':')
+INDENT_SEPARATORS = (',', ': ')
+
+def json_default(value):
+    #   Values json cannot write natively, e.g. records nested in entries or .NET objects
+    if isinstance(value, LogRecord):
+        return value.entries
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+def dumps(data, indent = None):
+    """JSON text of log data, compact unless indented."""
+    return json.dumps(data, indent = indent, separators = INDENT_SEPARATORS if indent else SEPARATORS, default = json_default)
+
+class LogRecord(object):
+    """Top-level log entries as native values."""
+
+    def __init__(self, entries = None):
+        self.entries = OrderedDict(entries or ())
+
+    @classmethod
+    def entry(cls, name, value):
+        """Record of a single named entry, e.g. LogRecord.entry("cut_report", report)."""
+        return cls([(name, value)])
+
+    @classmethod
+    def from_value(cls, value):
+        """Record of a LogRecord, a dict or JSON object text; None for empty input."""
+        if isinstance(value, LogRecord):
+            return value
+        if isinstance(value, dict):
+            return cls(value)
+        if value is None:
+            return None
+        text = str(value).strip()
+        if not text:
+            return None
+        data = json.loads(text, object_pairs_hook = OrderedDict)
+        if not isinstance(data, dict):
+            raise ValueError("Log input is not a JSON object: {}".format(text[:80]))
+        return cls(data)
+
+    def get(self, name, default = None):
+        return self.entries.get(name, default)
+
+    def keys(self):
+        return list(self.entries.keys())
+
+    def update(self, other):
+        """Add the entries of another record in place, merging MERGED_KEYS."""
+        for name, value in other.entries.items():
+            if name in MERGED_KEYS and isinstance(value, dict):
+                current = self.entries.get(name)
+                if not isinstance(current, MergedEntry):
+                    #   Copy the first object merged, so the record it came from is left as it was
+                    current = MergedEntry(current if isinstance(current, dict) else ())
+                    self.entries[name] = current
+                current.update(value)
+            else:
+                self.entries[name] = value
+        return self
+
+    def to_json(self, indent = None):
+        return dumps(self.entries, indent)
+
+    def __str__(self):
+        return self.to_json(indent = 4)
+
+    def ToString(self):
+        #   Grasshopper panels and tooltips display a record through .NET ToString
+        return str(self)
+
+    def __repr__(self):
+        return "LogRecord({})".format(", ".join(self.keys()))
+
+class MergedEntry(OrderedDict):
+    """A merged object owned by the record it was merged into, so further merges update it in place."""
+
+def merge(items):
+    """One record of the entries of records, dicts or JSON object texts, later entries replacing earlier ones."""
+    merged = LogRecord()
+    for item in items:
+        record = LogRecord.from_value(item)
+        if record is not None:
+            merged.update(record)
+    return merged
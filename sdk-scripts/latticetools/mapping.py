@@ -0,0 +1,185 @@
+"""Batched trilinear mapping of unit cell struts into voxels.
+    Struts are sequences of (start, end) points, i.e. an (N, 2, 3) array, and
+    voxels are sequences of eight corners, i.e. an (M, 8, 3) array. Corners are
+    ordered as Rhino.Geometry.Box.GetCorners(): the bottom face counter-clockwise
+    from the minimum corner, followed by the top face in the same order.
+
+    Mapping a unit cell into a box voxel is affine, so straight struts stay
+    straight and only their endpoints need to be transformed. Voxels that are not
+    parallelepipeds are mapped with the full trilinear interpolation of their
+    corners, applied to the endpoints.
+
+    hexahedron_corners orders the eight vertices of any hexahedral voxel, e.g. a
+    twisted brep or a quad mesh, from its vertices and edges: the first corner
+    is the vertex lowest along x + y + z, and its edges are matched to the x, y
+    and z axes."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+AFFINE_TOLERANCE = 1e-9
+#   Ways of matching the three edges at the first corner to the u, v and w axes
+AXIS_ORDERS = ((0, 1, 2), (1, 2, 0), (2, 0, 1), (0, 2, 1), (1, 0, 2), (2, 1, 0))
+
+def normalize_point(point, bounds):
+    lower, upper = bounds
+    uvw = []
+    for i in range(3):
+        extent = upper[i] - lower[i]
+        if extent > 0:
+            uvw.append((point[i] - lower[i])/extent)
+        else:
+            uvw.append(0.0)
+    return uvw
+
+def voxel_coefficients(corners):
+    #   Trilinear map written as a polynomial in (u, v, w):
+    #   p = a + b*u + c*v + d*w + e*uv + f*uw + g*vw + h*uvw
+    c0, c1, c2, c3, c4, c5, c6, c7 = corners
+    coefficients = []
+    for i in range(3):
+        a = c0[i]
+        b = c1[i] - c0[i]
+        c = c3[i] - c0[i]
+        d = c4[i] - c0[i]
+        e = c2[i] - c1[i] - c3[i] + c0[i]
+        f = c5[i] - c1[i] - c4[i] + c0[i]
+        g = c7[i] - c3[i] - c4[i] + c0[i]
+        h = c6[i] - c2[i] - c5[i] - c7[i] + c1[i] + c3[i] + c4[i] - c0[i]
+        coefficients.append((a, b, c, d, e, f, g, h))
+    return coefficients
+
+def subtract(a, b):
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+def determinant(u, v, w):
+    return (
+        u[0]*(v[1]*w[2] - v[2]*w[1])
+        - u[1]*(v[0]*w[2] - v[2]*w[0])
+        + u[2]*(v[0]*w[1] - v[1]*w[0]))
+
+def hexahedron_corners(points, edges):
+    """Eight corners of a hexahedron, given its vertices and the vertex index pairs of its twelve edges, ordered as Box.GetCorners()."""
+    if len(points) != 8 or len(edges) != 12:
+        raise ValueError("Voxel is not a hexahedron: {} vertices and {} edges".format(len(points), len(edges)))
+    neighbours = [set() for point in points]
+    for a, b in edges:
+        neighbours[a].add(b)
+        neighbours[b].add(a)
+    if any(len(adjacent) != 3 for adjacent in neighbours):
+        raise ValueError("Voxel is not a hexahedron: every vertex needs three edges")
+    first = min(range(8), key = lambda n: (sum(points[n]), points[n][2], points[n][1], points[n][0]))
+    adjacent = sorted(neighbours[first])
+    directions = [subtract(points[n], points[first]) for n in adjacent]
+    best = None
+    for order in AXIS_ORDERS:
+        u, v, w = [directions[n] for n in order]
+        if determinant(u, v, w) <= 0:
+            continue
+        lengths = [max(sum(c*c for c in vector)**0.5, 1e-300) for vector in (u, v, w)]
+        alignment = u[0]/lengths[0] + v[1]/lengths[1] + w[2]/lengths[2]
+        if best is None or alignment > best[0]:
+            best = (alignment, order)
+    if best is None:
+        raise ValueError("Voxel is not a hexahedron: its first corner is flat")
+    c1, c3, c4 = [adjacent[n] for n in best[1]]
+
+    def shared(a, b):
+        common = (neighbours[a] & neighbours[b]) - set([first])
+        if len(common) != 1:
+            raise ValueError("Voxel is not a hexahedron: its faces are not quadrilaterals")
+        return common.pop()
+
+    c2 = shared(c1, c3)
+    c5 = shared(c1, c4)
+    c7 = shared(c3, c4)
+    remaining = set(range(8)) - set([first, c1, c2, c3, c4, c5, c7])
+    if len(remaining) != 1:
+        raise ValueError("Voxel is not a hexahedron: its faces are not quadrilaterals")
+    c6 = remaining.pop()
+    if set([c2, c5, c7]) != neighbours[c6]:
+        raise ValueError("Voxel is not a hexahedron: its faces are not quadrilaterals")
+    return [tuple(points[n]) for n in (first, c1, c2, c3, c4, c5, c6, c7)]
+
+def is_affine(coefficients, tolerance = AFFINE_TOLERANCE):
+    scale = 0.0
+    for axis in coefficients:
+        scale = max(scale, abs(axis[1]), abs(axis[2]), abs(axis[3]))
+    limit = tolerance*max(scale, 1.0)
+    for axis in coefficients:
+        if abs(axis[4]) > limit or abs(axis[5]) > limit or abs(axis[6]) > limit or abs(axis[7]) > limit:
+            return False
+    return True
+
+def monomials(point, bounds):
+    u, v, w = normalize_point(point, bounds)
+    return (u, v, w, u*v, u*w, v*w, u*v*w)
+
+class PointMapping(object):
+    """Points prepared for mapping into any number of voxels."""
+
+    def __init__(self, points, bounds):
+        self.bounds = bounds
+        self.nodes = [monomials(point, bounds) for point in points]
+
+    def map_coefficients(self, coefficients):
+        (ax, bx, cx, dx, ex, fx, gx, hx), (ay, by, cy, dy, ey, fy, gy, hy), (az, bz, cz, dz, ez, fz, gz, hz) = coefficients
+        mapped = []
+        if is_affine(coefficients):
+            for u, v, w, uv, uw, vw, uvw in self.nodes:
+                mapped.append((
+                    ax + bx*u + cx*v + dx*w,
+                    ay + by*u + cy*v + dy*w,
+                    az + bz*u + cz*v + dz*w))
+        else:
+            for u, v, w, uv, uw, vw, uvw in self.nodes:
+                mapped.append((
+                    ax + bx*u + cx*v + dx*w + ex*uv + fx*uw + gx*vw + hx*uvw,
+                    ay + by*u + cy*v + dy*w + ey*uv + fy*uw + gy*vw + hy*uvw,
+                    az + bz*u + cz*v + dz*w + ez*uv + fz*uw + gz*vw + hz*uvw))
+        return mapped
+
+    def map_nodes(self, corners):
+        return self.map_coefficients(voxel_coefficients(corners))
+
+class StrutMapping(PointMapping):
+    """Unit cell struts prepared for mapping into any number of voxels."""
+
+    def __init__(self, struts, bounds):
+        points = []
+        self.pairs = []
+        node_index = {}
+        for strut in struts:
+            pair = []
+            for point in strut:
+                key = (float(point[0]), float(point[1]), float(point[2]))
+                index = node_index.get(key)
+                if index is None:
+                    index = len(points)
+                    node_index[key] = index
+                    points.append(key)
+                pair.append(index)
+            self.pairs.append(tuple(pair))
+        super(StrutMapping, self).__init__(points, bounds)
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def map_struts(self, coefficients):
+        mapped = self.map_coefficients(coefficients)
+        return [(mapped[start], mapped[end]) for start, end in self.pairs]
+
+    def map_voxel(self, corners):
+        return self.map_struts(voxel_coefficients(corners))
+
+    def map_voxels(self, voxels):
+        struts = []
+        for corners in voxels:
+            struts.extend(self.map_voxel(corners))
+        return struts
+
+def map_struts(struts, bounds, voxels):
+    """Map (N, 2, 3) unit cell struts into (M, 8, 3) voxels, returning M*N struts in voxel order."""
+    return StrutMapping(struts, bounds).map_voxels(voxels)
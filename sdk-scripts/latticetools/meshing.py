@@ -0,0 +1,135 @@
+"""Stages shared by the Mesh components to generate and finish the lattice mesh.
+    native_mesh meshes struts, or points as zero-length struts, with the native
+    volume engine. Given a path, it also writes the iso-surface blocks to the
+    file as they are extracted, so a part that needs no repair is saved without
+    a second pass over the welded mesh. finish_mesh mirrors a symmetry domain's mesh into the whole part, reports
+    it, repairs it and cuts it, returning the repair.MeshState of the result and
+    the original, modified and cut reports as log records.
+
+    The stages work on vertex and face arrays and leave the mesh type to a
+    host: rhinogeometry.RhinoHost converts to and from Rhino meshes and repairs
+    them with the Rhino mesh methods for the components, and host.LocalHost
+    does the same on plain arrays for the batch driver.
+
+    pack_mesh and unpack_mesh turn a finished state into plain data for the
+    result cache and back."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+from collections import OrderedDict
+
+from latticetools import clip as mesh_clip
+from latticetools import export as mesh_export
+from latticetools import isosurface
+from latticetools import repair as mesh_repair
+from latticetools import volume as lattice_volume
+from latticetools.cache import pack_mesh_arrays, unpack_mesh_arrays
+from latticetools.diagnostics import MeshDiagnostics
+from latticetools.logrecord import LogRecord
+from latticetools.primitive import PreparedPrimitive
+
+def point_struts(points):
+    """Zero-length struts, meshed as a sphere at each point."""
+    return [(tuple(point),)*2 for point in points]
+
+def native_mesh(struts, radii, voxel_size, bandwidth = lattice_volume.DEFAULT_BAND_VOXELS, iso_value = 0.0, workers = None, path = None, unit = mesh_export.DEFAULT_UNIT):
+    """Vertices and faces of the union of capsules around struts, sampled while the mesh is extracted and written to path if given."""
+    volume = lattice_volume.SparseVolume(struts, radii, voxel_size, band = bandwidth*voxel_size)
+    blocks = isosurface.iter_mesh_blocks(volume, iso_value, workers = workers)
+    if not path:
+        return isosurface.weld_blocks(blocks)
+    #   Each block is welded into the mesh and handed to the writer before the next window is extracted
+    builder = isosurface.MeshBuilder()
+    mesh_export.write_blocks(path, welded_blocks(builder, blocks), unit = unit)
+    return builder.vertices, builder.faces
+
+def welded_blocks(builder, blocks):
+    for block in blocks:
+        builder.add_block(block)
+        yield block
+
+def repaired(mod_report):
+    """Whether a repair stage changed the mesh, from the changed flags of its modified report."""
+    properties = mod_report.get("modified_report")
+    return any(properties[name] is True for name in properties["repair_seconds"])
+
+def mesh_report(host, report_instance, state, additional_params = None):
+    """Log record of a mesh's diagnostics, named report_instance, followed by any additional (name, value) pairs."""
+    #   All topology checks come from one walk over the mesh arrays, cached on the state; values keep their types
+    properties = OrderedDict([("report_version", report_instance)])
+    properties.update(state.diagnostics.report_items())
+    properties["memory_estimate_mb"] = host.memory_estimate_mb(state.mesh)
+    if additional_params:
+        properties.update(additional_params)
+
+    return LogRecord.entry(report_instance, properties)
+
+def cut_planes(host, surfaces):
+    """(origin, normal) planes of cut surfaces, meshes or prepared primitives."""
+    #   A prepared primitive carries the planes of its cut surfaces, found once by the Primitive component
+    planes = []
+    for surface in surfaces:
+        if isinstance(surface, PreparedPrimitive):
+            planes.extend(surface.cut_planes)
+        else:
+            planes.append(host.cut_plane(surface))
+    return planes
+
+def finish_mesh(host, out_mesh, cut_surfaces, symmetry, repair_stages, profiler):
+    """Mirror, report, repair and cut a generated mesh, returning its MeshState and the three reports."""
+    cut_report = None
+    state = mesh_repair.MeshState(out_mesh, host)
+    if symmetry:
+        #   Clip the domain region at the symmetry planes, mirror it and weld the seams
+        with profiler.stage("symmetry") as stage:
+            mesh_arrays = symmetry.complete(*state.get("arrays"))
+            out_mesh = host.arrays_to_mesh(*mesh_arrays)
+            state.replace(out_mesh, arrays = mesh_arrays)
+            stage.count(faces = len(mesh_arrays[1]))
+    with profiler.stage("report"):
+        original_report = mesh_report(host, "original_report", state)
+
+    #   Make checks and first repairs, skipping those the mesh does not need
+    with profiler.stage("repair"):
+        repairs, failed, repair_seconds = mesh_repair.repair_pipeline(repair_stages).run(state)
+    repair_params = list(repairs)
+    repair_params.append(("repair_failed", failed))
+    repair_params.append(("repair_seconds", OrderedDict(repair_seconds)))
+    with profiler.stage("report"):
+        mod_report = mesh_report(host, "modified_report", state, repair_params)
+
+    #    Split mesh, keeping the side each cut plane faces and capping the cuts
+    if cut_surfaces:
+        vertices, faces = state.get("arrays")
+        with profiler.stage("cut", faces = len(faces)):
+            cut = mesh_clip.clip_mesh(vertices, faces, cut_planes(host, cut_surfaces))
+            out_mesh = host.arrays_to_mesh(cut.vertices, cut.faces)
+            state.replace(out_mesh, arrays = (cut.vertices, cut.faces))
+        cut_params = [
+            ("cut_faces", cut.cut_faces),
+            ("removed_faces", cut.removed_faces),
+            ("cap_faces", cut.cap_faces),
+            ("open_loops", cut.open_loops)]
+        with profiler.stage("report"):
+            cut_report = mesh_report(host, "cut_report", state, cut_params)
+
+    return state, (original_report, mod_report, cut_report)
+
+def pack_mesh(state, reports):
+    """Flat arrays, diagnostics and report entries of a finished mesh, for the result cache."""
+    return OrderedDict([
+        ("mesh", pack_mesh_arrays(*state.get("arrays"))),
+        ("diagnostics", state.diagnostics.pack()),
+        ("reports", [report.entries if report else None for report in reports])])
+
+def unpack_mesh(host, packed):
+    arrays = unpack_mesh_arrays(packed["mesh"])
+    diagnostics = MeshDiagnostics.unpack(packed["diagnostics"])
+    reports = tuple(LogRecord(entries) if entries is not None else None for entries in packed["reports"])
+    mesh = host.arrays_to_mesh(*arrays)
+    state = mesh_repair.MeshState(mesh, host)
+    state.replace(mesh, arrays = arrays, diagnostics = diagnostics)
+    return state, reports
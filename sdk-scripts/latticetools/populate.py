@@ -0,0 +1,282 @@
+"""Stages of the Uniform Lattice component: map unit cells into voxels, trim them and merge the lattice graph.
+    generate_lattice maps the core and boundary voxels, classifies the boundary
+    voxels against the primitive, skins and trims the straddling ones and merges
+    the trimmed struts into a LatticeGraph, each strut with its radius and
+    tagged with its voxel's index. update_lattice does the same reusing the
+    previous solve's records of unchanged voxels.
+
+    Voxels, connectivity meshes and skins are read and built through a host, so
+    the component runs the stages on Rhino geometry with
+    rhinogeometry.RhinoHost and the batch driver on plain arrays with
+    host.LocalHost. Struts are (start, end) pairs throughout. A mapping that
+    can drop unit cell curves, as BoxMapping can, returns MappedStruts, so each
+    remaining strut keeps its own curve's radius.
+
+    pack_lattice and unpack_lattice turn the outputs into flat arrays for the
+    result cache and back, rebuilding the meshes and polylines through the host."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+from collections import OrderedDict
+
+from latticetools import incremental as lattice_incremental
+from latticetools import mapping as lattice_mapping
+from latticetools import scheduler
+from latticetools import segment as lattice_segment
+from latticetools import trim as lattice_trim
+from latticetools.cache import flat_points, flat_struts, pack_mesh_arrays, points_from_flat, struts_from_flat, unpack_mesh_arrays
+from latticetools.graph import LatticeGraph, NO_TAG
+
+def unit_strut_radii(strut_counts, radius):
+    """Radius of each unit cell strut, given the struts of each unit cell curve and one radius or one per curve."""
+    curve_radii = lattice_segment.broadcast(lattice_segment.radius_values(radius) or [0.0], len(strut_counts))
+    unit_radii = []
+    for count, curve_radius in zip(strut_counts, curve_radii):
+        unit_radii.extend([curve_radius]*count)
+    return unit_radii
+
+class MappedStruts(list):
+    """Struts mapped into a voxel with the index into the unit radii of each, for mappings that can drop curves."""
+
+    def __init__(self, struts, units):
+        list.__init__(self, struts)
+        self.units = list(units)
+
+def mapped_struts(curve_struts, strut_counts):
+    """MappedStruts of a mapping's output curves as strut lists, None where a unit cell curve failed to map."""
+    if len(curve_struts) != len(strut_counts):
+        raise ValueError("Expected {} mapped curves, got {}".format(len(strut_counts), len(curve_struts)))
+    struts = []
+    units = []
+    offset = 0
+    for curve, count in zip(curve_struts, strut_counts):
+        if curve:
+            #   Every strut of a unit cell curve has the curve's radius
+            struts.extend(curve)
+            units.extend([offset]*len(curve))
+        offset += count
+    return MappedStruts(struts, units)
+
+def voxel_radii(struts, unit_radii):
+    """Radius of each strut of a voxel: the unit cell struts in order, or the units a MappedStruts names."""
+    units = getattr(struts, "units", None)
+    if units is not None:
+        return [unit_radii[unit] for unit in units]
+    if len(struts) != len(unit_radii):
+        raise ValueError("Expected {} mapped struts, got {}".format(len(unit_radii), len(struts)))
+    return unit_radii
+
+def add_trimmed(trimmed, struts, radii, tag):
+    lattice_trimmed, trimmed_radii, trimmed_tags = trimmed
+    lattice_trimmed.extend(struts)
+    trimmed_radii.extend(radii)
+    trimmed_tags.extend([tag]*len(struts))
+
+def trim_groups(groups, primitive_index, chunk_size, workers):
+    """Sections of every strut of the groups, in order; a voxel's struts are trimmed together in one batch of index queries."""
+    return scheduler.run(lambda group: lattice_trim.trim_voxel_struts(primitive_index, group), groups, chunk_size, workers, flatten = True)
+
+def map_lattice(host, voxel, strut_mapping):
+    #   Struts stay (start, end) pairs; curves are only built for the connected outputs
+    return strut_mapping.map_voxel(host.voxel_corners(voxel))
+
+def map_boundary_trilinear(host, voxel, strut_mapping, connectivity, connectivity_mapping):
+    #   The voxel transform is computed once for the struts and the connectivity mesh
+    corners = host.voxel_corners(voxel)
+    coefficients = lattice_mapping.voxel_coefficients(corners)
+    struts = strut_mapping.map_struts(coefficients)
+    connect = None
+    if connectivity_mapping:
+        connect = host.mesh_with_vertices(connectivity, connectivity_mapping.map_coefficients(coefficients))
+    return corners, struts, connect
+
+def symmetry_voxels(host, voxels, symmetry_domain):
+    return [voxel for voxel in voxels if symmetry_domain.keeps_voxel(host.voxel_corners(voxel))]
+
+def boundary_skin(host, voxel_class, connect, primitive):
+    if connect and voxel_class == lattice_trim.STRADDLING:
+        return host.skin(connect, primitive)
+    return []
+
+def populate_boundary(host, voxel, map_boundary, primitive, primitive_index):
+    corners, struts, connect = map_boundary(voxel)
+    voxel_class = lattice_trim.classify_voxel(primitive_index, corners)
+    return voxel_class, struts, connect, boundary_skin(host, voxel_class, connect, primitive)
+
+def generate_lattice(host, core_voxels, boundary_voxels, populate_function, map_boundary, unit_radii, prepared, chunk_size, workers, profiler):
+    primitive = prepared.mesh
+    primitive_index = prepared.index
+    with profiler.stage("core", voxels = len(core_voxels or [])) as stage:
+        core_groups = scheduler.run(populate_function, core_voxels or [], chunk_size, workers)
+        lattice_core = [strut for group in core_groups for strut in group]
+        stage.count(struts = len(lattice_core))
+
+    #   Boundary voxels are mapped, classified and skinned in a single pass. Core voxels are
+    #   inside by definition, so only the struts of straddling boundary voxels are intersected
+    with profiler.stage("boundary", voxels = len(boundary_voxels or [])) as stage:
+        boundary = scheduler.run(lambda voxel: populate_boundary(host, voxel, map_boundary, primitive, primitive_index), boundary_voxels or [], chunk_size, workers)
+        voxel_classes = []
+        boundary_groups = []
+        lattice_boundary = []
+        lattice_boundary_connect = []
+        lattice_skin = []
+        for voxel_class, struts, connect, skin in boundary:
+            voxel_classes.append(voxel_class)
+            boundary_groups.append(struts)
+            lattice_boundary.extend(struts)
+            if connect:
+                lattice_boundary_connect.append(connect)
+            if isinstance(skin, list):
+                lattice_skin.extend(skin)
+            elif skin:
+                lattice_skin.append(skin)
+        stage.count(struts = len(lattice_boundary))
+
+    straddling_groups = [group for voxel_class, group in zip(voxel_classes, boundary_groups) if voxel_class == lattice_trim.STRADDLING]
+    with profiler.stage("trim", struts = sum(len(group) for group in straddling_groups)):
+        trimmed_sections = iter(trim_groups(straddling_groups, primitive_index, chunk_size, workers))
+
+    #   Merge in input order so the output is the same on every run; a voxel's index is its struts' tag
+    trimmed = ([], [], [])
+    for tag, group in enumerate(core_groups):
+        add_trimmed(trimmed, group, voxel_radii(group, unit_radii), tag)
+    for n, (voxel_class, group) in enumerate(zip(voxel_classes, boundary_groups)):
+        tag = len(core_groups) + n
+        if voxel_class == lattice_trim.INSIDE:
+            add_trimmed(trimmed, group, voxel_radii(group, unit_radii), tag)
+        elif voxel_class == lattice_trim.STRADDLING:
+            for radius in voxel_radii(group, unit_radii):
+                sections = next(trimmed_sections)
+                add_trimmed(trimmed, sections, [radius]*len(sections), tag)
+    lattice_trimmed, trimmed_radii, trimmed_tags = trimmed
+    with profiler.stage("graph") as stage:
+        lattice_graph = LatticeGraph.from_struts(lattice_trimmed, radii = trimmed_radii, tags = trimmed_tags)
+        stage.count(nodes = lattice_graph.node_count, struts = lattice_graph.strut_count)
+
+    return lattice_core, lattice_boundary, lattice_trimmed, lattice_boundary_connect, lattice_skin, lattice_graph
+
+def update_lattice(host, previous, settings, core_voxels, boundary_voxels, populate_function, map_boundary, unit_radii, prepared, chunk_size, workers, profiler):
+    """generate_lattice reusing the previous solve's records of unchanged voxels; returns the outputs, the new state and the update counts."""
+    stats = lattice_incremental.UpdateStats()
+    primitive = prepared.mesh
+    primitive_index = prepared.index
+    state = lattice_incremental.LatticeState(settings, prepared.triangle_keys)
+    if previous is None or not previous.matches(settings):
+        #   No record is reused, so the primitive is not diffed against the previous one
+        previous = lattice_incremental.LatticeState(settings)
+        stats.full_rebuild = True
+        changed = None
+    else:
+        changed = lattice_incremental.ChangedRegion(previous.triangles, state.triangles)
+        stats.changed_triangles = changed.count
+
+    #   Core voxels are inside by definition, so their record is just the mapped struts
+    core_voxels = core_voxels or []
+    core_keys = [lattice_incremental.voxel_key(lattice_incremental.CORE, host.voxel_corners(voxel)) for voxel in core_voxels]
+    with profiler.stage("core", voxels = len(core_voxels)) as stage:
+        missing = [voxel for voxel, key in zip(core_voxels, core_keys) if key not in previous.records]
+        mapped = iter(scheduler.run(populate_function, missing, chunk_size, workers))
+        core_groups = []
+        for key in core_keys:
+            struts = previous.records.get(key)
+            if struts is None:
+                struts = next(mapped)
+                stats.mapped += 1
+            else:
+                stats.reused += 1
+            state.records[key] = struts
+            core_groups.append(struts)
+        lattice_core = [strut for group in core_groups for strut in group]
+        stage.count(mapped_voxels = len(missing))
+
+    #   Boundary voxels are always reclassified; a record is (class, struts, connect, skin, trimmed, trimmed radii)
+    boundary_voxels = boundary_voxels or []
+    boundary_corners = [host.voxel_corners(voxel) for voxel in boundary_voxels]
+    boundary_keys = [lattice_incremental.voxel_key(lattice_incremental.BOUNDARY, corners) for corners in boundary_corners]
+    with profiler.stage("boundary", voxels = len(boundary_voxels)) as stage:
+        voxel_classes = scheduler.run(lambda corners: lattice_trim.classify_voxel(primitive_index, corners), boundary_corners, chunk_size, workers)
+        records = [None]*len(boundary_voxels)
+        new = []
+        pending = {}
+        for n, (key, voxel_class) in enumerate(zip(boundary_keys, voxel_classes)):
+            record = previous.records.get(key)
+            if record is None:
+                new.append(n)
+            elif record[0] == voxel_class and not (voxel_class == lattice_trim.STRADDLING and changed.touches(boundary_corners[n])):
+                records[n] = record
+                stats.reused += 1
+            else:
+                pending[n] = (record[1], record[2])
+                stats.reclassified += 1
+        for n, (corners, struts, connect) in zip(new, scheduler.run(lambda n: map_boundary(boundary_voxels[n]), new, chunk_size, workers)):
+            pending[n] = (struts, connect)
+            stats.mapped += 1
+        stage.count(mapped_voxels = len(new))
+
+    #   Only new and reclassified voxels are skinned and trimmed again
+    pending_voxels = sorted(pending)
+    with profiler.stage("skin", voxels = len(pending_voxels)):
+        skins = scheduler.run(lambda n: boundary_skin(host, voxel_classes[n], pending[n][1], primitive), pending_voxels, chunk_size, workers)
+    straddling_groups = [pending[n][0] for n in pending_voxels if voxel_classes[n] == lattice_trim.STRADDLING]
+    stats.retrimmed += len(straddling_groups)
+    with profiler.stage("trim", struts = sum(len(group) for group in straddling_groups)):
+        trimmed_sections = iter(trim_groups(straddling_groups, primitive_index, chunk_size, workers))
+    for n, skin in zip(pending_voxels, skins):
+        struts, connect = pending[n]
+        trimmed = ([], [], [])
+        if voxel_classes[n] == lattice_trim.INSIDE:
+            add_trimmed(trimmed, struts, voxel_radii(struts, unit_radii), NO_TAG)
+        elif voxel_classes[n] == lattice_trim.STRADDLING:
+            for radius in voxel_radii(struts, unit_radii):
+                sections = next(trimmed_sections)
+                add_trimmed(trimmed, sections, [radius]*len(sections), NO_TAG)
+        records[n] = (voxel_classes[n], struts, connect, skin, trimmed[0], trimmed[1])
+
+    lattice_boundary = []
+    lattice_boundary_connect = []
+    lattice_skin = []
+    #   Tags are the voxels' indices in this solve, so they are given here rather than kept in the records
+    trimmed = ([], [], [])
+    for tag, group in enumerate(core_groups):
+        add_trimmed(trimmed, group, voxel_radii(group, unit_radii), tag)
+    for n, (key, record) in enumerate(zip(boundary_keys, records)):
+        voxel_class, struts, connect, skin, boundary_trimmed, boundary_radii = record
+        state.records[key] = record
+        lattice_boundary.extend(struts)
+        if connect:
+            lattice_boundary_connect.append(connect)
+        if isinstance(skin, list):
+            lattice_skin.extend(skin)
+        elif skin:
+            lattice_skin.append(skin)
+        add_trimmed(trimmed, boundary_trimmed, boundary_radii, len(core_groups) + n)
+    lattice_trimmed, trimmed_radii, trimmed_tags = trimmed
+    stats.removed = sum(1 for key in previous.records if key not in state.records)
+    with profiler.stage("graph") as stage:
+        lattice_graph = LatticeGraph.from_struts(lattice_trimmed, radii = trimmed_radii, tags = trimmed_tags)
+        stage.count(nodes = lattice_graph.node_count, struts = lattice_graph.strut_count)
+
+    outputs = lattice_core, lattice_boundary, lattice_trimmed, lattice_boundary_connect, lattice_skin, lattice_graph
+    return outputs, state, stats
+
+def pack_lattice(host, lattice_core, lattice_boundary, lattice_trimmed, lattice_boundary_connect, lattice_skin, lattice_graph):
+    """Flat arrays of the outputs, for the result cache."""
+    return OrderedDict([
+        ("core", flat_struts(lattice_core)),
+        ("boundary", flat_struts(lattice_boundary)),
+        ("trimmed", flat_struts(lattice_trimmed)),
+        ("connect", [pack_mesh_arrays(*host.mesh_arrays(connect)) for connect in lattice_boundary_connect]),
+        ("skin", [flat_points(host.polyline_points(skin)) for skin in lattice_skin]),
+        ("graph", lattice_graph.pack())])
+
+def unpack_lattice(host, packed):
+    return (
+        struts_from_flat(packed["core"]),
+        struts_from_flat(packed["boundary"]),
+        struts_from_flat(packed["trimmed"]),
+        [host.arrays_to_mesh(*unpack_mesh_arrays(arrays)) for arrays in packed["connect"]],
+        [host.points_to_polyline(points_from_flat(points)) for points in packed["skin"]],
+        LatticeGraph.unpack(packed["graph"]))
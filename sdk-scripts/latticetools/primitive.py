@@ -0,0 +1,126 @@
+"""Prepared primitives, built once by the Primitive component and shared by the others.
+    A PreparedPrimitive holds the cleaned primitive mesh as vertex and face
+    arrays with everything derived from it: the bounds, the spatial.MeshIndex
+    used for face queries and inside/outside tests, the rounded triangle keys
+    compared by incremental population, and the subdomains clipped off at the
+    symmetry planes. Derived data is computed on first use and kept.
+
+    Prepared primitives are held in a module-level registry keyed by geometry
+    hash. The Primitive component registers each one under the hash of its
+    input and of the cleaned mesh, so a later solve with the same input, or a
+    populate or meshing component given the cleaned mesh, finds it without
+    meshing, healing or indexing again. The registry keeps the most recently
+    used MAX_PREPARED primitives."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+from collections import OrderedDict
+
+from latticetools import clip as mesh_clip
+from latticetools.incremental import triangle_keys
+from latticetools.spatial import MeshIndex
+
+MAX_PREPARED = 8
+
+class PreparedPrimitive(object):
+    """A cleaned primitive mesh and the structures derived from it."""
+
+    def __init__(self, key, vertices, faces, symmetry_planes = None, cut_planes = None, mesh = None):
+        self.key = key
+        self.vertices = list(vertices)
+        self.faces = list(faces)
+        self.symmetry_planes = list(symmetry_planes or [])
+        self.cut_planes = list(cut_planes or [])
+        #   The host application's mesh of the arrays, e.g. for Rhino mesh intersections
+        self.mesh = mesh
+        #   Other host geometry built alongside, e.g. the Primitive component's outputs
+        self.host = {}
+        self.bounds = (
+            tuple(min(vertex[i] for vertex in self.vertices) for i in range(3)),
+            tuple(max(vertex[i] for vertex in self.vertices) for i in range(3)))
+        self._index = None
+        self._triangle_keys = None
+        self._subdomains = {}
+
+    def cache_key(self):
+        return self.key
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = MeshIndex(self.vertices, self.faces)
+        return self._index
+
+    @property
+    def triangle_keys(self):
+        if self._triangle_keys is None:
+            self._triangle_keys = triangle_keys(self.vertices, self.faces)
+        return self._triangle_keys
+
+    def build(self):
+        """Compute the derived data that is otherwise built on first use."""
+        self.index
+        self.triangle_keys
+        return self
+
+    def is_inside(self, point):
+        return self.index.is_inside(point)
+
+    def subdomain(self, planes):
+        """Arrays of the closed part of the primitive in front of the (origin, normal) planes."""
+        key = tuple(planes)
+        if key not in self._subdomains:
+            clipped = mesh_clip.clip_mesh(self.vertices, self.faces, planes)
+            self._subdomains[key] = (clipped.vertices, clipped.faces)
+        return self._subdomains[key]
+
+    @property
+    def octant(self):
+        return self.subdomain(self.symmetry_planes)
+
+    @property
+    def quarter(self):
+        return self.subdomain(self.symmetry_planes[1:3])
+
+_registry = OrderedDict()
+
+def registered_keys(prepared):
+    return [key for key, value in _registry.items() if value is prepared]
+
+def touch(prepared):
+    #   All keys of a primitive move together, so its aliases are evicted with it and not before
+    for key in registered_keys(prepared):
+        _registry[key] = _registry.pop(key)
+
+def lookup(key):
+    """The registered primitive for key, or None."""
+    prepared = _registry.get(key)
+    if prepared is not None:
+        touch(prepared)
+    return prepared
+
+def register(prepared, *keys):
+    """Register a primitive under its own key and any further keys, evicting the least recently used."""
+    for key in (prepared.key,) + keys:
+        _registry.pop(key, None)
+        _registry[key] = prepared
+    touch(prepared)
+    while len(set(id(value) for value in _registry.values())) > MAX_PREPARED:
+        for key in registered_keys(next(iter(_registry.values()))):
+            del _registry[key]
+    return prepared
+
+def prepare(key, build):
+    """The registered primitive for key, or build() registered under key."""
+    prepared = lookup(key)
+    if prepared is None:
+        prepared = register(build())
+        if prepared.key != key:
+            register(prepared, key)
+    return prepared
+
+def clear():
+    _registry.clear()
@@ -0,0 +1,177 @@
+"""Per-stage timing, memory and item counts for the JSON log.
+    A Profiler collects the stages of one component solve. Each stage records
+    its wall and CPU time, its memory and counts of the items it handled, e.g.
+    voxels, struts, points or faces. Stages are entered as a context manager or
+    wrapped with the profile decorator, and a stage entered again adds to its
+    totals. The count named as a stage's input, e.g. the voxels a mapping stage
+    maps, is reported as its input, so per-item rates divide by it.
+
+    A stage's own memory is reported as memory_delta_mb, the change in resident
+    memory over the stage, and peak_growth_mb, how far the stage raised the
+    process's peak memory. process_peak_memory_mb is the process-wide peak when
+    the stage last ended, the same for every stage that ran after the peak.
+
+    CPU time and memory are read for the whole process, from the standard
+    library under CPython and from System.Diagnostics under IronPython, so they
+    include the scheduler's worker threads. Each is reported as null where
+    neither source is available.
+
+    log_record gives {"timings": {profiler name: {stage: record}}} as a
+    LogRecord, which CombineJson merges with the timings of the other
+    components."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from latticetools.logrecord import LogRecord
+from latticetools.scheduler import clock
+
+TIMINGS = "timings"
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    from System.Diagnostics import Process
+except ImportError:
+    Process = None
+
+STATM = "/proc/self/statm"
+
+def cpu_seconds():
+    """CPU time used by the process so far, or None."""
+    if hasattr(time, "process_time"):
+        return time.process_time()
+    if Process is not None:
+        return Process.GetCurrentProcess().TotalProcessorTime.TotalSeconds
+    return None
+
+def peak_memory_mb():
+    """Peak resident memory of the process so far, or None."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        #   Kilobytes on Linux, bytes on macOS
+        return peak*1e-6 if sys.platform == "darwin" else peak*1e-3
+    if Process is not None:
+        return Process.GetCurrentProcess().PeakWorkingSet64*1e-6
+    return None
+
+def resident_memory_mb():
+    """Resident memory of the process now, or None."""
+    if resource is not None and os.path.exists(STATM):
+        with open(STATM, "r") as statm:
+            pages = int(statm.read().split()[1])
+        return pages*resource.getpagesize()*1e-6
+    if Process is not None:
+        return Process.GetCurrentProcess().WorkingSet64*1e-6
+    return None
+
+def elapsed(start, end):
+    return None if start is None or end is None else end - start
+
+def add(total, value):
+    return None if total is None or value is None else total + value
+
+class StageRecord(object):
+    """Totals of one named stage."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.memory_delta_mb = 0.0
+        self.peak_growth_mb = 0.0
+        self.process_peak_memory_mb = None
+        self.input = None
+        self.counts = OrderedDict()
+
+    def count(self, **counts):
+        """Add item counts, e.g. record.count(struts = len(struts))."""
+        for name in sorted(counts):
+            self.counts[name] = self.counts.get(name, 0) + counts[name]
+
+    def report(self):
+        report = OrderedDict([
+            ("wall_seconds", self.wall_seconds),
+            ("cpu_seconds", self.cpu_seconds),
+            ("memory_delta_mb", self.memory_delta_mb),
+            ("peak_growth_mb", self.peak_growth_mb),
+            ("process_peak_memory_mb", self.process_peak_memory_mb),
+            ("calls", self.calls),
+            ("input", self.input)])
+        report.update(self.counts)
+        return report
+
+class Stage(object):
+    """Context manager timing one run of a stage into its record."""
+
+    def __init__(self, record):
+        self.record = record
+
+    def __enter__(self):
+        self.resident = resident_memory_mb()
+        self.peak = peak_memory_mb()
+        self.wall = clock()
+        self.cpu = cpu_seconds()
+        return self.record
+
+    def __exit__(self, error_type, error, trace):
+        record = self.record
+        record.calls += 1
+        record.wall_seconds += clock() - self.wall
+        record.cpu_seconds = add(record.cpu_seconds, elapsed(self.cpu, cpu_seconds()))
+        peak = peak_memory_mb()
+        record.memory_delta_mb = add(record.memory_delta_mb, elapsed(self.resident, resident_memory_mb()))
+        record.peak_growth_mb = add(record.peak_growth_mb, elapsed(self.peak, peak))
+        record.process_peak_memory_mb = peak
+        return False
+
+class Profiler(object):
+    """Stage records of one component, in the order the stages first ran."""
+
+    def __init__(self, name):
+        self.name = name
+        self.records = OrderedDict()
+
+    def record(self, name):
+        if name not in self.records:
+            self.records[name] = StageRecord(name)
+        return self.records[name]
+
+    def stage(self, name, input = None, **counts):
+        """Context manager timing a stage; counts given here or on the yielded record are added to it."""
+        record = self.record(name)
+        #   input names the count of items the stage handles, by default the only count given here
+        if input is None and len(counts) == 1:
+            input = list(counts)[0]
+        if input is not None:
+            record.input = input
+        record.count(**counts)
+        return Stage(record)
+
+    def profile(self, name):
+        """Decorator timing every call of a function as the named stage."""
+        def decorator(function):
+            def profiled(*args, **kwargs):
+                with self.stage(name):
+                    return function(*args, **kwargs)
+            profiled.__name__ = function.__name__
+            profiled.__doc__ = function.__doc__
+            return profiled
+        return decorator
+
+    def report(self):
+        return OrderedDict((name, record.report()) for name, record in self.records.items())
+
+    def log_record(self):
+        return LogRecord.entry(TIMINGS, OrderedDict([(self.name, self.report())]))
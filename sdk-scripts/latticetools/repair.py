@@ -0,0 +1,148 @@
+"""Mesh repair as a pipeline of stages sharing cached mesh analyses.
+    A MeshState holds the mesh and the analyses computed on it so far, such as
+    the diagnostics.MeshDiagnostics of the mesh and the volume and area read off
+    it. Each stage declares whether it is needed, checked against the cached
+    analyses, and which analyses it invalidates when it runs. A mesh that needs
+    no repair therefore costs the single diagnostics walk, which the reports,
+    the flip check and the final volume and area all share.
+
+    The stages change the mesh through the host given to MeshState:
+    rhinogeometry.RhinoHost calls the Rhino.Geometry.Mesh methods on a Rhino
+    mesh in place, and host.LocalHost edits vertex and face arrays. A Rhino mesh
+    is only converted to arrays, through the host, when an analysis has to be
+    recomputed, and the cached arrays can be reused for export.
+
+    A host reports how many faces a stage changed, or FAILED. The pipeline
+    reports each stage as changed only when that count is positive, and lists
+    failed stages separately, so a stage that failed or found nothing to do
+    never marks the mesh as modified."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+from latticetools import diagnostics as mesh_diagnostics
+from latticetools.scheduler import clock
+
+ALL = None
+FAILED = -1
+
+class MeshState(object):
+    """A mesh with lazily computed, cached analyses."""
+
+    def __init__(self, mesh, host, analyses = None):
+        self.mesh = mesh
+        self.host = host
+        self.analyses = dict(DEFAULT_ANALYSES)
+        if analyses:
+            self.analyses.update(analyses)
+        self.cache = {}
+
+    def get(self, name):
+        if name not in self.cache:
+            self.cache[name] = self.analyses[name](self)
+        return self.cache[name]
+
+    def invalidate(self, names = ALL):
+        if names is ALL:
+            self.cache.clear()
+        else:
+            for name in names:
+                self.cache.pop(name, None)
+
+    def replace(self, mesh, **analyses):
+        """Swap in a new mesh, optionally with analyses already known for it, e.g. its arrays."""
+        self.mesh = mesh
+        self.invalidate()
+        self.cache.update(analyses)
+
+    @property
+    def diagnostics(self):
+        return self.get("diagnostics")
+
+    @property
+    def volume(self):
+        return self.get("volume")
+
+    @property
+    def area(self):
+        return self.get("area")
+
+DEFAULT_ANALYSES = {
+    "arrays": lambda state: state.host.mesh_arrays(state.mesh),
+    "diagnostics": lambda state: mesh_diagnostics.MeshDiagnostics(*state.get("arrays")),
+    "volume": lambda state: state.get("diagnostics").volume,
+    "area": lambda state: state.get("diagnostics").area}
+
+class Stage(object):
+    """A repair step and its report key."""
+
+    def __init__(self, name, run, needed = None, invalidates = ALL):
+        self.name = name
+        self.run = run
+        self.needed = needed
+        self.invalidates = invalidates
+
+class RepairPipeline(object):
+    """Stages run in order on a MeshState, skipping those that are not needed."""
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+
+    def run(self, state):
+        """Run the stages, returning (name, changed) pairs, the names of failed stages and per-stage (name, seconds) pairs."""
+        results = []
+        failed = []
+        timings = []
+        for stage in self.stages:
+            start = clock()
+            count = 0
+            if stage.needed is None or stage.needed(state):
+                count = stage.run(state)
+                state.invalidate(stage.invalidates)
+            if count == FAILED:
+                failed.append(stage.name)
+            timings.append((stage.name, clock() - start))
+            results.append((stage.name, count > 0))
+        return results, failed, timings
+
+#   A host returns the number of faces a stage changed, or FAILED, and the mesh, changed in place or a new one
+def remove_zero_area_faces(state):
+    removed, state.mesh = state.host.remove_zero_area_faces(state.mesh)
+    return removed
+
+def convert_quads(state):
+    converted, state.mesh = state.host.convert_quads(state.mesh)
+    return converted
+
+def unify_normals(state):
+    unified, state.mesh = state.host.unify_normals(state.mesh)
+    return unified
+
+def flip_inside_out(state):
+    flipped, state.mesh = state.host.flip(state.mesh)
+    return flipped
+
+STAGES = {
+    "degenerate_faces": Stage(
+        "degenerate_faces", remove_zero_area_faces,
+        needed = lambda state: state.diagnostics.degenerate_faces > 0),
+    "quads_to_tris": Stage(
+        "quads_to_tris", convert_quads,
+        needed = lambda state: state.diagnostics.quad_count > 0),
+    "unified_normals": Stage(
+        "unified_normals", unify_normals,
+        needed = lambda state: not state.diagnostics.oriented),
+    "mesh_flipped": Stage(
+        "mesh_flipped", flip_inside_out,
+        needed = lambda state: state.volume < 0)}
+DEFAULT_STAGES = ("degenerate_faces", "quads_to_tris", "unified_normals", "mesh_flipped")
+
+def repair_pipeline(names = None):
+    """Pipeline of the named stages, in the given order; all default stages if no names are given."""
+    names = [str(name).strip() for name in names if name] if names else []
+    unknown = [name for name in names if name not in STAGES]
+    if unknown:
+        raise ValueError("Unknown repair stages: {}".format(", ".join(unknown)))
+    return RepairPipeline([STAGES[name] for name in names or DEFAULT_STAGES])
@@ -0,0 +1,245 @@
+"""Conversions between RhinoCommon geometry and the plain arrays used by the engines.
+    Points are (x, y, z) tuples, struts are (start, end) point pairs and voxels are
+    eight corners ordered as Rhino.Geometry.Box.GetCorners(). RhinoHost gives the
+    shared pipeline stages these conversions for Rhino meshes."""
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import Rhino
+from Grasshopper.Kernel import GH_Convert
+from latticetools import repair as mesh_repair
+from latticetools.cache import stable_hash
+from latticetools.mapping import hexahedron_corners
+from latticetools.primitive import PreparedPrimitive, prepare
+
+def point_tuple(point):
+    return (point.X, point.Y, point.Z)
+
+def bounds_tuple(bounding_box):
+    return (point_tuple(bounding_box.Min), point_tuple(bounding_box.Max))
+
+def curve_struts(curve):
+    success, polyline = curve.TryGetPolyline()
+    if success:
+        return [(point_tuple(polyline[i]), point_tuple(polyline[i + 1])) for i in range(polyline.Count - 1)]
+    if curve.IsLinear():
+        return [(point_tuple(curve.PointAtStart), point_tuple(curve.PointAtEnd))]
+    raise ValueError("Only linear and polyline curves can be converted to struts")
+
+def curves_to_struts(curves):
+    struts = []
+    for curve in curves:
+        struts.extend(curve_struts(curve))
+    return struts
+
+def struts_to_curves(struts):
+    Point3d = Rhino.Geometry.Point3d
+    LineCurve = Rhino.Geometry.LineCurve
+    return [LineCurve(Point3d(*start), Point3d(*end)) for start, end in struts]
+
+def voxel_corners(voxel):
+    """Eight corners of a box, or of a hexahedral brep, extrusion or quad mesh, which need not be a box."""
+    if isinstance(voxel, (Rhino.Geometry.Box, Rhino.Geometry.BoundingBox)):
+        return [point_tuple(corner) for corner in voxel.GetCorners()]
+    if isinstance(voxel, Rhino.Geometry.Extrusion):
+        voxel = voxel.ToBrep()
+    if isinstance(voxel, Rhino.Geometry.Brep):
+        points = [point_tuple(vertex.Location) for vertex in voxel.Vertices]
+        edges = [(edge.StartVertex.VertexIndex, edge.EndVertex.VertexIndex) for edge in voxel.Edges]
+    elif isinstance(voxel, Rhino.Geometry.Mesh):
+        topology = voxel.TopologyVertices
+        points = [point_tuple(topology[i]) for i in range(topology.Count)]
+        edges = []
+        for i in range(voxel.TopologyEdges.Count):
+            pair = voxel.TopologyEdges.GetTopologyVertices(i)
+            edges.append((pair.I, pair.J))
+    else:
+        raise ValueError("Voxels must be boxes, breps, extrusions or meshes, not {}".format(type(voxel).__name__))
+    return hexahedron_corners(points, edges)
+
+def voxels_to_corners(voxels):
+    return [voxel_corners(voxel) for voxel in voxels]
+
+def mesh_arrays(mesh):
+    vertices = [point_tuple(vertex) for vertex in mesh.Vertices.ToPoint3dArray()]
+    faces = []
+    for face in mesh.Faces:
+        if face.IsQuad:
+            faces.append((face.A, face.B, face.C, face.D))
+        else:
+            faces.append((face.A, face.B, face.C))
+    return vertices, faces
+
+def mesh_with_vertices(mesh, vertices):
+    mapped = mesh.DuplicateMesh()
+    for i, (x, y, z) in enumerate(vertices):
+        mapped.Vertices.SetVertex(i, x, y, z)
+    mapped.Normals.ComputeNormals()
+    return mapped
+
+def arrays_to_mesh(vertices, faces):
+    mesh = Rhino.Geometry.Mesh()
+    for x, y, z in vertices:
+        mesh.Vertices.Add(x, y, z)
+    for face in faces:
+        if len(face) == 4:
+            mesh.Faces.AddFace(face[0], face[1], face[2], face[3])
+        else:
+            mesh.Faces.AddFace(face[0], face[1], face[2])
+    mesh.Normals.ComputeNormals()
+    return mesh
+
+def document_unit():
+    #   Name of the active document's unit system, e.g. "Millimeters", as export.threemf_unit reads it
+    return str(Rhino.RhinoDoc.ActiveDoc.ModelUnitSystem)
+
+def dendro_volume_settings(settings, default_voxel_size):
+    #   Voxel size, band width in voxels and iso value of a DendroGH settings object
+    voxel_size = getattr(settings, "VoxelSize", None) or default_voxel_size
+    bandwidth = getattr(settings, "Bandwidth", None) or 3
+    iso_value = getattr(settings, "IsoValue", None) or 0.0
+    return float(voxel_size), float(bandwidth), float(iso_value)
+
+def vector_tuple(vector):
+    return (vector.X, vector.Y, vector.Z)
+
+def geometry_plane(geometry):
+    """(origin, normal) of a planar cut or symmetry surface, given as a surface or a mesh."""
+    if isinstance(geometry, Rhino.Geometry.Mesh):
+        geometry.Normals.ComputeNormals()
+        mesh_point = geometry.ClosestMeshPoint(geometry.GetBoundingBox(False).Center, 0.0)
+        return point_tuple(mesh_point.Point), vector_tuple(geometry.NormalAt(mesh_point))
+    if isinstance(geometry, Rhino.Geometry.Brep):
+        geometry = geometry.Faces[0]
+    u = geometry.Domain(0).Mid
+    v = geometry.Domain(1).Mid
+    return point_tuple(geometry.PointAt(u, v)), vector_tuple(geometry.NormalAt(u, v))
+
+def polyline_points(polyline):
+    if isinstance(polyline, Rhino.Geometry.Curve):
+        success, polyline = polyline.TryGetPolyline()
+        if not success:
+            raise ValueError("Curve is not a polyline")
+    return [point_tuple(point) for point in polyline]
+
+def points_to_polyline(points):
+    return Rhino.Geometry.PolylineCurve([Rhino.Geometry.Point3d(*point) for point in points])
+
+def curve_key(curve):
+    """Plain data identifying a curve's geometry, for the result cache."""
+    nurbs = curve.ToNurbsCurve()
+    return (nurbs.Degree, [point_tuple(point.Location) + (point.Weight,) for point in nurbs.Points], list(nurbs.Knots))
+
+def settings_key(settings):
+    """Public number, text and flag properties of a settings object, e.g. DendroGH volume settings."""
+    key = []
+    for name in sorted(dir(settings)):
+        if name.startswith("_"):
+            continue
+        try:
+            value = getattr(settings, name)
+        except Exception:
+            continue
+        if isinstance(value, (bool, int, float, str)):
+            key.append((name, value))
+    return key
+
+def geometry_hash(geometry):
+    """Stable hash of a mesh's arrays or of any other geometry's serialized form."""
+    if isinstance(geometry, Rhino.Geometry.Mesh):
+        return stable_hash(mesh_arrays(geometry))
+    return stable_hash(type(geometry).__name__, bytearray(GH_Convert.CommonObjectToByteArray(geometry)))
+
+def prepared_primitive(primitive):
+    """The prepared primitive of a Primitive component output, given as the artifact or its mesh."""
+    if isinstance(primitive, PreparedPrimitive):
+        return primitive
+    vertices, faces = mesh_arrays(primitive)
+    key = stable_hash((vertices, faces))
+    return prepare(key, lambda: PreparedPrimitive(key, vertices, faces, mesh = primitive))
+
+CURVATURE_SAMPLES = 8
+
+def curve_properties(curve):
+    """Length of a curve and its largest curvature at evenly spaced parameters."""
+    if curve.IsLinear():
+        return curve.GetLength(), 0.0
+    domain = curve.Domain
+    curvature = max(curve.CurvatureAt(domain.ParameterAt(float(i)/CURVATURE_SAMPLES)).Length for i in range(CURVATURE_SAMPLES + 1))
+    return curve.GetLength(), curvature
+
+def segment_curve(curve, segment_length):
+    points = [point_tuple(curve.PointAtStart)]
+    #   DivideByLength returns None when the curve is shorter than the segment length
+    params = curve.DivideByLength(segment_length, False)
+    if params is not None:
+        for t in params:
+            points.append(point_tuple(curve.PointAt(t)))
+    points.append(point_tuple(curve.PointAtEnd))
+    return points
+
+class RhinoHost(object):
+    """Rhino geometry for the shared pipeline stages of populate, sampling and meshing."""
+
+    def voxel_corners(self, voxel):
+        return voxel_corners(voxel)
+
+    def curve_strut(self, curve):
+        """(start, end) of a straight curve, or None for a true curve."""
+        if curve.IsLinear():
+            return (point_tuple(curve.PointAtStart), point_tuple(curve.PointAtEnd))
+        return None
+
+    def curve_properties(self, curve):
+        return curve_properties(curve)
+
+    def segment_curve(self, curve, segment_length):
+        return segment_curve(curve, segment_length)
+
+    def mesh_with_vertices(self, mesh, vertices):
+        return mesh_with_vertices(mesh, vertices)
+
+    def skin(self, connect, primitive):
+        import ghpythonlib.components as ghcomp
+        # curves = Rhino.Geometry.Intersect.Intersection.MeshMeshAccurate(connect, primitive,  Rhino.RhinoMath.SqrtEpsilon*10)
+        return ghcomp.MeshXMesh(primitive, connect)
+
+    def polyline_points(self, polyline):
+        return polyline_points(polyline)
+
+    def points_to_polyline(self, points):
+        return points_to_polyline(points)
+
+    def mesh_arrays(self, mesh):
+        return mesh_arrays(mesh)
+
+    def arrays_to_mesh(self, vertices, faces):
+        return arrays_to_mesh(vertices, faces)
+
+    def memory_estimate_mb(self, mesh):
+        return mesh.MemoryEstimate()*1e-6
+
+    def cut_plane(self, geometry):
+        return geometry_plane(geometry)
+
+    def remove_zero_area_faces(self, mesh):
+        #   The ref count of faces fixed rather than removed comes back alongside the removed count
+        removed, fixed = mesh.Faces.RemoveZeroAreaFaces(0)
+        return removed + fixed, mesh
+
+    def convert_quads(self, mesh):
+        #   ConvertQuadsToTriangles succeeds on a mesh without quads too, so count them first
+        quads = mesh.Faces.QuadCount
+        if not mesh.Faces.ConvertQuadsToTriangles():
+            return mesh_repair.FAILED, mesh
+        return quads, mesh
+
+    def unify_normals(self, mesh):
+        #   UnifyNormals returns the number of faces reversed, or -1 on failure
+        unified = mesh.UnifyNormals()
+        return mesh_repair.FAILED if unified < 0 else unified, mesh
+
+    def flip(self, mesh):
+        mesh.Flip(True, True, True)
+        return mesh.Faces.Count, mesh
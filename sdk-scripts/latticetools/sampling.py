@@ -0,0 +1,91 @@
+"""Stage of the Segment Lattice component: sample a lattice's struts as points for meshing.
+    sample_lattice spaces samples along every strut of a lattice graph, or
+    along every curve, merges the coincident strut ends and returns the points
+    with each strut's start offset and sample indices, and each point's radius.
+
+    Curves are read through a host: straight curves are sampled analytically as
+    struts, and true curves are measured and divided by
+    rhinogeometry.RhinoHost. For host.LocalHost every curve is a strut.
+
+    pack_samples and unpack_samples turn the outputs into flat arrays for the
+    result cache and back."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+from array import array
+from collections import OrderedDict
+
+from latticetools import scheduler
+from latticetools import segment as lattice_segment
+from latticetools.cache import flat_points, points_from_flat
+
+def segment_curves(host, curves, spacings, chunk_size, workers):
+    #   Straight struts are sampled analytically in one pass, true curves through the host
+    struts = []
+    curved = []
+    for i, curve in enumerate(curves):
+        strut = host.curve_strut(curve)
+        if strut is not None:
+            struts.append((i, strut))
+        else:
+            curved.append((i, curve))
+
+    groups = [None]*len(curves)
+    points, offsets = lattice_segment.segment_struts([strut for i, strut in struts], [spacings[i] for i, strut in struts])
+    for n, (i, strut) in enumerate(struts):
+        groups[i] = lattice_segment.strut_samples(points, offsets, n)
+    curved_points = scheduler.run(lambda item: host.segment_curve(item[1], spacings[item[0]]), curved, chunk_size, workers)
+    for (i, curve), samples in zip(curved, curved_points):
+        groups[i] = samples
+    return lattice_segment.join_samples(groups)
+
+def curve_properties(host, curve):
+    """Length and largest curvature of a curve, straight ones measured as struts."""
+    strut = host.curve_strut(curve)
+    if strut is not None:
+        return lattice_segment.strut_length(*strut), 0.0
+    return host.curve_properties(curve)
+
+def sample_lattice(host, curves, radii, lattice, chunk_size, workers, mode, tolerance, max_points, profiler):
+    """Merged points, offsets, indices, removed count and point radii of the lattice graph's struts, or of the curves without one."""
+    points = []
+    offsets = [0]
+    strut_radii = radii
+    with profiler.stage("segment", struts = len(lattice) if lattice else len(curves)) as stage:
+        if lattice:
+            struts = lattice.strut_points()
+            lengths = [lattice_segment.strut_length(start, end) for start, end in struts]
+            strut_radii = lattice.strut_radii(lattice_segment.broadcast(radii, len(struts)))
+            spacings = lattice_segment.sample_spacings(strut_radii, lengths, None, mode, tolerance, max_points)
+            points, offsets = lattice_segment.segment_struts(struts, spacings)
+        elif curves:
+            properties = scheduler.run(lambda curve: curve_properties(host, curve), curves, chunk_size, workers)
+            lengths = [length for length, curvature in properties]
+            curvatures = [curvature for length, curvature in properties]
+            strut_radii = lattice_segment.broadcast(radii, len(curves))
+            spacings = lattice_segment.sample_spacings(strut_radii, lengths, curvatures, mode, tolerance, max_points)
+            points, offsets = segment_curves(host, curves, spacings, chunk_size, workers)
+        stage.count(points = len(points))
+
+    with profiler.stage("merge", points = len(points)) as stage:
+        points, indices, removed = lattice_segment.merge_strut_ends(points, offsets, lattice_segment.merge_tolerance(min(strut_radii) if strut_radii else 0.0))
+        stage.count(removed = removed)
+    return points, offsets, indices, removed, lattice_segment.point_radii(offsets, indices, strut_radii, len(points))
+
+def pack_samples(points, offsets, indices, removed, radii):
+    """Flat arrays of sample_lattice's outputs, for the result cache."""
+    return OrderedDict([
+        ("points", flat_points(points)),
+        ("offsets", array("i", offsets)),
+        ("indices", array("i", indices)),
+        ("removed", removed),
+        ("radii", array("d", radii))])
+
+def unpack_samples(packed):
+    points = points_from_flat(packed["points"])
+    if len(packed["radii"]) != len(points):
+        raise ValueError("Expected {} point radii, got {}".format(len(points), len(packed["radii"])))
+    return points, list(packed["offsets"]), list(packed["indices"]), packed["removed"], list(packed["radii"])
@@ -0,0 +1,125 @@
+"""Chunked parallel map used by the populate and segment stages.
+    Items are handed to worker threads in chunks rather than one at a time, so
+    scheduling overhead is paid once per chunk. When no chunk size is given, the
+    first few items are run serially to measure the per-item cost and the chunk
+    size is chosen so that each chunk takes roughly TARGET_CHUNK_SECONDS. Results
+    are always returned in input order.
+
+    The workers are threads, BACKEND. They run Python code in parallel under
+    IronPython, which has no global interpreter lock; under CPython they only
+    overlap where the work releases the lock, which threads_parallel reports."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import platform
+import sys
+import threading
+
+try:
+    from Queue import Queue, Empty
+except ImportError:
+    from queue import Queue, Empty
+
+try:
+    from time import perf_counter as clock
+except ImportError:
+    from time import clock
+
+BACKEND = "threads"
+TARGET_CHUNK_SECONDS = 0.01
+PROBE_ITEMS = 8
+CHUNKS_PER_WORKER = 4
+
+def cpu_count():
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        pass
+    try:
+        import System
+        return System.Environment.ProcessorCount
+    except ImportError:
+        return 1
+
+def threads_parallel():
+    """Whether worker threads run Python code in parallel, i.e. without a global interpreter lock."""
+    if platform.python_implementation() != "CPython":
+        return True
+    return not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+def chunked(items, chunk_size):
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+def adaptive_chunk_size(seconds_per_item, item_count, workers, target_seconds = TARGET_CHUNK_SECONDS):
+    """Chunk size taking about target_seconds, while leaving several chunks per worker for balance."""
+    size = int(target_seconds/max(seconds_per_item, 1e-9))
+    balanced = item_count//(workers*CHUNKS_PER_WORKER)
+    return max(1, min(size, max(1, balanced)))
+
+def merge_results(results, flatten):
+    if not flatten:
+        return results
+    merged = []
+    for result in results:
+        if isinstance(result, list):
+            merged.extend(result)
+        else:
+            merged.append(result)
+    return merged
+
+def run(function, items, chunk_size = None, workers = None, flatten = False, serial = False):
+    """Apply function to every item, returning results in input order.
+
+    chunk_size None measures the per-item cost and picks the chunk size, workers None
+    uses one worker per processor and serial runs everything on the calling thread."""
+    items = list(items)
+    if not workers:
+        workers = cpu_count()
+    workers = max(1, int(workers))
+    if serial or workers == 1 or len(items) <= 1:
+        return merge_results([function(item) for item in items], flatten)
+
+    results = []
+    if not chunk_size:
+        probe = items[:PROBE_ITEMS]
+        start = clock()
+        results.extend(function(item) for item in probe)
+        elapsed = clock() - start
+        items = items[len(probe):]
+        chunk_size = adaptive_chunk_size(elapsed/len(probe), len(items), workers)
+    chunk_size = max(1, int(chunk_size))
+
+    chunks = chunked(items, chunk_size)
+    chunk_results = [None]*len(chunks)
+    errors = []
+    queue = Queue()
+    for index in range(len(chunks)):
+        queue.put(index)
+
+    def worker():
+        while not errors:
+            try:
+                index = queue.get_nowait()
+            except Empty:
+                return
+            try:
+                chunk_results[index] = [function(item) for item in chunks[index]]
+            except Exception as error:
+                errors.append(error)
+
+    threads = [threading.Thread(target = worker) for _ in range(min(workers, len(chunks)))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+    for chunk_result in chunk_results:
+        results.extend(chunk_result)
+    return merge_results(results, flatten)
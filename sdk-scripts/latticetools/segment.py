@@ -0,0 +1,191 @@
+"""Segmentation of lattice struts into sample points for point-based meshing.
+    Straight struts are sampled in closed form: the start point, points every
+    segment_length along the strut and the end point, matching
+    Curve.DivideByLength followed by the curve ends. Samples for a whole lattice
+    are returned as one flat list of points plus per-strut offsets, so that the
+    samples of strut i are points[offsets[i]:offsets[i + 1]].
+
+    Struts meeting at a node all start or end on it, so their end samples are
+    merged on a grid hash before meshing. Interior samples are never shared and
+    are passed through without hashing. A merged point takes the largest radius
+    of the struts meeting at it.
+
+    Sample spacing is either a fixed fraction of the strut radius or adaptive:
+    the largest spacing for which the union of spheres around the samples stays
+    within a tolerance of the swept-sphere envelope of the strut, accounting for
+    the scallops between spheres and the chord error on curved struts. Both modes
+    can be capped by a point budget, which scales all spacings up together."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import math
+
+from latticetools import graph as lattice_graph
+from latticetools.graph import PointHash
+
+LENGTH_TOLERANCE = 1e-9
+MERGE_FRACTION = 0.01
+
+FIXED = "fixed"
+ADAPTIVE = "adaptive"
+FIXED_FRACTION = 0.2
+DEFAULT_TOLERANCE = 0.05
+BISECTION_STEPS = 50
+BUDGET_STEP = 1.05
+
+def interior_count(length, segment_length):
+    """Number of division points strictly inside a strut of the given length."""
+    if segment_length <= 0:
+        raise ValueError("Segment length must be positive")
+    return max(0, int(math.ceil(length/segment_length - LENGTH_TOLERANCE)) - 1)
+
+def sample_count(length, segment_length):
+    if length <= 0:
+        return 2
+    return 2 + interior_count(length, segment_length)
+
+def envelope_spacing(radius, error, curvature = 0.0):
+    """Largest sample spacing keeping spheres of the given radius within error of the swept envelope."""
+    error = min(error, radius)
+    if curvature <= 0:
+        return 2.0*math.sqrt(2.0*radius*error - error*error)
+    low = 0.0
+    high = 2.0*radius
+    for _ in range(BISECTION_STEPS):
+        spacing = 0.5*(low + high)
+        scallop = radius - math.sqrt(max(0.0, radius*radius - 0.25*spacing*spacing))
+        sagitta = 0.125*curvature*spacing*spacing
+        if scallop + sagitta > error:
+            high = spacing
+        else:
+            low = spacing
+    return low
+
+def radius_values(radius):
+    """Radii given as one value, a list or nothing, as a list of floats without empty items."""
+    if radius is None:
+        return []
+    try:
+        values = list(radius)
+    except TypeError:
+        values = [radius]
+    return [float(value) for value in values if value is not None]
+
+def broadcast(values, count):
+    if len(values) == 1:
+        return list(values)*count
+    if len(values) != count:
+        raise ValueError("Expected 1 or {} values, got {}".format(count, len(values)))
+    return list(values)
+
+def fit_budget(lengths, spacings, max_points):
+    """Scale all spacings up by a common factor until the sample count fits max_points."""
+    def total(scale):
+        return sum(sample_count(length, spacing*scale) for length, spacing in zip(lengths, spacings))
+
+    if total(1.0) <= max_points:
+        return spacings
+    ends = 2*len(lengths)
+    if ends >= max_points:
+        #   Only the strut ends fit, so no strut gets interior samples
+        scale = max([length/spacing for length, spacing in zip(lengths, spacings)] + [1.0])
+    else:
+        scale = max(1.0, sum(length/spacing for length, spacing in zip(lengths, spacings))/(max_points - ends))
+        while total(scale) > max_points:
+            scale *= BUDGET_STEP
+    return [spacing*scale for spacing in spacings]
+
+def sample_spacings(radii, lengths, curvatures = None, mode = FIXED, tolerance = DEFAULT_TOLERANCE, max_points = None):
+    """Per-strut sample spacing for the given mode; tolerance is a fraction of each strut's radius."""
+    if curvatures is None:
+        curvatures = [0.0]*len(lengths)
+    if mode == FIXED:
+        spacings = [radius*FIXED_FRACTION for radius in radii]
+    elif mode == ADAPTIVE:
+        spacings = [envelope_spacing(radius, radius*tolerance, curvature) for radius, curvature in zip(radii, curvatures)]
+    else:
+        raise ValueError("Unknown sampling mode: {}".format(mode))
+    if max_points:
+        spacings = fit_budget(lengths, spacings, int(max_points))
+    return spacings
+
+def strut_length(start, end):
+    return math.sqrt((end[0] - start[0])**2 + (end[1] - start[1])**2 + (end[2] - start[2])**2)
+
+def sample_strut(start, end, segment_length, points):
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
+    dz = end[2] - start[2]
+    length = math.sqrt(dx*dx + dy*dy + dz*dz)
+    points.append(start)
+    count = interior_count(length, segment_length) if length > 0 else 0
+    if count:
+        step = segment_length/length
+        for k in range(1, count + 1):
+            t = k*step
+            points.append((start[0] + dx*t, start[1] + dy*t, start[2] + dz*t))
+    points.append(end)
+
+def segment_struts(struts, segment_length):
+    """Sample (N, 2, 3) struts, returning (K, 3) points and N + 1 offsets.
+
+    segment_length is a single spacing or one spacing per strut."""
+    if not isinstance(segment_length, (list, tuple)):
+        segment_length = [segment_length]*len(struts)
+    points = []
+    offsets = [0]
+    for (start, end), spacing in zip(struts, segment_length):
+        sample_strut(start, end, spacing, points)
+        offsets.append(len(points))
+    return points, offsets
+
+def join_samples(groups):
+    """Flatten per-strut point lists into points and offsets."""
+    points = []
+    offsets = [0]
+    for group in groups:
+        points.extend(group)
+        offsets.append(len(points))
+    return points, offsets
+
+def strut_samples(points, offsets, index):
+    return points[offsets[index]:offsets[index + 1]]
+
+def merge_tolerance(radius):
+    """Distance within which strut ends merge, never below the lattice graph's tolerance so empty or zero radii still merge."""
+    return max(float(radius or 0.0)*MERGE_FRACTION, lattice_graph.DEFAULT_TOLERANCE)
+
+def merge_strut_ends(points, offsets, tolerance):
+    """Merge coincident strut end samples.
+
+    Returns the unique points, the index into them of every input sample and the
+    number of samples removed."""
+    point_hash = PointHash(tolerance)
+    node_indices = []
+    unique = []
+    indices = []
+    for i in range(len(offsets) - 1):
+        first = offsets[i]
+        last = offsets[i + 1] - 1
+        for k in range(first, last + 1):
+            if k == first or k == last:
+                node = point_hash.add(points[k])
+                if node == len(node_indices):
+                    node_indices.append(len(unique))
+                    unique.append(points[k])
+                indices.append(node_indices[node])
+            else:
+                indices.append(len(unique))
+                unique.append(points[k])
+    return unique, indices, len(points) - len(unique)
+
+def point_radii(offsets, indices, strut_radii, count):
+    """Radius of each of count merged points: the largest radius of the struts sampled at it."""
+    radii = [0.0]*count
+    for i in range(len(offsets) - 1):
+        for k in range(offsets[i], offsets[i + 1]):
+            radii[indices[k]] = max(radii[indices[k]], strut_radii[i])
+    return radii
@@ -0,0 +1,277 @@
+"""Bounding volume hierarchy over the triangles of a mesh.
+    The index is built once from plain vertex and face lists and answers segment
+    intersection, box overlap and inside/outside queries in logarithmic time in the
+    number of faces. Inside/outside tests use ray parity, voted over three rays so
+    that a ray grazing an edge or vertex does not flip the result.
+
+    segments_hits and inside_points answer a batch of segments or points in one
+    traversal: each node tests the rays that reached it and hands the ones
+    overlapping its box to its children, so the hierarchy is walked once per
+    batch instead of once per query. Batches of nearby queries, e.g. the struts
+    of one voxel, share most of their path down the tree."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+LEAF_SIZE = 8
+EPSILON = 1e-12
+RAY_DIRECTIONS = (
+    (0.5773502691896258, 0.5773502691896257, 0.5773502691896259),
+    (-0.8017837257372732, 0.2672612419124244, 0.5345224838248488),
+    (0.1078327732173102, -0.9704949589557921, 0.2156655464346204))
+
+def triangulate_faces(faces):
+    triangles = []
+    for face in faces:
+        triangles.append((face[0], face[1], face[2]))
+        if len(face) == 4 and face[3] != face[2]:
+            triangles.append((face[0], face[2], face[3]))
+    return triangles
+
+def segment_box_overlap(start, inverse, lower, upper, t_min = 0.0, t_max = 1.0):
+    #   Slab test for the segment start + t*direction, t in [t_min, t_max]
+    for i in range(3):
+        if inverse[i] is None:
+            if start[i] < lower[i] or start[i] > upper[i]:
+                return False
+            continue
+        t0 = (lower[i] - start[i])*inverse[i]
+        t1 = (upper[i] - start[i])*inverse[i]
+        if t0 > t1:
+            t0, t1 = t1, t0
+        if t0 > t_min:
+            t_min = t0
+        if t1 < t_max:
+            t_max = t1
+        if t_min > t_max:
+            return False
+    return True
+
+def unique_params(hits):
+    """Sorted hit parameters without repeats closer than 1e-9, e.g. a segment through a shared edge."""
+    params = []
+    for t in sorted(hits):
+        if not params or t - params[-1] > 1e-9:
+            params.append(t)
+    return params
+
+def crossing_count(hits):
+    """Number of distinct crossings in front of a ray's origin."""
+    count = 0
+    previous = None
+    for t in sorted(hits):
+        if t > EPSILON and (previous is None or t - previous > 1e-9):
+            count += 1
+            previous = t
+    return count
+
+def box_overlap(lower_a, upper_a, lower_b, upper_b):
+    return (lower_a[0] <= upper_b[0] and upper_a[0] >= lower_b[0] and
+            lower_a[1] <= upper_b[1] and upper_a[1] >= lower_b[1] and
+            lower_a[2] <= upper_b[2] and upper_a[2] >= lower_b[2])
+
+class MeshIndex(object):
+    """Persistent BVH over mesh triangles."""
+
+    def __init__(self, vertices, faces, leaf_size = LEAF_SIZE):
+        self.vertices = [(float(v[0]), float(v[1]), float(v[2])) for v in vertices]
+        self.triangles = triangulate_faces(faces)
+        self.leaf_size = leaf_size
+        self._prepare_triangles()
+        self._build()
+
+    def __len__(self):
+        return len(self.triangles)
+
+    def _prepare_triangles(self):
+        self.origins = []
+        self.edges = []
+        self.lowers = []
+        self.uppers = []
+        for a, b, c in self.triangles:
+            p0 = self.vertices[a]
+            p1 = self.vertices[b]
+            p2 = self.vertices[c]
+            self.origins.append(p0)
+            self.edges.append(((p1[0] - p0[0], p1[1] - p0[1], p1[2] - p0[2]), (p2[0] - p0[0], p2[1] - p0[1], p2[2] - p0[2])))
+            self.lowers.append((min(p0[0], p1[0], p2[0]), min(p0[1], p1[1], p2[1]), min(p0[2], p1[2], p2[2])))
+            self.uppers.append((max(p0[0], p1[0], p2[0]), max(p0[1], p1[1], p2[1]), max(p0[2], p1[2], p2[2])))
+
+    def _bounds(self, items):
+        lowers = self.lowers
+        uppers = self.uppers
+        lower = [min(lowers[i][axis] for i in items) for axis in range(3)]
+        upper = [max(uppers[i][axis] for i in items) for axis in range(3)]
+        return tuple(lower), tuple(upper)
+
+    def _build(self):
+        #   Nodes are stored in flat lists: bounds, then either two children
+        #   (leaf_items is None) or the triangle ids of a leaf
+        self.node_lower = []
+        self.node_upper = []
+        self.node_children = []
+        self.node_items = []
+        if not self.triangles:
+            return
+
+        centroids = [((lo[0] + up[0])*0.5, (lo[1] + up[1])*0.5, (lo[2] + up[2])*0.5) for lo, up in zip(self.lowers, self.uppers)]
+        stack = [(list(range(len(self.triangles))), None, 0)]
+        while stack:
+            items, parent, side = stack.pop()
+            node = len(self.node_lower)
+            lower, upper = self._bounds(items)
+            self.node_lower.append(lower)
+            self.node_upper.append(upper)
+            self.node_children.append(None)
+            self.node_items.append(None)
+            if parent is not None:
+                children = self.node_children[parent]
+                self.node_children[parent] = (node, children[1]) if side == 0 else (children[0], node)
+
+            if len(items) <= self.leaf_size:
+                self.node_items[node] = items
+                continue
+
+            extents = [upper[axis] - lower[axis] for axis in range(3)]
+            axis = extents.index(max(extents))
+            items.sort(key = lambda i: centroids[i][axis])
+            middle = len(items)//2
+            self.node_children[node] = (None, None)
+            stack.append((items[middle:], node, 1))
+            stack.append((items[:middle], node, 0))
+
+    def _intersect(self, triangle, start, direction):
+        #   Moller-Trumbore, returning the ray parameter or None
+        (e1x, e1y, e1z), (e2x, e2y, e2z) = self.edges[triangle]
+        dx, dy, dz = direction
+        px = dy*e2z - dz*e2y
+        py = dz*e2x - dx*e2z
+        pz = dx*e2y - dy*e2x
+        determinant = e1x*px + e1y*py + e1z*pz
+        if -EPSILON < determinant < EPSILON:
+            return None
+        inverse = 1.0/determinant
+        origin = self.origins[triangle]
+        tx = start[0] - origin[0]
+        ty = start[1] - origin[1]
+        tz = start[2] - origin[2]
+        u = (tx*px + ty*py + tz*pz)*inverse
+        if u < 0.0 or u > 1.0:
+            return None
+        qx = ty*e1z - tz*e1y
+        qy = tz*e1x - tx*e1z
+        qz = tx*e1y - ty*e1x
+        v = (dx*qx + dy*qy + dz*qz)*inverse
+        if v < 0.0 or u + v > 1.0:
+            return None
+        return (e2x*qx + e2y*qy + e2z*qz)*inverse
+
+    def _traverse(self, start, direction, t_max):
+        inverse = tuple(1.0/d if d != 0 else None for d in direction)
+        hits = []
+        if not self.node_lower:
+            return hits
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if not segment_box_overlap(start, inverse, self.node_lower[node], self.node_upper[node], 0.0, t_max):
+                continue
+            items = self.node_items[node]
+            if items is None:
+                stack.extend(self.node_children[node])
+                continue
+            for triangle in items:
+                t = self._intersect(triangle, start, direction)
+                if t is not None and 0.0 <= t <= t_max:
+                    hits.append(t)
+        return hits
+
+    def segment_hits(self, start, end):
+        """Sorted, de-duplicated parameters in [0, 1] where the segment crosses the mesh."""
+        direction = (end[0] - start[0], end[1] - start[1], end[2] - start[2])
+        return unique_params(self._traverse(start, direction, 1.0))
+
+    def segments_hits(self, segments):
+        """segment_hits of every (start, end) segment, traversing the hierarchy once for the batch."""
+        starts = [start for start, end in segments]
+        directions = [(end[0] - start[0], end[1] - start[1], end[2] - start[2]) for start, end in segments]
+        return [unique_params(hits) for hits in self._traverse_batch(starts, directions, 1.0)]
+
+    def _traverse_batch(self, starts, directions, t_max):
+        inverses = [tuple(1.0/d if d != 0 else None for d in direction) for direction in directions]
+        hits = [[] for _ in starts]
+        if not self.node_lower or not starts:
+            return hits
+        #   Each stack entry is a node and the rays that overlap its parent's box
+        stack = [(0, list(range(len(starts))))]
+        while stack:
+            node, active = stack.pop()
+            lower = self.node_lower[node]
+            upper = self.node_upper[node]
+            active = [n for n in active if segment_box_overlap(starts[n], inverses[n], lower, upper, 0.0, t_max)]
+            if not active:
+                continue
+            items = self.node_items[node]
+            if items is None:
+                for child in self.node_children[node]:
+                    stack.append((child, active))
+                continue
+            for triangle in items:
+                for n in active:
+                    t = self._intersect(triangle, starts[n], directions[n])
+                    if t is not None and 0.0 <= t <= t_max:
+                        hits[n].append(t)
+        return hits
+
+    def ray_crossings(self, origin, direction):
+        return crossing_count(self._traverse(origin, direction, float("inf")))
+
+    def is_inside(self, point):
+        if not self.node_lower:
+            return False
+        lower = self.node_lower[0]
+        upper = self.node_upper[0]
+        for i in range(3):
+            if point[i] < lower[i] or point[i] > upper[i]:
+                return False
+        votes = 0
+        for direction in RAY_DIRECTIONS:
+            if self.ray_crossings(point, direction) % 2 == 1:
+                votes += 1
+        return votes >= 2
+
+    def inside_points(self, points):
+        """is_inside of every point, tracing each voting direction for the whole batch in one traversal."""
+        if not self.node_lower:
+            return [False]*len(points)
+        lower = self.node_lower[0]
+        upper = self.node_upper[0]
+        candidates = [n for n, point in enumerate(points) if all(lower[i] <= point[i] <= upper[i] for i in range(3))]
+        origins = [points[n] for n in candidates]
+        votes = [0]*len(points)
+        for direction in RAY_DIRECTIONS:
+            for n, hits in zip(candidates, self._traverse_batch(origins, [direction]*len(origins), float("inf"))):
+                if crossing_count(hits) % 2 == 1:
+                    votes[n] += 1
+        return [vote >= 2 for vote in votes]
+
+    def box_triangles(self, lower, upper):
+        """Triangles whose bounding boxes overlap the given box."""
+        found = []
+        if not self.node_lower:
+            return found
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if not box_overlap(lower, upper, self.node_lower[node], self.node_upper[node]):
+                continue
+            items = self.node_items[node]
+            if items is None:
+                stack.extend(self.node_children[node])
+                continue
+            for triangle in items:
+                if box_overlap(lower, upper, self.lowers[triangle], self.uppers[triangle]):
+                    found.append(triangle)
+        return found
@@ -0,0 +1,114 @@
+"""Symmetry domains for generating a part from one octant or quarter.
+    A SymmetryDomain is the intersection of the half-spaces on the side each
+    symmetry plane faces, e.g. the (-1, -1, -1) octant of the Primitive
+    component's symmetry surfaces, or the (-1, -1) quarter of the last two.
+    Populate keeps only the voxels of the domain plus one layer beyond each
+    plane, so the struts whose envelopes reach across the planes are still
+    meshed. The mesh of that region is clipped at the planes without caps,
+    mirrored across every combination of planes and welded along the seams."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+from latticetools import clip as mesh_clip
+from latticetools.graph import PointHash
+
+DEFAULT_TOLERANCE = 1e-6
+
+class SymmetryDomain(object):
+    """Intersection of the half-spaces in front of (origin, normal) symmetry planes."""
+
+    def __init__(self, planes, tolerance = DEFAULT_TOLERANCE):
+        if not planes:
+            raise ValueError("A symmetry domain needs at least one plane")
+        self.planes = [(tuple(origin), mesh_clip.unit_vector(normal)) for origin, normal in planes]
+        self.tolerance = tolerance
+
+    def __len__(self):
+        return len(self.planes)
+
+    @property
+    def copies(self):
+        return 2**len(self.planes)
+
+    def cache_key(self):
+        return self.planes
+
+    def distances(self, point):
+        return [
+            (point[0] - origin[0])*normal[0] + (point[1] - origin[1])*normal[1] + (point[2] - origin[2])*normal[2]
+            for origin, normal in self.planes]
+
+    def contains(self, point):
+        return min(self.distances(point)) >= -self.tolerance
+
+    def keeps_voxel(self, corners, margin = None):
+        """Whether a voxel reaches closer than margin to the domain; by default margin is its own depth across each plane."""
+        distances = [self.distances(corner) for corner in corners]
+        for n in range(len(self.planes)):
+            plane_distances = [distance[n] for distance in distances]
+            reach = max(plane_distances) - min(plane_distances) if margin is None else margin
+            if max(plane_distances) <= self.tolerance - reach:
+                return False
+        return True
+
+    def reflect(self, point, mask):
+        x, y, z = point
+        for n, (origin, normal) in enumerate(self.planes):
+            if mask & (1 << n):
+                distance = 2.0*((x - origin[0])*normal[0] + (y - origin[1])*normal[1] + (z - origin[2])*normal[2])
+                x -= distance*normal[0]
+                y -= distance*normal[1]
+                z -= distance*normal[2]
+        return (x, y, z)
+
+    def clip(self, vertices, faces):
+        """Clip a mesh of the domain region at the symmetry planes, leaving the seams open."""
+        return mesh_clip.clip_mesh(vertices, faces, self.planes, cap = False)
+
+    def mirror(self, vertices, faces):
+        """Mirror a clipped domain mesh into the whole part, welding the vertices on the planes."""
+        #   Seam vertices are projected onto their planes first, so all their images coincide
+        seam = []
+        points = []
+        for point in vertices:
+            on_plane = False
+            for origin, normal in self.planes:
+                distance = (point[0] - origin[0])*normal[0] + (point[1] - origin[1])*normal[1] + (point[2] - origin[2])*normal[2]
+                if abs(distance) <= self.tolerance:
+                    point = (point[0] - distance*normal[0], point[1] - distance*normal[1], point[2] - distance*normal[2])
+                    on_plane = True
+            seam.append(on_plane)
+            points.append(point)
+
+        seam_hash = PointHash(self.tolerance)
+        seam_index = {}
+        out_vertices = []
+        out_faces = []
+        for mask in range(self.copies):
+            flipped = bin(mask).count("1") % 2 == 1
+            remap = []
+            for point, on_plane in zip(points, seam):
+                image = self.reflect(point, mask) if mask else point
+                if on_plane:
+                    node = seam_hash.add(image)
+                    index = seam_index.get(node)
+                    if index is None:
+                        index = len(out_vertices)
+                        seam_index[node] = index
+                        out_vertices.append(image)
+                else:
+                    index = len(out_vertices)
+                    out_vertices.append(image)
+                remap.append(index)
+            for face in faces:
+                mapped = tuple(remap[index] for index in face)
+                out_faces.append(tuple(reversed(mapped)) if flipped else mapped)
+        return out_vertices, out_faces
+
+    def complete(self, vertices, faces):
+        """The whole part from a mesh of the domain region: clip, mirror and weld."""
+        clipped = self.clip(vertices, faces)
+        return self.mirror(clipped.vertices, clipped.faces)
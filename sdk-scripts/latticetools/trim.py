@@ -0,0 +1,82 @@
+"""Trimming of lattice struts against a closed primitive mesh.
+    Each strut is split where it crosses the primitive and the pieces whose
+    midpoints lie inside are kept. All geometric queries go through a
+    spatial.MeshIndex, which is built once per primitive.
+
+    Voxels are classified before trimming so that only struts in voxels
+    straddling the primitive surface need intersection queries. trim_voxel_struts
+    trims the struts of one voxel together, finding their crossings in a single
+    traversal of the index and testing their pieces' midpoints in another,
+    and trim_struts does the same in batches of TRIM_BATCH struts."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+from latticetools.spatial import MeshIndex
+
+MIN_PIECE = 1e-9
+TRIM_BATCH = 64
+
+INSIDE = "inside"
+OUTSIDE = "outside"
+STRADDLING = "straddling"
+
+def lerp(start, end, t):
+    return (start[0] + (end[0] - start[0])*t, start[1] + (end[1] - start[1])*t, start[2] + (end[2] - start[2])*t)
+
+def build_index(vertices, faces):
+    return MeshIndex(vertices, faces)
+
+def trim_strut(index, start, end):
+    """Pieces of the strut from start to end that lie inside the indexed mesh."""
+    pieces = strut_pieces(index.segment_hits(start, end))
+    inside = [index.is_inside(lerp(start, end, 0.5*(t0 + t1))) for t0, t1 in pieces]
+    return inside_pieces(start, end, pieces, inside)
+
+def strut_pieces(hits):
+    #   Parameter intervals between the sorted crossings, skipping slivers
+    params = [0.0] + hits + [1.0]
+    return [(t0, t1) for t0, t1 in zip(params[:-1], params[1:]) if t1 - t0 > MIN_PIECE]
+
+def inside_pieces(start, end, pieces, inside):
+    kept = []
+    for (t0, t1), keep in zip(pieces, inside):
+        if not keep:
+            continue
+        if kept and kept[-1][1] == t0:
+            kept[-1] = (kept[-1][0], t1)
+        else:
+            kept.append((t0, t1))
+    if kept == [(0.0, 1.0)]:
+        return [(start, end)]
+    return [(lerp(start, end, t0), lerp(start, end, t1)) for t0, t1 in kept]
+
+def trim_voxel_struts(index, struts):
+    """Pieces of each strut inside the indexed mesh, one list per strut, with each query made once for the batch."""
+    pieces = [strut_pieces(hits) for hits in index.segments_hits(struts)]
+    midpoints = [lerp(start, end, 0.5*(t0 + t1)) for (start, end), strut in zip(struts, pieces) for t0, t1 in strut]
+    inside = iter(index.inside_points(midpoints))
+    return [inside_pieces(start, end, strut, [next(inside) for _ in strut]) for (start, end), strut in zip(struts, pieces)]
+
+def trim_struts(index, struts):
+    trimmed = []
+    for i in range(0, len(struts), TRIM_BATCH):
+        for pieces in trim_voxel_struts(index, struts[i:i + TRIM_BATCH]):
+            trimmed.extend(pieces)
+    return trimmed
+
+def classify_voxel(index, corners):
+    #   Conservative: any primitive triangle whose bounding box overlaps the
+    #   voxel's bounding box makes the voxel straddling
+    lower = tuple(min(corner[i] for corner in corners) for i in range(3))
+    upper = tuple(max(corner[i] for corner in corners) for i in range(3))
+    if index.box_triangles(lower, upper):
+        return STRADDLING
+    center = tuple(0.5*(lower[i] + upper[i]) for i in range(3))
+    return INSIDE if index.is_inside(center) else OUTSIDE
+
+def classify_voxels(index, voxels):
+    """Classify boundary voxels; core voxels are inside by construction and are never queried."""
+    return [classify_voxel(index, corners) for corners in voxels]
@@ -0,0 +1,78 @@
+"""Standard strut unit cells in the unit cube, for running without a Rhino document.
+    Each cell is a list of (start, end) struts within UNIT_BOUNDS, ready for
+    mapping.StrutMapping. Struts on the faces of the cube are repeated by
+    neighbouring voxels; graph.LatticeGraph merges the duplicates."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import math
+from itertools import permutations, product
+
+UNIT_BOUNDS = ((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+
+CORNERS = [(float(x), float(y), float(z)) for x, y, z in product((0, 1), repeat = 3)]
+CENTER = (0.5, 0.5, 0.5)
+
+def face_centers():
+    centers = []
+    for axis in range(3):
+        for side in (0.0, 1.0):
+            center = [0.5, 0.5, 0.5]
+            center[axis] = side
+            centers.append(tuple(center))
+    return centers
+
+def distance(a, b):
+    return math.sqrt(sum((a[i] - b[i])**2 for i in range(3)))
+
+def edges_of_length(points, length, tolerance = 1e-9):
+    """Struts between every pair of points at the given distance."""
+    return [
+        (points[i], points[j])
+        for i in range(len(points)) for j in range(i + 1, len(points))
+        if abs(distance(points[i], points[j]) - length) <= tolerance]
+
+def cubic():
+    return edges_of_length(CORNERS, 1.0)
+
+def bcc():
+    return [(corner, CENTER) for corner in CORNERS]
+
+def fcc():
+    #   Both diagonals of every face
+    struts = []
+    for center in face_centers():
+        axis = [i for i in range(3) if center[i] != 0.5][0]
+        face = [corner for corner in CORNERS if corner[axis] == center[axis]]
+        struts.extend(edges_of_length(face, math.sqrt(2.0)))
+    return struts
+
+def octet():
+    #   Face diagonals plus the octahedron joining the face centers
+    return fcc() + edges_of_length(face_centers(), math.sqrt(0.5))
+
+def kelvin():
+    #   Truncated octahedron with vertices at the permutations of (0, +-1/4, +-1/2) about the center;
+    #   its square faces lie on the cube faces and its hexagons are shared with the corner cells
+    points = set()
+    for a, b in product((-0.25, 0.25), (-0.5, 0.5)):
+        for x, y, z in permutations((0.0, a, b)):
+            points.add((0.5 + x, 0.5 + y, 0.5 + z))
+    return edges_of_length(sorted(points), math.sqrt(2.0)/4)
+
+UNIT_CELLS = {
+    "cubic": cubic,
+    "bcc": bcc,
+    "fcc": fcc,
+    "octet": octet,
+    "kelvin": kelvin}
+
+def unit_cell(name):
+    """Struts of the named unit cell."""
+    key = str(name).strip().lower()
+    if key not in UNIT_CELLS:
+        raise ValueError("Unknown unit cell: {}; expected one of {}".format(name, ", ".join(sorted(UNIT_CELLS))))
+    return UNIT_CELLS[key]()
@@ -0,0 +1,125 @@
+"""Signed distance volume of a strut lattice on a sparse block grid.
+    The lattice is treated as a union of capsules, one per strut, and its signed
+    distance is sampled at the grid points (i, j, k)*voxel_size. Samples are
+    grouped into cubic blocks of block_size cells, and only blocks within the
+    narrow band of some capsule exist. Each block stores (block_size + 1)**3
+    samples, so neighbouring blocks share their face samples and every cell can
+    be polygonized from a single block. Samples further than the band from the
+    lattice are clamped to the band value.
+
+    Blocks can be sampled on demand with block_values, so a consumer that works
+    block by block never needs the whole volume in memory. build samples and
+    keeps every block instead."""
+
+from __future__ import division
+
+__author__ = "irw"
+__version__ = "20261018"
+
+import math
+
+from latticetools import scheduler
+
+DEFAULT_BLOCK_SIZE = 8
+DEFAULT_BAND_VOXELS = 3
+
+def segment_distance(point, start, direction, length_squared):
+    px = point[0] - start[0]
+    py = point[1] - start[1]
+    pz = point[2] - start[2]
+    if length_squared > 0:
+        t = (px*direction[0] + py*direction[1] + pz*direction[2])/length_squared
+        if t < 0.0:
+            t = 0.0
+        elif t > 1.0:
+            t = 1.0
+        px -= direction[0]*t
+        py -= direction[1]*t
+        pz -= direction[2]*t
+    return math.sqrt(px*px + py*py + pz*pz)
+
+class SparseVolume(object):
+    """Capsule-union signed distance field sampled block by block."""
+
+    def __init__(self, struts, radii, voxel_size, block_size = DEFAULT_BLOCK_SIZE, band = None):
+        if voxel_size <= 0:
+            raise ValueError("Voxel size must be positive")
+        if not isinstance(radii, (list, tuple)):
+            radii = [radii]*len(struts)
+        self.voxel_size = float(voxel_size)
+        self.block_size = int(block_size)
+        self.band = float(band) if band else DEFAULT_BAND_VOXELS*self.voxel_size
+        self.capsules = []
+        for (start, end), radius in zip(struts, radii):
+            direction = (end[0] - start[0], end[1] - start[1], end[2] - start[2])
+            length_squared = direction[0]**2 + direction[1]**2 + direction[2]**2
+            self.capsules.append((start, end, direction, length_squared, float(radius)))
+        self.blocks = {}
+        self._bucket_capsules()
+
+    def _capsule_range(self, capsule):
+        #   Grid index range of the samples within the band of a capsule
+        start, end, direction, length_squared, radius = capsule
+        reach = radius + self.band
+        lower = [int(math.floor((min(start[i], end[i]) - reach)/self.voxel_size)) for i in range(3)]
+        upper = [int(math.ceil((max(start[i], end[i]) + reach)/self.voxel_size)) for i in range(3)]
+        return lower, upper
+
+    def _bucket_capsules(self):
+        size = self.block_size
+        self.block_capsules = {}
+        for index, capsule in enumerate(self.capsules):
+            lower, upper = self._capsule_range(capsule)
+            #   Blocks whose inclusive sample range [b*size, b*size + size] overlaps the capsule range
+            first = [-((size - lower[i])//size) for i in range(3)]
+            last = [upper[i]//size for i in range(3)]
+            for bi in range(first[0], last[0] + 1):
+                for bj in range(first[1], last[1] + 1):
+                    for bk in range(first[2], last[2] + 1):
+                        self.block_capsules.setdefault((bi, bj, bk), []).append(index)
+
+    def block_keys(self):
+        return sorted(self.block_capsules)
+
+    def block_origin(self, key):
+        return tuple(key[i]*self.block_size for i in range(3))
+
+    def sample_block(self, key):
+        """Signed distances of a block's samples, flattened with i varying slowest."""
+        size = self.block_size
+        count = size + 1
+        voxel_size = self.voxel_size
+        band = self.band
+        origin = self.block_origin(key)
+        values = [band]*(count*count*count)
+        for index in self.block_capsules.get(key, ()):
+            capsule = self.capsules[index]
+            start, end, direction, length_squared, radius = capsule
+            lower, upper = self._capsule_range(capsule)
+            ranges = [range(max(lower[i], origin[i]) - origin[i], min(upper[i], origin[i] + size) - origin[i] + 1) for i in range(3)]
+            for i in ranges[0]:
+                x = (origin[0] + i)*voxel_size
+                for j in ranges[1]:
+                    y = (origin[1] + j)*voxel_size
+                    row = (i*count + j)*count
+                    for k in ranges[2]:
+                        distance = segment_distance((x, y, (origin[2] + k)*voxel_size), start, direction, length_squared) - radius
+                        if distance < values[row + k]:
+                            values[row + k] = distance
+        return values
+
+    def block_values(self, key):
+        values = self.blocks.get(key)
+        if values is None:
+            values = self.sample_block(key)
+        return values
+
+    def build(self, chunk_size = None, workers = None):
+        """Sample every block, in parallel, and keep the results."""
+        keys = self.block_keys()
+        samples = scheduler.run(self.sample_block, keys, chunk_size, workers)
+        self.blocks = dict(zip(keys, samples))
+        return self
+
+def lattice_volume(struts, radii, voxel_size, block_size = DEFAULT_BLOCK_SIZE, band = None, chunk_size = None, workers = None):
+    return SparseVolume(struts, radii, voxel_size, block_size, band).build(chunk_size, workers)
@@ -1,30 +1,24 @@
-"""Combines a list of JSON inputs into a single JSON object for output.
+"""Combines a list of log inputs into a single log record for output.
     Inputs:
-        input_json: JSON objects to combine
+        input_json: Log records or JSON objects to combine; their timings objects are merged into one
     Output:
-       combined_json: Combined inputs"""
+       combined_json: Combined inputs, as one log record serialized by the Logger"""
 
 __author__ = "irw"
-__version__ = "20220126"
+__version__ = "20261018"
 
 from ghpythonlib.componentbase import executingcomponent as component
 import Grasshopper, GhPython
 import System
 import Rhino
-import json
-from collections import OrderedDict
+from latticetools import logrecord
 
 def combine_inputs(input_json):
-    m = OrderedDict()
-    for item in input_json:
-        if item:
-            item = str(item).replace("\n", "")
-            m.update(json.loads(item, object_pairs_hook=OrderedDict))
-    return m
+    #   Shallow merge of the native records; JSON text from older components is parsed once here
+    return logrecord.merge(input_json)
 
 class CombineJson(component):
     def RunScript(self, input_json):
-        merged = combine_inputs(input_json)
-        combined_json = json.dumps(merged, sort_keys=False, indent=4, separators=(',', ': '))
+        combined_json = combine_inputs(input_json)
 
-        return combined_json
\ No newline at end of file
+        return combined_json
@@ -1,11 +1,12 @@
 """Writes text input to a file.
     Inputs:
         file_path: Path to the file to write
-        content: Content to write to the file
-        write_file: Write the file?"""
+        content: Content to write to the file; log records are written as JSON
+        write_file: Write the file?
+        json_lines: Append content as one compact JSON record per line, rather than comma-joined text"""
 
 __author__ = "ianrw"
-__version__ = "20220124"
+__version__ = "20261018"
 
 from ghpythonlib.componentbase import executingcomponent as component
 import Grasshopper, GhPython
@@ -14,17 +15,31 @@ import Rhino
 import rhinoscriptsyntax as rs
 import scriptcontext
 import os
+import json
+from collections import OrderedDict
+from latticetools import buildlog
+from latticetools import logrecord
 
 def write_lines(file, content):
     for line in content:
         file.write(line)
     file.close()
 
+def content_records(content):
+    #   Records from CombineJson are serialized here, once; text is a JSON object, or a list of them, split over the input's items
+    if any(isinstance(item, logrecord.LogRecord) for item in content):
+        return [logrecord.merge(content)]
+    data = json.loads("\n".join(str(line) for line in content if line), object_pairs_hook=OrderedDict)
+    return data if isinstance(data, list) else [data]
+
 class Logger(component):
-    def RunScript(self, file_path, content, write_file):
+    def RunScript(self, file_path, content, write_file, json_lines):
         ghdoc = scriptcontext.doc
 
-        if write_file and file_path:
+        if write_file and file_path and json_lines:
+            buildlog.append_records(file_path, content_records(content))
+
+        elif write_file and file_path:
             # working_dir = os.path.dirname(os.path.realpath(ghdoc.Path))
             # file_path = os.path.join(working_dir, file_path)
 
@@ -32,8 +47,8 @@ class Logger(component):
                 file = open(file_path, "a")
                 if (os.stat(file_path).st_size != 0):
                     file.write("," + "\n")           
-                write_lines(file, content)
+                write_lines(file, [str(line) for line in content])
 
             else:
                 file = open(file_path, "w")
-                write_lines(file, content)
\ No newline at end of file
+                write_lines(file, [str(line) for line in content])
\ No newline at end of file
@@ -21,7 +21,7 @@
 
 __author__ = "irw"
 # Includes script components from Giulio Piacentino, source: https://www.grasshopper3d.com/forum/topics/gh-filename-is-python
-__version__ = "20220124"
+__version__ = "20261018"
 
 from ghpythonlib.componentbase import executingcomponent as component
 import Grasshopper, GhPython
@@ -30,20 +30,7 @@ import Rhino
 import rhinoscriptsyntax as rs
 import scriptcontext
 import os
-import hashlib
-from datetime import datetime
-
-def make_id(properties):
-    properties_string = ','.join(map(str, properties))
-    properties_fragment = (hashlib.md5(properties_string.encode("UTF-8")).hexdigest())[:3]
-
-    date_info = datetime.now().strftime("%y%m%d")
-    date_utc = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
-    instance_fragment = (hashlib.sha256(date_utc.encode("UTF-8")).hexdigest())[:2]
-
-    unique_id = '-'.join([date_info, properties_fragment, instance_fragment])
-    
-    return unique_id, date_utc
+from latticetools.buildlog import make_id
 
 def get_libraries(self):
     core_libraries = {}
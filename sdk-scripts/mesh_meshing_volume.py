@@ -4,21 +4,24 @@
         dendroVolume: The volume for meshing
         radius: Radius of the lattice curves
         dendroSettings: Settings provided by the Dendro component
-        cut_surfaces: Cutting meshes for trimming the lattice
+        cut_surfaces: Planar surfaces or meshes trimming the lattice; the side each faces is kept. A prepared primitive gives its top and bottom planes
         bake: Bake the part into Rhino?
         save: Save the part?
-        file_name: Where to save the part
+        file_name: Where to save the part, as .stl or .3mf; a 3MF model takes the document units
         delete: Delete the part after saving?
+        symmetry: Symmetry domain from the populate component; the mesh of its region is mirrored into the whole part
+        repair_stages: Repair stages to run, in order; defaults to degenerate_faces, quads_to_tris, unified_normals, mesh_flipped
     Output:
         out_mesh: Dendro-generated mesh of lattice
         original_report: Mesh report for original lattice
         mod_report: Mesh report for modified lattice, with minimal alterations
         cut_report: Mesh report for trimmed lattice
         volume: Volume of the final lattice in document units
-        area: Surface area of the final lattice in document units"""
+        area: Surface area of the final lattice in document units
+        timings: Time, memory and item counts of each stage as a log record"""
 
 __author__ = "irw"
-__version__ = "20220323"
+__version__ = "20261018"
 
 from ghpythonlib.componentbase import executingcomponent as component
 import Grasshopper, GhPython
@@ -26,123 +29,43 @@ import System
 import Rhino
 import rhinoscriptsyntax as rs
 import ghpythonlib.components as ghcomp
+from latticetools import export as mesh_export
+from latticetools import meshing
+from latticetools import rhinogeometry
+from latticetools.profiling import Profiler
 
 out_mesh = None
 
-def to_json(key, value):
-    return '"{}" : "{}"'.format(key, value)
-
-def to_json_value_object_pair(key, value):
-    return '"{}" : {{{}}}'.format(key, value)
-
-def get_mesh_report(report_instance, additional_params = None):
-    naked_count = 0
-    naked_edges = out_mesh.GetNakedEdges()
-    if naked_edges is not None:
-        naked_count = len(naked_edges)
-        
-    properties = []
-    report = to_json("report_version", report_instance)
-    valid = to_json("valid_mesh", out_mesh.IsValid)
-    naked = to_json("naked_edges", naked_count)
-    closed = to_json("closed_mesh", out_mesh.IsClosed)
-    manifold = to_json("manifold_mesh", out_mesh.IsManifold(True))
-    disjoint = to_json("disjoint_count", out_mesh.DisjointMeshCount)
-    vertices = to_json("vertex_count", out_mesh.Vertices.Count)
-    memory = to_json("memory_estimate_mb", out_mesh.MemoryEstimate()*1e-6)
-    log = to_json("log_invalid", out_mesh.IsValidWithLog()[1])
-    
-    properties.extend([report, valid, naked, closed, manifold, disjoint, vertices, memory, log])
-    if additional_params:
-        properties.extend(additional_params)
-
-    properties_json = '{{{}}}'.format(to_json_value_object_pair(report_instance, ','.join(properties)))
-
-    return properties_json
-
-def get_cut_planes(surfaces, translation_factor = 0):
-        planes = set()
-        for surface in surfaces:
-            print(type(surface))
-            reference_point = surface.GetBoundingBox(False).Center
-            normal_vector = surface.NormalAt(surface.ClosestMeshPoint(reference_point, 0.0))
-            surface.Translate(translation_factor*normal_vector)
-            planes.add(surface)
-                    
-        return planes
-
 class MeshLattice(component):
-    def RunScript(self, run, dendroVolume, radius, dendroSettings, cut_surfaces, bake, save, file_name, delete):
+    def RunScript(self, run, dendroVolume, radius, dendroSettings, cut_surfaces, bake, save, file_name, delete, symmetry, repair_stages):
         global out_mesh
+        host = rhinogeometry.RhinoHost()
+        profiler = Profiler("mesh_lattice_volume")
         original_report = None
         cut_report = None
         volume = None
         area = None
         
         if run:
-            #   Generate lattice volume and mesh
-            out_mesh = ghcomp.DendroGH.VolumetoMesh(volume = dendroVolume, volume_settings = dendroSettings)
+            #   Generate lattice mesh
+            with profiler.stage("mesh") as stage:
+                out_mesh = ghcomp.DendroGH.VolumetoMesh(volume = dendroVolume, volume_settings = dendroSettings)
+                stage.count(faces = out_mesh.Faces.Count)
+            state, (original_report, mod_report, cut_report) = meshing.finish_mesh(host, out_mesh, cut_surfaces, symmetry, repair_stages, profiler)
+            out_mesh = state.mesh
 
-            original_bounds = out_mesh.GetBoundingBox(True)
-            original_report = get_mesh_report(report_instance = "original_report")
-
-            #   Make checks and first repairs
-            degenerate_faces = to_json("degenerate_faces", out_mesh.Faces.RemoveZeroAreaFaces(0))
-            quads_to_tris = to_json("quads_to_tris", out_mesh.Faces.ConvertQuadsToTriangles())
-            out_mesh.UnifyNormals()
-            mesh_flipped = False
-            if(out_mesh.Volume() < 0):
-                out_mesh.Flip(True, True, True)
-                mesh_flipped = True
-            mesh_flipped = to_json("mesh_flipped", mesh_flipped)
-            mod_report = get_mesh_report(report_instance = "modified_report", additional_params=[degenerate_faces, quads_to_tris, mesh_flipped])
-
-            #    Split mesh
-            if cut_surfaces:
-                revised_cut = False
-                planes = get_cut_planes(cut_surfaces)
-                cut_mesh = Rhino.Geometry.Mesh.CreateBooleanDifference({out_mesh}, planes)[0]
-                cut_bounds = cut_mesh.GetBoundingBox(True)
-
-                if (cut_bounds.Volume/original_bounds.Volume < 0.01):
-                    revised_cut = True
-                    planes = get_cut_planes(cut_surfaces, translation_factor = 0.01)
-                    out_mesh = Rhino.Geometry.Mesh.CreateBooleanDifference({out_mesh}, planes)[0]
-                else:
-                    out_mesh = cut_mesh
-
-                # out_mesh.Weld(3.1415)
-                revised_cut = to_json("revised_cut", revised_cut)
-                face_count_cut = to_json("face_count_cut", out_mesh.Faces.Count)
-                fill_success = to_json("fill_success", out_mesh.FillHoles())
-                face_count_filled = to_json("face_count_filled", out_mesh.Faces.Count)
-                cut_report = get_mesh_report(report_instance = "cut_report", additional_params=[revised_cut, face_count_cut, fill_success, face_count_filled])
-
-            #   Keep until main script is validated
-            #    if (a.GetNakedEdges()):
-            #        print a.GetNakedEdges()
-            #        print a.Vertices.Align(distance = 1e-1, whichVertices = a.GetNakedEdgePointStatus())
-            #        a.ExtractNonManifoldEdges(False)
-            #        a.Faces.ExtractDuplicateFaces()
-            #        print a.Vertices.Align(distance = 1e-1, whichVertices = a.GetNakedEdgePointStatus()) 
-
-            #   Calculate mesh properties
-            volume = out_mesh.Volume()
-            areaMassProperties = Rhino.Geometry.AreaMassProperties.Compute(out_mesh)
-            area = areaMassProperties.Area
+            #   Mesh properties, reused from the last report unless the mesh changed since
+            volume = state.volume
+            area = state.area
 
             #   Export
-            if bake or save:
-                id = Rhino.RhinoDoc.ActiveDoc.Objects.Add(out_mesh)
-                id = str(id)
+            if save and file_name:
+                vertices, faces = state.get("arrays")
+                with profiler.stage("export", faces = len(faces)):
+                    mesh_export.write_mesh(mesh_export.clean_path(file_name), vertices, faces, unit = rhinogeometry.document_unit())
+
+            #   A saved part is added to the document too, unless it is deleted after saving
+            if (bake or save) and not (save and delete):
+                Rhino.RhinoDoc.ActiveDoc.Objects.Add(out_mesh)
 
-                if save and file_name:
-                    rs.Command("SelID " + id)
-                    rs.Command("-Export " + file_name + " Enter")
-                
-                    if delete:
-                        rs.Command("SelID " + id)
-                        rs.Command("Delete")
-                
-            rs.Command("ClearUndo")
-            return out_mesh, original_report, mod_report, cut_report, volume, area
\ No newline at end of file
+            return out_mesh, original_report, mod_report, cut_report, volume, area, profiler.log_record()
\ No newline at end of file
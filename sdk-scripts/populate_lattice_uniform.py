@@ -4,16 +4,28 @@
         boundary_voxels: Voxels to populate with unit cell and get connectivity
         unit_cell: Lines and curves making up the repeat unit
         connectivity: Unit cell connectivity
-        primitive: Trimming boundary
+        primitive: Trimming boundary, the prepared primitive of the Primitive component or its mesh
+        mapping: Strut mapping engine, "trilinear" (default) or "boxmapping"
+        chunk_size: Number of items handed to each task, measured per stage if empty
+        workers: Number of worker threads, one per processor if empty
+        symmetry: Symmetry surfaces from the Primitive component, three for the octant or the last two for the quarter
+        cache_dir: Folder of the result cache; results are not cached if empty or while incremental is set
+        incremental: Reuse the previous solve's results for the voxels that did not change
+        radius: Strut radius stored in lattice_graph, one value or one per unit cell curve; 0 or empty leaves it to the meshing components
     Output:
-        lattice_core: Core voxels populated with unit cells
-        lattice_boundary: Boundary voxels populated with unit cells
-        lattice_trimmed: Trimmed lattice within primitive
+        lattice_core: Core voxels populated with unit cells, as curves only when connected
+        lattice_boundary: Boundary voxels populated with unit cells, as curves only when connected
+        lattice_trimmed: Trimmed lattice within primitive, as curves only when connected
         lattice_boundary_connect: Boundary voxels populated with connectivity
-        lattice_skin: Net skin of the lattice"""
+        lattice_skin: Net skin of the lattice
+        lattice_graph: Trimmed lattice as a deduplicated node and strut table, each strut with its radius and tagged with the index of its voxel, core voxels first
+        symmetry_domain: Symmetry domain the lattice was generated for, to mirror the mesh with
+        cache_report: Result cache hits and misses as a log record
+        incremental_report: Counts of reused, mapped and re-trimmed voxels as a log record
+        timings: Time, memory and item counts of each stage as a log record"""
 
 __author__ = "irw"
-__version__ = "2022.01.31"
+__version__ = "20261018"
 
 from ghpythonlib.componentbase import executingcomponent as component
 import Grasshopper, GhPython
@@ -23,6 +35,12 @@ import rhinoscriptsyntax as rs
 import ghpythonlib.components as ghcomp
 import ghpythonlib.parallel
 import ghpythonlib.treehelpers as th
+from latticetools import mapping as lattice_mapping
+from latticetools import populate
+from latticetools import rhinogeometry
+from latticetools.cache import ResultCache, stable_hash
+from latticetools.profiling import Profiler
+from latticetools.symmetry import SymmetryDomain
 
 def get_bounding_box(unit_cell):
         precise_box = False
@@ -32,75 +50,103 @@ def get_bounding_box(unit_cell):
             unit_cell_bounds = Rhino.Geometry.BoundingBox.Union(unit_cell_bounds, box)
         return unit_cell_bounds
 
-def check_inclusion(lattice_curve, mesh):
-    lattice_curve.Domain = Rhino.Geometry.Interval(0,1)
-    midpoint = lattice_curve.PointAt(0.5)
-    keep = mesh.IsPointInside(midpoint, 0.001, True)
-    return keep
+def populate_lattice(voxels, unit_cell, unit_cell_bounds, strut_counts):
+    mapped = ghcomp.BoxMapping(unit_cell, unit_cell_bounds, voxels)[0]
+    return mapped_struts(as_list(mapped), strut_counts)
 
-def check_curve_parallel(curve):
-    curve = Rhino.Geometry.Curve.TryGetPolyline(curve)[1]
-    curve = Rhino.Geometry.PolylineCurve(curve)
-    intersection_points = Rhino.Geometry.Intersect.Intersection.MeshPolyline(primitive_global, curve)[0]
-    if intersection_points:
-        curve_params = []
-        for point in intersection_points:
-            curve_params.append(curve.ClosestPoint(point)[1])
-        split_curve = curve.Split(curve_params)
-        for section in split_curve:
-            if (check_inclusion(section, primitive_global)):
-                lattice_trimmed.append(section)
-    else:
-        if (check_inclusion(curve, primitive_global)):
-            lattice_trimmed.append(curve)
+def map_boundary_boxmapping(voxel, unit_cell, connectivity, unit_cell_bounds, strut_counts):
+    #   One BoxMapping call maps the unit cell and the connectivity together
+    geometry = list(unit_cell)
+    if connectivity:
+        geometry.append(connectivity)
+    mapped = as_list(ghcomp.BoxMapping(geometry, unit_cell_bounds, voxel)[0])
+    connect = mapped.pop() if connectivity else None
+    return rhinogeometry.voxel_corners(voxel), mapped_struts(mapped, strut_counts), connect
 
-def populate_lattice_parallel(voxels):
-    lattice_structure = []
-    for curve in unit_cell_global:
-        mapped = ghcomp.BoxMapping(curve, unit_cell_bounds, voxels)[0]
-        lattice_structure.append(mapped)
-    return lattice_structure
+def mapped_struts(mapped, strut_counts):
+    #   A curve BoxMapping fails to map is None in its place, so the other curves keep their radii
+    return populate.mapped_struts([rhinogeometry.curve_struts(curve) if curve else None for curve in mapped], strut_counts)
 
-def populate_connectivity_parallel(voxels):
-    connect = ghcomp.BoxMapping(connectivity_global, unit_cell_bounds, voxels)[0]
-    return connect
-
-def populate_skin_parallel(voxels):
-    connect = ghcomp.BoxMapping(connectivity_global, unit_cell_bounds, voxels)[0]
-    # curves = Rhino.Geometry.Intersect.Intersection.MeshMeshAccurate(connect, primitive,  Rhino.RhinoMath.SqrtEpsilon*10)
-    curves = ghcomp.MeshXMesh(primitive_global, connect)
-    return curves
+def as_list(mapped):
+    return list(mapped) if isinstance(mapped, list) else [mapped]
 
 
 class UniformLattice(component):
-    def RunScript(self, core_voxels, boundary_voxels, unit_cell, connectivity, primitive):
-        global unit_cell_bounds
-        global unit_cell_global
-        global connectivity_global
-        global primitive_global
-        global lattice_trimmed
+    def connected(self, index):
+        return self.Params.Output[index].Recipients.Count > 0
+
+    def output_curves(self, index, struts):
+        #   Building a curve per strut dominates large lattices, so unconnected outputs stay empty
+        return rhinogeometry.struts_to_curves(struts) if self.connected(index) else None
 
-        unit_cell_global = unit_cell
-        connectivity_global = connectivity
-        primitive_global = primitive
+    def RunScript(self, core_voxels, boundary_voxels, unit_cell, connectivity, primitive, mapping, chunk_size, workers, symmetry, cache_dir, incremental, radius):
+        host = rhinogeometry.RhinoHost()
+        profiler = Profiler("uniform_lattice")
         unit_cell_bounds = get_bounding_box(unit_cell)
-        unit_cell = Rhino.Geometry.Curve.JoinCurves(unit_cell)
-        if core_voxels:
-            lattice_core = ghpythonlib.parallel.run(populate_lattice_parallel, core_voxels, True)
-        else:
-            lattice_core = []
-        if boundary_voxels:
-            lattice_boundary = ghpythonlib.parallel.run(populate_lattice_parallel, boundary_voxels, True)
-            lattice_boundary_connect = ghpythonlib.parallel.run(populate_connectivity_parallel, boundary_voxels, True)
-            lattice_skin = ghpythonlib.parallel.run(populate_skin_parallel, boundary_voxels, True)
+        strut_counts = [len(rhinogeometry.curve_struts(curve)) for curve in unit_cell]
+        unit_radii = populate.unit_strut_radii(strut_counts, radius)
+        with profiler.stage("primitive"):
+            prepared = rhinogeometry.prepared_primitive(primitive)
+        cache_report = None
+        incremental_report = None
+
+        if not mapping:
+            mapping = "trilinear"
+        if mapping == "trilinear":
+            strut_mapping = lattice_mapping.StrutMapping(rhinogeometry.curves_to_struts(unit_cell), rhinogeometry.bounds_tuple(unit_cell_bounds))
+            connectivity_mapping = None
+            if connectivity:
+                connectivity_mapping = lattice_mapping.PointMapping(rhinogeometry.mesh_arrays(connectivity)[0], rhinogeometry.bounds_tuple(unit_cell_bounds))
+            populate_function = lambda voxel: populate.map_lattice(host, voxel, strut_mapping)
+            map_boundary = lambda voxel: populate.map_boundary_trilinear(host, voxel, strut_mapping, connectivity, connectivity_mapping)
+        elif mapping == "boxmapping":
+            populate_function = lambda voxel: populate_lattice(voxel, unit_cell, unit_cell_bounds, strut_counts)
+            map_boundary = lambda voxel: map_boundary_boxmapping(voxel, unit_cell, connectivity, unit_cell_bounds, strut_counts)
         else:
-            lattice_boundary = []
-            lattice_boundary_connect = []
-            lattice_skin = []
+            raise ValueError("Unknown mapping engine: {}".format(mapping))
+
+        #   Only the symmetry domain, and one voxel layer across its planes, is generated
+        symmetry_domain = None
+        if symmetry:
+            symmetry_domain = SymmetryDomain([rhinogeometry.geometry_plane(surface) for surface in symmetry])
+            core_voxels = populate.symmetry_voxels(host, core_voxels or [], symmetry_domain)
+            boundary_voxels = populate.symmetry_voxels(host, boundary_voxels or [], symmetry_domain)
 
-        lattice_trimmed = []
-        lattice_combined = list(lattice_core) + list(lattice_boundary)
-        valid_curves = list(filter(None, lattice_combined))
-        ghpythonlib.parallel.run(check_curve_parallel, valid_curves, False)
+        generate = lambda: populate.generate_lattice(host, core_voxels, boundary_voxels, populate_function, map_boundary, unit_radii, prepared, chunk_size, workers, profiler)
+        if incremental:
+            #   The previous solve's voxel records are kept on the component between solves
+            settings = stable_hash(
+                mapping,
+                [rhinogeometry.curve_key(curve) for curve in unit_cell],
+                rhinogeometry.bounds_tuple(unit_cell_bounds),
+                rhinogeometry.mesh_arrays(connectivity) if connectivity else None,
+                unit_radii)
+            outputs, self.lattice_state, stats = populate.update_lattice(
+                host, getattr(self, "lattice_state", None), settings, core_voxels, boundary_voxels,
+                populate_function, map_boundary, unit_radii, prepared, chunk_size, workers, profiler)
+            incremental_report = stats.log_record("uniform_lattice_incremental")
+        elif cache_dir and mapping == "trilinear":
+            self.lattice_state = None
+            #   Keyed on everything the lattice depends on; the lattice is stored as plain arrays
+            result_cache = ResultCache(cache_dir)
+            key = result_cache.key(
+                "uniform_lattice",
+                rhinogeometry.curves_to_struts(unit_cell),
+                rhinogeometry.bounds_tuple(unit_cell_bounds),
+                rhinogeometry.voxels_to_corners(core_voxels or []),
+                rhinogeometry.voxels_to_corners(boundary_voxels or []),
+                rhinogeometry.mesh_arrays(connectivity) if connectivity else None,
+                unit_radii,
+                prepared)
+            outputs = populate.unpack_lattice(host, result_cache.cached(key, lambda: populate.pack_lattice(host, *generate())))
+            cache_report = result_cache.log_record("uniform_lattice_cache")
+        else:
+            self.lattice_state = None
+            outputs = generate()
+        lattice_core, lattice_boundary, lattice_trimmed, lattice_boundary_connect, lattice_skin, lattice_graph = outputs
+        with profiler.stage("curves"):
+            lattice_core = self.output_curves(0, lattice_core)
+            lattice_boundary = self.output_curves(1, lattice_boundary)
+            lattice_trimmed = self.output_curves(2, lattice_trimmed)
 
-        return lattice_core, lattice_boundary, lattice_trimmed, lattice_boundary_connect, lattice_skin
\ No newline at end of file
+        return lattice_core, lattice_boundary, lattice_trimmed, lattice_boundary_connect, lattice_skin, lattice_graph, symmetry_domain, cache_report, incremental_report, profiler.log_record()
\ No newline at end of file
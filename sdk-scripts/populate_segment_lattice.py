@@ -1,12 +1,25 @@
 """Convert lattice to points for meshing
     Inputs:
         curves: Curves that make up the lattice
-        radius: Minimum radius value for generating mesh
+        radius: Radius for generating mesh, one value or one per curve
+        lattice: Lattice graph from the populate component, used instead of curves; its strut radii take precedence over radius, which is one value or one per graph strut
+        chunk_size: Number of curves handed to each task, measured if empty
+        workers: Number of worker threads, one per processor if empty
+        mode: Sample spacing, "fixed" (radius/5, default) or "adaptive"
+        tolerance: Adaptive mode envelope error as a fraction of radius, 0.05 if empty
+        max_points: Maximum number of samples before merging, unlimited if empty
+        cache_dir: Folder of the result cache; results are not cached if empty
     Output:
-        points: Points to input to lattice meshing component"""
+        points: Points to input to lattice meshing component, with coincident strut ends merged
+        offsets: Start of each curve's samples in indices, followed by the total sample count
+        indices: Index into points of every sample, in curve order
+        removed: Number of coincident points removed by merging
+        cache_report: Result cache hits and misses as a log record
+        timings: Time, memory and item counts of each stage as a log record
+        radii: Radius of each point, the largest of the struts merged at it, for the radius of the Meshing - Points component"""
 
 __author__ = "irw"
-__version__ = "2022.03.23"
+__version__ = "20261018"
 
 from ghpythonlib.componentbase import executingcomponent as component
 import Grasshopper, GhPython
@@ -16,25 +29,36 @@ import rhinoscriptsyntax as rs
 import ghpythonlib.components as ghcomp
 import ghpythonlib.parallel
 import ghpythonlib.treehelpers as th
-
-def segment_curves_parallel(curve):
-    params = curve.DivideByLength(segment_length, False)
-    points = []
-    points.append(curve.PointAtStart)
-    try:
-        for t in params:
-            points.append(curve.PointAt(t))
-    except:
-        pass
-    points.append(curve.PointAtEnd)
-    return points
+from latticetools import rhinogeometry
+from latticetools import sampling
+from latticetools import segment as lattice_segment
+from latticetools.cache import ResultCache
+from latticetools.profiling import Profiler
 
 class SegmentLattice(component):
-    def RunScript(self, curves, radius):
-        global segment_length 
-        segment_length = float(radius)/5
-        
-        if curves:
-            points = ghpythonlib.parallel.run(segment_curves_parallel, curves, True)
+    def RunScript(self, curves, radius, lattice, chunk_size, workers, mode, tolerance, max_points, cache_dir):
+        #   Empty only when the lattice graph carries every strut's radius
+        radii = lattice_segment.radius_values(radius) or [0.0]
+        if not mode:
+            mode = lattice_segment.FIXED
+        if not tolerance:
+            tolerance = lattice_segment.DEFAULT_TOLERANCE
+        curves = [curve for curve in curves or [] if curve]
+        cache_report = None
+        host = rhinogeometry.RhinoHost()
+        profiler = Profiler("segment_lattice")
+
+        sample = lambda: sampling.sample_lattice(host, curves, radii, lattice, chunk_size, workers, mode, tolerance, max_points, profiler)
+        if cache_dir:
+            result_cache = ResultCache(cache_dir)
+            key = result_cache.key(
+                "segment_lattice",
+                lattice if lattice else [rhinogeometry.curve_key(curve) for curve in curves],
+                radii, mode, float(tolerance), max_points)
+            points, offsets, indices, removed, point_radii = sampling.unpack_samples(result_cache.cached(key, lambda: sampling.pack_samples(*sample())))
+            cache_report = result_cache.log_record("segment_lattice_cache")
+        else:
+            points, offsets, indices, removed, point_radii = sample()
 
-        return points
\ No newline at end of file
+        points = [Rhino.Geometry.Point3d(*point) for point in points]
+        return points, offsets, indices, removed, cache_report, profiler.log_record(), point_radii
\ No newline at end of file
@@ -6,16 +6,21 @@
         cut_surfaces: Top and bottom surfaces, oriented for trimming the lattice
         symmetry_surfaces: Surfaces for octant-based symmetry
         octant: Primitive mesh octant (-1, -1, -1)
-        quarter: Primitive mesh quarter (-1, -1)"""
+        quarter: Primitive mesh quarter (-1, -1)
+        prepared: Prepared primitive with its face index and subdomains, for the populate and meshing components
+        timings: Time, memory and item counts of each stage as a log record"""
 
 __author__ = "irw"
-__version__ = "20220124"
+__version__ = "20261018"
 
 from ghpythonlib.componentbase import executingcomponent as component
 import Grasshopper, GhPython
 import System
 import Rhino
 import rhinoscriptsyntax as rs
+from latticetools import primitive as primitive_registry
+from latticetools import rhinogeometry
+from latticetools.profiling import Profiler
 
 def clean_primitive(primitive):
     if (primitive.ObjectType == Rhino.DocObjects.ObjectType.Brep):
@@ -89,12 +94,34 @@ def get_symmetry_planes(primitive):
 
     return [Rhino.Geometry.Mesh.CreateFromSurface(surface, Rhino.Geometry.MeshingParameters(1)) for surface in [XY_cut, YZ_cut, ZX_cut]]
 
+def prepare_primitive(primitive, key):
+    mesh = clean_primitive(primitive)
+    cut_surfaces = get_cut_planes(mesh)
+    symmetry_surfaces = get_symmetry_planes(mesh)
+    vertices, faces = rhinogeometry.mesh_arrays(mesh)
+    prepared = primitive_registry.PreparedPrimitive(
+        key, vertices, faces,
+        symmetry_planes = [rhinogeometry.geometry_plane(surface) for surface in symmetry_surfaces],
+        cut_planes = [rhinogeometry.geometry_plane(surface) for surface in cut_surfaces],
+        mesh = mesh).build()
+    prepared.host["cut_surfaces"] = cut_surfaces
+    prepared.host["symmetry_surfaces"] = symmetry_surfaces
+    prepared.host["octant"] = rhinogeometry.arrays_to_mesh(*prepared.octant)
+    prepared.host["quarter"] = rhinogeometry.arrays_to_mesh(*prepared.quarter)
+    #   Also registered under the cleaned mesh, which is what downstream components are given
+    return primitive_registry.register(prepared, rhinogeometry.geometry_hash(mesh))
+
 class Primitive(component):
     def RunScript(self, primitive):
-        primitive = clean_primitive(primitive)
-        cut_surfaces = get_cut_planes(primitive)
-        symmetry_surfaces = get_symmetry_planes(primitive)
-        octant = Rhino.Geometry.Mesh.CreateBooleanDifference({primitive}, symmetry_surfaces)
-        quarter = Rhino.Geometry.Mesh.CreateBooleanDifference({primitive}, symmetry_surfaces[1:3])
-        
-        return primitive, cut_surfaces, symmetry_surfaces, octant, quarter
+        #   Meshing, healing, indexing and the symmetry subdomains are reused while the input is unchanged
+        profiler = Profiler("primitive")
+        with profiler.stage("lookup"):
+            key = rhinogeometry.geometry_hash(primitive)
+            prepared = primitive_registry.lookup(key)
+        if prepared is None:
+            with profiler.stage("prepare") as stage:
+                prepared = prepare_primitive(primitive, key)
+                stage.count(faces = len(prepared.faces))
+
+        host = prepared.host
+        return prepared.mesh, host["cut_surfaces"], host["symmetry_surfaces"], host["octant"], host["quarter"], prepared, profiler.log_record()
@@ -0,0 +1,3 @@
+"""Unit tests of the latticetools engines, run under CPython without Rhino.
+    Run with "python -m pytest tests" or "python -m unittest discover tests"
+    from the sdk-scripts folder."""
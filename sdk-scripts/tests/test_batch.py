@@ -0,0 +1,89 @@
+"""Batch parts run through the shared populate, sampling and meshing stages on LocalHost."""
+
+from __future__ import division
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+from latticetools import batch
+from latticetools import buildlog
+from latticetools import export as mesh_export
+from latticetools import populate
+from latticetools.host import LocalHost
+from latticetools.mapping import StrutMapping
+from latticetools.profiling import Profiler
+from latticetools.unitcells import UNIT_BOUNDS, unit_cell
+
+from tests.test_repair import CUBE_FACES, CUBE_VERTICES
+
+class BatchPartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.primitive = os.path.join(self.directory, "cube.stl")
+        mesh_export.write_mesh(self.primitive, [(4*x, 4*y, 4*z) for x, y, z in CUBE_VERTICES], CUBE_FACES)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def part(self, **params):
+        part = OrderedDict(batch.DEFAULTS)
+        part.update(primitive = self.primitive, cell_size = 2.0, radius = 0.2, voxel_size = 0.2)
+        part.update(params)
+        summary = batch.run_part(part, self.directory)
+        with open(summary["log_path"], "r") as log_file:
+            return summary, json.load(log_file)
+
+    def test_part_is_meshed_repaired_and_logged(self):
+        summary, log = self.part(part_id = "cube")
+        self.assertEqual(summary["status"], "ok", log.get("traceback"))
+        self.assertEqual(log["lattice"]["boundary_voxels"], 8)
+        self.assertTrue(log["original_report"]["closed_mesh"])
+        self.assertIn("repair_seconds", log["modified_report"])
+        self.assertNotIn("cut_report", log)
+        #   Streamed while it was extracted, and not written again since no repair changed it
+        self.assertNotIn("export", log["timings"]["batch"])
+        self.assertTrue(os.path.isfile(log["mesh_path"]))
+
+    def test_sampled_points_and_cut(self):
+        summary, log = self.part(mesh_from = "points", cut = True)
+        self.assertEqual(summary["status"], "ok", log.get("traceback"))
+        self.assertGreater(log["segment"]["points"], log["lattice"]["node_count"])
+        self.assertGreater(log["cut_report"]["cap_faces"], 0)
+        self.assertIn("export", log["timings"]["batch"])
+
+    def test_failing_part_is_logged(self):
+        summary, log = self.part(repair_stages = ["no_such_stage"])
+        self.assertEqual(summary["status"], "failed")
+        self.assertIn("Unknown repair stages", log["error"])
+
+    def test_lattice_radii_and_tags(self):
+        host = LocalHost()
+        prepared = host.load_primitive(self.primitive)
+        core, boundary = host.voxelize(prepared, 2.0)
+        struts = unit_cell("bcc")
+        strut_mapping = StrutMapping(struts, UNIT_BOUNDS)
+        radii = [0.1 + 0.01*n for n in range(len(struts))]
+        outputs = populate.generate_lattice(
+            host, core, boundary,
+            lambda voxel: populate.map_lattice(host, voxel, strut_mapping),
+            lambda voxel: populate.map_boundary_trilinear(host, voxel, strut_mapping, None, None),
+            populate.unit_strut_radii([1]*len(struts), radii), prepared, None, 1, Profiler("test"))
+        graph = outputs[5]
+        self.assertEqual(set(graph.radii), set(radii))
+        self.assertEqual(set(graph.tags), set(range(len(boundary))))
+
+class MakeIdTest(unittest.TestCase):
+
+    def test_properties_fragment(self):
+        part_id, date_utc = buildlog.make_id(["bcc", 2.0], 0)
+        self.assertEqual(len(part_id.split("-")), 3)
+        self.assertEqual(part_id.split("-")[1], buildlog.make_id(["bcc", 2.0], 1)[0].split("-")[1])
+        self.assertNotEqual(buildlog.make_id(["bcc", 2.0])[0].split("-")[1], buildlog.make_id(["bcc", 3.0])[0].split("-")[1])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+"""Benchmark budgets and the counts recorded with sampled stages."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools import benchmark
+
+class BenchmarkTest(unittest.TestCase):
+
+    def test_volume_strut_limit_scales_with_size(self):
+        self.assertEqual(benchmark.volume_strut_limit(10), 20)
+        self.assertEqual(benchmark.volume_strut_limit(100), 200)
+        self.assertEqual(benchmark.volume_strut_limit(100, 30), 30)
+        self.assertEqual(benchmark.volume_strut_limit(0), 1)
+
+    def test_meshed_struts_are_recorded(self):
+        result = benchmark.benchmark_primitive(4, "sphere", ["bcc"], max_volume_struts = 3)
+        self.assertEqual(result["volume_strut_limit"], 3)
+        counts = result["volume_struts"]["bcc"]
+        self.assertEqual(counts["meshed"], 3)
+        self.assertGreater(counts["trimmed"], 3)
+        self.assertEqual(result["stages"]["volume_bcc"]["struts"], 3)
+        self.assertTrue(result["stages"]["volume_bcc"]["sampled"])
+
+if __name__ == "__main__":
+    unittest.main()
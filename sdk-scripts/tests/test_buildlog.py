@@ -0,0 +1,118 @@
+"""JSON Lines build logs: torn lines, the offset index and legacy conversion."""
+
+from __future__ import division
+
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+
+from latticetools import buildlog
+
+def part(part_id, **values):
+    record = OrderedDict([(buildlog.PART_ID, part_id)])
+    record.update(sorted(values.items()))
+    return record
+
+class BuildLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "build.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def tear(self, data = b'{"part_id": "torn", "volu'):
+        with open(self.path, "ab") as log:
+            log.write(data)
+
+    def test_torn_line_is_skipped_and_appends_start_a_fresh_line(self):
+        first = buildlog.append_record(self.path, part("a", volume = 1.0))
+        self.tear()
+        offsets = buildlog.append_records(self.path, [part("b"), part("c", volume = 2.5)])
+        self.assertEqual(first, 0)
+        self.assertEqual([record[buildlog.PART_ID] for offset, record in buildlog.iter_records(self.path)], ["a", "b", "c"])
+        self.assertEqual([offset for offset, record in buildlog.iter_records(self.path)][1:], offsets)
+        self.assertEqual(buildlog.read_record(self.path, offsets[1])["volume"], 2.5)
+        with self.assertRaises(ValueError):
+            buildlog.read_record(self.path, offsets[0] - 2)
+
+    def test_complete_size_stops_at_the_last_line_end(self):
+        open(self.path, "wb").close()
+        self.assertEqual(buildlog.complete_size(self.path), 0)
+        buildlog.append_records(self.path, [part("a"), part("b")])
+        size = os.path.getsize(self.path)
+        self.assertEqual(buildlog.complete_size(self.path), size)
+        self.tear()
+        self.assertEqual(buildlog.complete_size(self.path), size)
+        #   A torn line longer than the scan block
+        self.tear(b"x"*10000)
+        self.assertEqual(buildlog.complete_size(self.path), size)
+        with open(self.path, "wb") as log:
+            log.write(b"no line end")
+        self.assertEqual(buildlog.complete_size(self.path), 0)
+
+    def test_index_reads_only_appended_records(self):
+        buildlog.append_records(self.path, [part("a", volume = 1.0), part("b")])
+        index = buildlog.BuildLogIndex(self.path)
+        self.assertEqual(len(index), 2)
+        self.assertTrue(os.path.exists(self.path + buildlog.INDEX_SUFFIX))
+        #   A record still being written is indexed once its line is complete
+        self.tear(b'{"part_id": "c"')
+        self.assertEqual(index.refresh(), 0)
+        self.tear(b"}\n")
+        buildlog.append_record(self.path, part("a", volume = 3.0))
+        self.assertEqual(index.refresh(), 2)
+        self.assertEqual(index.get("a")["volume"], 3.0)
+        self.assertIn("c", index)
+        self.assertIsNone(index.get("missing"))
+        #   A new index resumes from the saved one
+        reopened = buildlog.BuildLogIndex(self.path)
+        self.assertEqual(reopened.offsets, index.offsets)
+        self.assertEqual(reopened.size, os.path.getsize(self.path))
+
+    def test_replaced_or_truncated_log_is_reindexed(self):
+        buildlog.append_records(self.path, [part("a"), part("b"), part("c")])
+        index = buildlog.BuildLogIndex(self.path)
+        self.assertTrue(index.valid())
+
+        #   Truncated: shorter than the indexed size
+        with open(self.path, "rb") as log:
+            data = log.read()
+        with open(self.path, "wb") as log:
+            log.write(data[:data.index(b"\n") + 1])
+        self.assertFalse(index.valid())
+        index.refresh()
+        self.assertEqual(sorted(index.offsets), ["a"])
+
+        #   Replaced by a log of the same length or longer whose lines end elsewhere
+        with open(self.path, "wb") as log:
+            log.write(buildlog.encode_record(part("zz", note = "a longer first record")))
+        self.assertFalse(index.valid())
+        index.refresh()
+        self.assertEqual(sorted(index.offsets), ["zz"])
+        self.assertEqual(index.offset("zz"), 0)
+
+        os.remove(self.path)
+        self.assertFalse(index.valid())
+        self.assertEqual(index.refresh(), 0)
+        self.assertEqual(len(index), 0)
+
+    def test_convert_legacy(self):
+        legacy = os.path.join(self.directory, "legacy.txt")
+        with open(legacy, "w") as log:
+            log.write('{"part_id": "old1", "volume": 1.5},\n{"part_id": "old2", "volume": 2.0}\n')
+        buildlog.append_record(self.path, part("new"))
+        self.assertEqual(buildlog.convert_legacy(legacy, self.path), 2)
+        index = buildlog.BuildLogIndex(self.path)
+        self.assertEqual(sorted(index.offsets), ["new", "old1", "old2"])
+        self.assertEqual(index.get("old2")["volume"], 2.0)
+
+        empty = os.path.join(self.directory, "empty.txt")
+        open(empty, "w").close()
+        self.assertEqual(buildlog.convert_legacy(empty, self.path), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Result cache keys, binary entries, hits and misses and LRU eviction."""
+
+from __future__ import division
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+import zlib
+from array import array
+from collections import OrderedDict
+
+from latticetools import cache as result_cache
+from latticetools import meshing
+from latticetools import populate
+from latticetools import repair as mesh_repair
+from latticetools.cache import ResultCache, stable_hash
+from latticetools.graph import LatticeGraph
+from latticetools.host import LocalHost
+from latticetools.logrecord import LogRecord
+
+from tests.test_repair import CUBE_FACES, CUBE_VERTICES
+
+class Unsafe(object):
+
+    def __reduce__(self):
+        return (os.remove, ("never",))
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ResultCache(self.directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_keys_are_stable(self):
+        self.assertEqual(self.cache.key("stage", [1.0, (2, "a")]), self.cache.key("stage", [1.0, (2, "a")]))
+        self.assertNotEqual(self.cache.key("stage", [1.0]), self.cache.key("stage", [1]))
+        self.assertNotEqual(self.cache.key("stage", 0.1), self.cache.key("other", 0.1))
+        self.assertEqual(stable_hash({"b": 1, "a": 2}), stable_hash({"a": 2, "b": 1}))
+        with self.assertRaises(TypeError):
+            stable_hash(object())
+
+    def test_hits_and_misses(self):
+        calls = []
+        value = OrderedDict([("points", array("d", [0.5, 1.0, 2.0])), ("faces", array("i", [0, 1, 2, -1])), ("count", 3), ("name", u"part"), ("flags", [True, None])])
+        function = lambda: calls.append(1) or value
+        key = self.cache.key("stage", 1)
+        self.assertEqual(self.cache.cached(key, function), value)
+        self.assertEqual(self.cache.cached(key, function), value)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((self.cache.hits, self.cache.misses, self.cache.writes), (1, 1, 1))
+        #   A new cache on the same directory finds the entry
+        other = ResultCache(self.directory)
+        self.assertEqual(other.cached(key, function), value)
+        self.assertEqual(other.hits, 1)
+        self.assertEqual(list(other.report()), ["cache_hits", "cache_misses", "cache_writes", "cache_evictions", "cache_directory"])
+
+    def test_only_plain_data_is_stored(self):
+        for value in (Unsafe(), [object()], {1: "a"}, array("f", [1.0])):
+            with self.assertRaises(TypeError):
+                self.cache.store("key", value)
+
+    def test_pickled_and_corrupt_entries_are_misses(self):
+        key = self.cache.key("stage", 2)
+        for data in (
+                result_cache.CACHE_VERSION + zlib.compress(pickle.dumps(Unsafe(), 2)),
+                b"LTC1" + zlib.compress(pickle.dumps([1, 2], 2)),
+                result_cache.CACHE_VERSION + zlib.compress(b"a" + b"d" + b"\xff\xff\xff\xff")):
+            with open(self.cache.path(key), "wb") as entry:
+                entry.write(data)
+            self.assertEqual(self.cache.load(key), (False, None))
+            self.assertFalse(os.path.exists(self.cache.path(key)))
+
+    def test_least_recently_used_are_evicted(self):
+        data = array("d", range(1000))
+        keys = ["k{}".format(n) for n in range(4)]
+        for n, key in enumerate(keys):
+            self.cache.store(key, data)
+            os.utime(self.cache.path(key), (1000 + n, 1000 + n))
+        #   Reading k0 makes it the most recently used
+        self.assertTrue(self.cache.load("k0")[0])
+        self.cache.max_bytes = 2*os.path.getsize(self.cache.path("k0"))
+        self.cache.evict()
+        self.assertEqual(self.cache.evictions, 2)
+        self.assertEqual([key for key in keys if os.path.exists(self.cache.path(key))], ["k0", "k3"])
+
+class PackedResultTest(unittest.TestCase):
+
+    def round_trip(self, value):
+        return result_cache.decode(result_cache.encode(value))
+
+    def test_lattice_round_trip(self):
+        host = LocalHost()
+        struts = [((0.0, 0.0, 0.0), (1.0, 0.0, 0.0)), ((1.0, 0.0, 0.0), (1.0, 1.0, 0.0)), ((1.0, 0.0, 0.0), (0.0, 0.0, 0.0))]
+        graph = LatticeGraph.from_struts(struts, radii = [0.1, 0.2, 0.3], tags = [0, 1, 2])
+        connect = (list(CUBE_VERTICES), [(0, 3, 2, 1)] + CUBE_FACES[2:])
+        outputs = (struts[:1], struts[1:], struts, [connect], [[(0.0, 0.0, 0.0), (1.0, 2.0, 3.0)]], graph)
+        unpacked = populate.unpack_lattice(host, self.round_trip(populate.pack_lattice(host, *outputs)))
+        self.assertEqual(unpacked[:5], outputs[:5])
+        restored = unpacked[5]
+        self.assertEqual(restored.cache_key(), graph.cache_key())
+        self.assertEqual((restored.merged_nodes, restored.dropped_struts), (graph.merged_nodes, graph.dropped_struts))
+        #   The node hash and strut index are rebuilt, so adding to the graph merges as before
+        self.assertIsNone(restored.add_strut((0.0, 1e-9, 0.0), (1.0, 0.0, 0.0), 0.5))
+        self.assertEqual(list(restored.radii), [0.5, 0.2])
+
+    def test_mesh_round_trip(self):
+        host = LocalHost()
+        state = mesh_repair.MeshState((list(CUBE_VERTICES), list(CUBE_FACES)), host)
+        reports = (meshing.mesh_report(host, "original_report", state), LogRecord.entry("modified_report", OrderedDict([("repair_seconds", OrderedDict())])), None)
+        restored, restored_reports = meshing.unpack_mesh(host, self.round_trip(meshing.pack_mesh(state, reports)))
+        self.assertEqual(restored.get("arrays"), (CUBE_VERTICES, CUBE_FACES))
+        self.assertEqual(restored.diagnostics.report_items(), state.diagnostics.report_items())
+        self.assertEqual([report.entries if report else None for report in restored_reports], [report.entries if report else None for report in reports])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""Half-space clipping of closed meshes, with and without caps."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools import clip as mesh_clip
+from latticetools import isosurface
+from latticetools.diagnostics import MeshDiagnostics
+from latticetools.volume import SparseVolume
+
+from tests.test_repair import CUBE_FACES, CUBE_VERTICES
+
+class ClipTest(unittest.TestCase):
+
+    def test_capped_cut_keeps_the_cube_closed(self):
+        cut = mesh_clip.clip_mesh(CUBE_VERTICES, CUBE_FACES, [((0.5, 0.5, 0.25), (0.0, 0.0, -1.0))])
+        diagnostics = MeshDiagnostics(cut.vertices, cut.faces)
+        self.assertTrue(diagnostics.closed)
+        self.assertTrue(diagnostics.oriented)
+        self.assertAlmostEqual(diagnostics.volume, 0.25)
+        self.assertEqual(cut.cap_loops, 1)
+        self.assertEqual(cut.open_loops, 0)
+        self.assertEqual(cut.removed_faces, 2)
+        self.assertGreater(cut.cap_faces, 0)
+
+    def test_uncapped_cut_is_open_along_the_plane(self):
+        cut = mesh_clip.clip_mesh(CUBE_VERTICES, CUBE_FACES, [((0.5, 0.5, 0.5), (1.0, 0.0, 0.0))], cap = False)
+        diagnostics = MeshDiagnostics(cut.vertices, cut.faces)
+        self.assertFalse(diagnostics.closed)
+        self.assertEqual(cut.cap_faces, 0)
+        self.assertTrue(all(vertex[0] >= 0.5 for vertex in cut.vertices))
+
+    def test_planes_are_intersected(self):
+        planes = [((0.0, 0.0, 0.8), (0.0, 0.0, -1.0)), ((0.0, 0.0, 0.2), (0.0, 0.0, 1.0))]
+        cut = mesh_clip.clip_mesh(CUBE_VERTICES, CUBE_FACES, planes)
+        diagnostics = MeshDiagnostics(cut.vertices, cut.faces)
+        self.assertTrue(diagnostics.closed)
+        self.assertAlmostEqual(diagnostics.volume, 0.6)
+        self.assertEqual(cut.cap_loops, 2)
+
+    def test_ring_cap_bridges_its_hole(self):
+        #   A square frame of struts cut through its middle leaves annular caps
+        corners = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0), (0.0, 1.0, 0.0)]
+        struts = [(corners[n], corners[(n + 1) % 4]) for n in range(4)]
+        vertices, faces = isosurface.volume_to_mesh(SparseVolume(struts, [0.1]*4, 0.025), workers = 1)
+        whole = MeshDiagnostics(vertices, faces).volume
+        cut = mesh_clip.clip_mesh(vertices, faces, [((0.5, 0.5, 0.0), (0.0, 0.0, 1.0))])
+        diagnostics = MeshDiagnostics(cut.vertices, cut.faces)
+        self.assertTrue(diagnostics.closed)
+        self.assertEqual(cut.cap_loops, 2)
+        self.assertEqual(cut.open_loops, 0)
+        self.assertAlmostEqual(diagnostics.volume/whole, 0.5, delta = 0.01)
+
+if __name__ == "__main__":
+    unittest.main()
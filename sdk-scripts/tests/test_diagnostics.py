@@ -0,0 +1,85 @@
+"""Mesh diagnostics from one topology walk, on small meshes with known defects."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools.diagnostics import MeshDiagnostics
+
+from tests.test_repair import CUBE_FACES, CUBE_VERTICES
+
+def unwelded(vertices, faces):
+    """Every face with its own copy of its vertices, as an unwelded Rhino mesh holds them."""
+    soup = []
+    soup_faces = []
+    for face in faces:
+        soup_faces.append(tuple(range(len(soup), len(soup) + len(face))))
+        soup.extend(vertices[index] for index in face)
+    return soup, soup_faces
+
+def moved(vertices, offset):
+    return [tuple(vertex[i] + offset[i] for i in range(3)) for vertex in vertices]
+
+class MeshDiagnosticsTest(unittest.TestCase):
+
+    def test_closed_cube(self):
+        diagnostics = MeshDiagnostics(CUBE_VERTICES, CUBE_FACES)
+        self.assertTrue(diagnostics.valid)
+        self.assertTrue(diagnostics.closed)
+        self.assertTrue(diagnostics.manifold)
+        self.assertTrue(diagnostics.oriented)
+        self.assertEqual(diagnostics.edge_count, 18)
+        self.assertEqual(diagnostics.disjoint_count, 1)
+        self.assertAlmostEqual(diagnostics.volume, 1.0)
+        self.assertAlmostEqual(diagnostics.area, 6.0)
+
+    def test_unwelded_cube_is_closed(self):
+        diagnostics = MeshDiagnostics(*unwelded(CUBE_VERTICES, CUBE_FACES))
+        self.assertEqual(diagnostics.vertex_count, 36)
+        self.assertTrue(diagnostics.closed)
+        self.assertEqual(diagnostics.disjoint_count, 1)
+
+    def test_open_and_misoriented(self):
+        diagnostics = MeshDiagnostics(CUBE_VERTICES, CUBE_FACES[1:])
+        self.assertEqual(diagnostics.naked_edges, 3)
+        self.assertFalse(diagnostics.closed)
+        faces = list(CUBE_FACES)
+        faces[0] = tuple(reversed(faces[0]))
+        diagnostics = MeshDiagnostics(CUBE_VERTICES, faces)
+        self.assertTrue(diagnostics.closed)
+        self.assertFalse(diagnostics.oriented)
+        self.assertEqual(diagnostics.misoriented_edges, 3)
+
+    def test_non_manifold_edge(self):
+        #   A fin on the cube's bottom edge gives that edge three faces
+        vertices = CUBE_VERTICES + [(0.5, -1.0, 0.0)]
+        diagnostics = MeshDiagnostics(vertices, CUBE_FACES + [(0, 1, 8)])
+        self.assertEqual(diagnostics.non_manifold_edges, 1)
+        self.assertFalse(diagnostics.manifold)
+        self.assertFalse(diagnostics.closed)
+
+    def test_disjoint_parts(self):
+        vertices = CUBE_VERTICES + moved(CUBE_VERTICES, (3.0, 0.0, 0.0))
+        faces = CUBE_FACES + [tuple(index + 8 for index in face) for face in CUBE_FACES]
+        diagnostics = MeshDiagnostics(vertices, faces)
+        self.assertEqual(diagnostics.disjoint_count, 2)
+        self.assertAlmostEqual(diagnostics.volume, 2.0)
+
+    def test_quads_degenerate_and_invalid_faces(self):
+        quads = [(0, 3, 2, 1), (4, 5, 6, 7), (0, 1, 5, 4), (1, 2, 6, 5), (2, 3, 7, 6), (3, 0, 4, 7)]
+        diagnostics = MeshDiagnostics(CUBE_VERTICES, quads + [(0, 1, 1), (0, 1, 2, 2), (0, 1, 9)])
+        self.assertEqual(diagnostics.quad_count, 6)
+        self.assertEqual(diagnostics.degenerate_faces, 1)
+        self.assertEqual(diagnostics.repeated_index_faces, 1)
+        self.assertEqual(diagnostics.invalid_faces, 1)
+        self.assertFalse(diagnostics.valid)
+        self.assertIn("1 faces reference missing vertices", diagnostics.problems())
+
+    def test_report_items(self):
+        items = MeshDiagnostics(CUBE_VERTICES, CUBE_FACES).report_items()
+        self.assertEqual([name for name, value in items][:3], ["valid_mesh", "naked_edges", "closed_mesh"])
+        self.assertEqual(dict(items)["log_invalid"], "")
+        self.assertEqual(MeshDiagnostics([], []).problems(), "mesh has no faces")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""STL and 3MF writers, from mesh arrays and from streamed iso-surface blocks."""
+
+from __future__ import division
+
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import zipfile
+from xml.etree import ElementTree
+
+from latticetools import export as mesh_export
+from latticetools import isosurface
+from latticetools.volume import SparseVolume
+
+CORE = "{http://schemas.microsoft.com/3dmanufacturing/core/2015/02}"
+QUAD = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0), (0.0, 1.0, 0.0)]
+
+def read_model(path):
+    with zipfile.ZipFile(path) as package:
+        return ElementTree.fromstring(package.read(mesh_export.THREEMF_MODEL))
+
+def model_mesh(model):
+    vertices = [tuple(float(vertex.get(axis)) for axis in "xyz") for vertex in model.iter(CORE + "vertex")]
+    faces = [tuple(int(triangle.get(name)) for name in ("v1", "v2", "v3")) for triangle in model.iter(CORE + "triangle")]
+    return vertices, faces
+
+class ExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def test_stl_splits_quads_and_counts_triangles(self):
+        path = self.path("quad.stl")
+        mesh_export.write_mesh(path, QUAD, [(0, 1, 2, 3), (0, 1, 2, 2)], chunk_faces = 2)
+        with open(path, "rb") as stl:
+            data = stl.read()
+        count = struct.unpack("<I", data[80:84])[0]
+        self.assertEqual(count, 3)
+        self.assertEqual(len(data), 84 + 50*count)
+        self.assertEqual(struct.unpack("<3f", data[84:96]), (0.0, 0.0, 1.0))
+
+    def test_3mf_unit(self):
+        path = self.path("quad.3mf")
+        mesh_export.write_mesh(path, QUAD, [(0, 1, 2, 3)])
+        self.assertEqual(read_model(path).get("unit"), "millimeter")
+        mesh_export.write_mesh(path, QUAD, [(0, 1, 2, 3)], unit = "Inches")
+        model = read_model(path)
+        self.assertEqual(model.get("unit"), "inch")
+        self.assertEqual(model_mesh(model), (QUAD, [(0, 1, 2), (0, 2, 3)]))
+        with self.assertRaises(ValueError):
+            mesh_export.write_mesh(path, QUAD, [(0, 1, 2, 3)], unit = "Parsecs")
+
+    def test_3mf_blocks_are_welded(self):
+        volume = SparseVolume([((0.0, 0.0, 0.0), (1.0, 0.3, 0.1))], [0.1], 0.025)
+        expected = isosurface.volume_to_mesh(volume, workers = 1)
+        for max_blocks in (1, 4):
+            path = self.path("blocks.3mf")
+            mesh_export.write_blocks(path, isosurface.iter_mesh_blocks(volume, max_blocks = max_blocks, workers = 1), chunk_faces = 100)
+            vertices, faces = model_mesh(read_model(path))
+            self.assertEqual(faces, expected[1])
+            self.assertEqual(vertices, [tuple(float(value) for value in vertex) for vertex in expected[0]])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+"""Lattice graph node merging, strut deduplication, radii and tags."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools.graph import NO_TAG, LatticeGraph
+
+SQUARE = [
+    ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0)),
+    ((1.0, 0.0, 0.0), (1.0, 1.0, 0.0)),
+    ((1.0, 1.0, 0.0), (0.0, 1.0, 0.0)),
+    ((0.0, 1.0, 0.0), (0.0, 0.0, 0.0))]
+
+class LatticeGraphTest(unittest.TestCase):
+
+    def test_shared_struts_are_merged(self):
+        #   The second voxel repeats one strut reversed and one point within the tolerance
+        struts = SQUARE + [((1.0, 1.0, 0.0), (1.0, 0.0, 0.0)), ((1.0, 1e-9, 0.0), (2.0, 0.0, 0.0))]
+        graph = LatticeGraph.from_struts(struts)
+        self.assertEqual(graph.node_count, 5)
+        self.assertEqual(graph.strut_count, 5)
+        self.assertEqual(graph.dropped_struts, 1)
+
+    def test_radii_and_tags(self):
+        struts = SQUARE + [((1.0, 1.0, 0.0), (1.0, 0.0, 0.0))]
+        graph = LatticeGraph.from_struts(struts, radii = [0.1, 0.2, 0.0, 0.1, 0.3], tags = [0, 0, 0, 0, 1])
+        #   A duplicate keeps the first strut's tag and the larger radius
+        self.assertEqual(list(graph.radii), [0.1, 0.3, 0.0, 0.1])
+        self.assertEqual(list(graph.tags), [0, 0, 0, 0])
+        self.assertEqual(list(LatticeGraph.from_struts(SQUARE).tags), [NO_TAG]*4)
+
+    def test_strut_radii_defaults(self):
+        graph = LatticeGraph.from_struts(SQUARE, radii = [0.1, 0.0, 0.2, 0.0])
+        self.assertEqual(graph.strut_radii(0.5), [0.1, 0.5, 0.2, 0.5])
+        self.assertEqual(graph.strut_radii([0.6, 0.7, 0.8, 0.9]), [0.1, 0.7, 0.2, 0.9])
+        with self.assertRaises(ValueError):
+            graph.strut_radii([0.6, 0.7])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""Incremental re-population matches a fresh generate_lattice, reusing the voxels a change does not reach."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools import benchmark
+from latticetools import populate
+from latticetools import trim as lattice_trim
+from latticetools.host import LocalHost
+from latticetools.mapping import StrutMapping
+from latticetools.primitive import PreparedPrimitive
+from latticetools.profiling import Profiler
+from latticetools.unitcells import UNIT_BOUNDS, unit_cell
+
+CELL_SIZE = 1.0
+SETTINGS = ("bcc", CELL_SIZE)
+
+def sphere(moved = None):
+    """Prepared sphere of radius 3.3, with one vertex away from its bounds pulled inwards if moved."""
+    vertices, faces = benchmark.sphere_mesh(16, 3.3)
+    if moved is not None:
+        x, y, z = vertices[moved]
+        vertices[moved] = (0.8*x, 0.8*y, 0.8*z)
+    return PreparedPrimitive("sphere" if moved is None else "moved", vertices, faces).build()
+
+class IncrementalLatticeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.host = LocalHost()
+        self.mapping = StrutMapping(unit_cell("bcc"), UNIT_BOUNDS)
+        self.radii = populate.unit_strut_radii([len(unit_cell("bcc"))], 0.1)
+
+    def arguments(self, prepared):
+        core, boundary = self.host.voxelize(prepared, CELL_SIZE)
+        return (
+            core, boundary,
+            lambda voxel: populate.map_lattice(self.host, voxel, self.mapping),
+            lambda voxel: populate.map_boundary_trilinear(self.host, voxel, self.mapping, None, None),
+            self.radii, prepared, None, 1, Profiler("test"))
+
+    def assertSameLattice(self, outputs, expected):
+        self.assertEqual(outputs[:5], expected[:5])
+        self.assertEqual(outputs[5].cache_key(), expected[5].cache_key())
+        self.assertEqual(list(outputs[5].tags), list(expected[5].tags))
+
+    def test_full_change_rebuilds_every_voxel(self):
+        prepared = sphere()
+        arguments = self.arguments(prepared)
+        core, boundary = arguments[:2]
+        outputs, state, stats = populate.update_lattice(self.host, None, SETTINGS, *arguments)
+        self.assertSameLattice(outputs, populate.generate_lattice(self.host, *arguments))
+        self.assertTrue(stats.full_rebuild)
+        self.assertEqual((stats.reused, stats.mapped), (0, len(core) + len(boundary)))
+        straddling = [voxel for voxel in boundary if lattice_trim.classify_voxel(prepared.index, voxel) == lattice_trim.STRADDLING]
+        self.assertEqual(stats.retrimmed, len(straddling))
+        self.assertEqual(len(state), len(core) + len(boundary))
+
+        #   Other settings reuse nothing from the previous solve
+        outputs, state, stats = populate.update_lattice(self.host, state, ("fcc", CELL_SIZE), *arguments)
+        self.assertTrue(stats.full_rebuild)
+        self.assertEqual(stats.reused, 0)
+        self.assertEqual(stats.retrimmed, len(straddling))
+
+    def test_unchanged_primitive_reuses_every_voxel(self):
+        arguments = self.arguments(sphere())
+        outputs, state, stats = populate.update_lattice(self.host, None, SETTINGS, *arguments)
+        outputs, state, stats = populate.update_lattice(self.host, state, SETTINGS, *arguments)
+        self.assertSameLattice(outputs, populate.generate_lattice(self.host, *arguments))
+        self.assertFalse(stats.full_rebuild)
+        self.assertEqual(stats.reused, len(arguments[0]) + len(arguments[1]))
+        self.assertEqual((stats.mapped, stats.reclassified, stats.retrimmed, stats.removed, stats.changed_triangles), (0, 0, 0, 0, 0))
+
+    def test_local_vertex_change_retrims_only_nearby_voxels(self):
+        previous = self.arguments(sphere())
+        outputs, state, stats = populate.update_lattice(self.host, None, SETTINGS, *previous)
+        #   A vertex of a ring next to the equator, between the extremes, so the bounds and the voxel grid stay put
+        moved = sphere(moved = 4*16 + 2)
+        arguments = self.arguments(moved)
+        outputs, state, stats = populate.update_lattice(self.host, state, SETTINGS, *arguments)
+        self.assertSameLattice(outputs, populate.generate_lattice(self.host, *arguments))
+        self.assertFalse(stats.full_rebuild)
+        #   The six triangles around the vertex, before and after
+        self.assertEqual(stats.changed_triangles, 12)
+        #   Of 310 voxels, the 22 straddling the dent are trimmed again: 21 reclassified and one
+        #   boundary voxel that was core, while the core voxel it replaces is removed
+        self.assertEqual((len(arguments[0]), len(arguments[1])), (40, 270))
+        self.assertEqual((stats.reused, stats.mapped, stats.reclassified, stats.retrimmed, stats.removed), (288, 1, 21, 22, 1))
+
+if __name__ == "__main__":
+    unittest.main()
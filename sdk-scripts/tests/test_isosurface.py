@@ -0,0 +1,118 @@
+"""Iso-surface extraction checked against analytic capsule and sphere volumes."""
+
+from __future__ import division
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+
+from latticetools import export as mesh_export
+from latticetools import isosurface
+from latticetools import meshing
+from latticetools.diagnostics import MeshDiagnostics
+from latticetools.volume import SparseVolume, segment_distance
+
+def capsule_volume(length, radius):
+    return math.pi*radius*radius*length + 4.0/3.0*math.pi*radius**3
+
+def extract(struts, radius, voxel_size, **kwargs):
+    volume = SparseVolume(struts, [radius]*len(struts), voxel_size)
+    return isosurface.volume_to_mesh(volume, workers = 1, **kwargs)
+
+class VolumeTest(unittest.TestCase):
+
+    def test_samples_are_capsule_distances(self):
+        start, end, radius = (0.0, 0.0, 0.0), (1.0, 0.5, 0.0), 0.2
+        volume = SparseVolume([(start, end)], [radius], 0.1)
+        direction = (1.0, 0.5, 0.0)
+        for key in volume.block_keys():
+            values = volume.sample_block(key)
+            origin = volume.block_origin(key)
+            count = volume.block_size + 1
+            for i, j, k in ((0, 0, 0), (3, 5, 2), (8, 8, 8)):
+                point = tuple((origin[n] + (i, j, k)[n])*volume.voxel_size for n in range(3))
+                expected = segment_distance(point, start, direction, 1.25) - radius
+                self.assertAlmostEqual(values[(i*count + j)*count + k], min(expected, volume.band))
+
+    def test_blocks_cover_band(self):
+        volume = SparseVolume([((0.0, 0.0, 0.0), (1.0, 0.0, 0.0))], [0.2], 0.05)
+        for key in volume.block_keys():
+            self.assertIn(key, volume.block_capsules)
+        self.assertEqual(volume.block_keys(), sorted(volume.block_keys()))
+
+class IsosurfaceTest(unittest.TestCase):
+
+    def assert_closed(self, vertices, faces):
+        diagnostics = MeshDiagnostics(vertices, faces)
+        self.assertTrue(diagnostics.closed)
+        self.assertTrue(diagnostics.manifold)
+        self.assertTrue(diagnostics.oriented)
+        self.assertEqual(diagnostics.degenerate_faces, 0)
+        self.assertEqual(diagnostics.disjoint_count, 1)
+        return diagnostics
+
+    def test_axis_aligned_capsule(self):
+        #   Samples fall exactly on the surface of an axis-aligned strut
+        for voxel_size in (0.05, 0.02):
+            vertices, faces = extract([((0.0, 0.0, 0.0), (1.0, 0.0, 0.0))], 0.2, voxel_size)
+            diagnostics = self.assert_closed(vertices, faces)
+            self.assertAlmostEqual(diagnostics.volume/capsule_volume(1.0, 0.2), 1.0, delta = 0.02)
+
+    def test_sphere(self):
+        vertices, faces = extract([((0.1, 0.2, 0.3), (0.1, 0.2, 0.3))], 0.25, 0.025)
+        diagnostics = self.assert_closed(vertices, faces)
+        self.assertAlmostEqual(diagnostics.volume/(4.0/3.0*math.pi*0.25**3), 1.0, delta = 0.01)
+        self.assertAlmostEqual(diagnostics.area/(4.0*math.pi*0.25**2), 1.0, delta = 0.03)
+        for vertex in vertices:
+            distance = math.sqrt(sum((vertex[i] - (0.1, 0.2, 0.3)[i])**2 for i in range(3)))
+            self.assertAlmostEqual(distance, 0.25, delta = 0.025)
+
+    def test_oblique_capsule(self):
+        start, end = (0.0, 0.0, 0.0), (0.6, 0.8, 0.0)
+        vertices, faces = extract([(start, end)], 0.15, 0.03)
+        diagnostics = self.assert_closed(vertices, faces)
+        self.assertAlmostEqual(diagnostics.volume/capsule_volume(1.0, 0.15), 1.0, delta = 0.02)
+
+    def test_joined_struts_at_default_voxel_size(self):
+        #   Struts meeting at a node, at the native engine's default voxel size of radius/4
+        radius = 0.1
+        struts = [((0.5, 0.5, 0.5), corner) for corner in ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (0.0, 1.0, 1.0), (1.0, 1.0, 1.0))]
+        struts.append(((0.0, 0.0, 0.0), (1.0, 0.0, 0.0)))
+        vertices, faces = extract(struts, radius, radius/4)
+        self.assert_closed(vertices, faces)
+
+    def test_iso_value(self):
+        vertices, faces = extract([((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))], 0.2, 0.02, iso = 0.05)
+        diagnostics = self.assert_closed(vertices, faces)
+        self.assertAlmostEqual(diagnostics.volume/(4.0/3.0*math.pi*0.25**3), 1.0, delta = 0.01)
+
+class StreamingTest(unittest.TestCase):
+    STRUTS = [((0.0, 0.0, 0.0), (1.0, 0.4, 0.2)), ((1.0, 0.4, 0.2), (1.2, 1.0, 0.9))]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_weld_is_independent_of_max_blocks(self):
+        volume = SparseVolume(self.STRUTS, [0.1]*2, 0.025)
+        self.assertGreater(len(volume.block_keys()), 8)
+        expected = isosurface.volume_to_mesh(volume, workers = 1)
+        for max_blocks in (1, 2, 5, len(volume.block_keys())):
+            self.assertEqual(isosurface.volume_to_mesh(volume, max_blocks = max_blocks, workers = 1), expected)
+            self.assertEqual(isosurface.volume_to_mesh(volume, max_blocks = max_blocks, workers = 3), expected)
+
+    def test_streamed_file_matches_welded_mesh(self):
+        streamed = os.path.join(self.directory, "streamed.stl")
+        welded = os.path.join(self.directory, "welded.stl")
+        vertices, faces = meshing.native_mesh(self.STRUTS, [0.1]*2, 0.025, workers = 1, path = streamed)
+        self.assertEqual((vertices, faces), meshing.native_mesh(self.STRUTS, [0.1]*2, 0.025, workers = 1))
+        mesh_export.write_mesh(welded, vertices, faces)
+        with open(streamed, "rb") as a, open(welded, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Log records: native values, merging and serialization."""
+
+from __future__ import division
+
+import json
+import unittest
+from collections import OrderedDict
+
+from latticetools import logrecord
+from latticetools.logrecord import LogRecord
+
+class LogRecordTest(unittest.TestCase):
+
+    def test_values_stay_native(self):
+        report = OrderedDict([("closed_mesh", True), ("volume", 1.5), ("faces", 12), ("failed", [])])
+        record = LogRecord.entry("modified_report", report)
+        self.assertIs(record.get("modified_report")["closed_mesh"], True)
+        self.assertEqual(record.to_json(), '{"modified_report":{"closed_mesh":true,"volume":1.5,"faces":12,"failed":[]}}')
+        self.assertEqual(json.loads(str(record)), json.loads(record.to_json()))
+
+    def test_dumps_nested_records_and_other_values(self):
+        data = OrderedDict([
+            ("nested", LogRecord.entry("a", 1)),
+            ("planes", ((0.0, 0.0, 1.0),)),
+            ("tags", frozenset([3])),
+            ("other", Opaque())])
+        self.assertEqual(logrecord.dumps(data), '{"nested":{"a":1},"planes":[[0.0,0.0,1.0]],"tags":[3],"other":"opaque"}')
+        self.assertEqual(logrecord.dumps({"a": [1]}, indent = 1), '{\n "a": [\n  1\n ]\n}')
+
+    def test_merge_replaces_entries_and_merges_timings(self):
+        first = LogRecord([("part_id", "a"), ("timings", OrderedDict([("populate", {"core": 1})]))])
+        second = OrderedDict([("part_id", "b"), ("timings", OrderedDict([("mesh", {"mesh": 2})]))])
+        third = '{"volume": 2.5, "timings": {"segment": {"merge": 3}}}'
+        merged = logrecord.merge([first, None, "", second, third])
+        self.assertEqual(merged.keys(), ["part_id", "timings", "volume"])
+        self.assertEqual(merged.get("part_id"), "b")
+        self.assertEqual(list(merged.get("timings")), ["populate", "mesh", "segment"])
+        #   The records merged from are left as they were
+        self.assertEqual(list(first.get("timings")), ["populate"])
+        self.assertEqual(list(second["timings"]), ["mesh"])
+
+    def test_from_value(self):
+        record = LogRecord.entry("a", 1)
+        self.assertIs(LogRecord.from_value(record), record)
+        self.assertIsNone(LogRecord.from_value(None))
+        self.assertIsNone(LogRecord.from_value("  "))
+        self.assertEqual(LogRecord.from_value('{"b": 2}').get("b"), 2)
+        with self.assertRaises(ValueError):
+            LogRecord.from_value("[1, 2]")
+
+    def test_record_is_not_iterable(self):
+        with self.assertRaises(TypeError):
+            iter(LogRecord.entry("a", 1))
+        self.assertEqual(repr(LogRecord([("a", 1), ("b", 2)])), "LogRecord(a, b)")
+
+class Opaque(object):
+
+    def __str__(self):
+        return "opaque"
+
+if __name__ == "__main__":
+    unittest.main()
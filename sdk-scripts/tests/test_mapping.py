@@ -0,0 +1,68 @@
+"""Trilinear strut mapping and hexahedral voxel corners."""
+
+from __future__ import division
+
+import math
+import random
+import unittest
+
+from latticetools import mapping
+
+BOX = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), (1.0, 0.0, 1.0), (1.0, 1.0, 1.0), (0.0, 1.0, 1.0)]
+BOX_EDGES = [(0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 6), (6, 7), (7, 4), (0, 4), (1, 5), (2, 6), (3, 7)]
+
+def shuffled(corners, seed):
+    """Corners in a random vertex order, with the box edges renumbered to match, as a brep lists them."""
+    order = list(range(8))
+    random.Random(seed).shuffle(order)
+    position = dict((corner, n) for n, corner in enumerate(order))
+    return [corners[corner] for corner in order], [(position[a], position[b]) for a, b in BOX_EDGES]
+
+def transformed(corners, scale, angle, offset):
+    c, s = math.cos(angle), math.sin(angle)
+    return [(offset[0] + scale[0]*x*c - scale[1]*y*s, offset[1] + scale[0]*x*s + scale[1]*y*c, offset[2] + scale[2]*z) for x, y, z in corners]
+
+class HexahedronCornersTest(unittest.TestCase):
+
+    def assert_corners(self, actual, expected):
+        self.assertEqual(len(actual), 8)
+        for a, b in zip(actual, expected):
+            for i in range(3):
+                self.assertAlmostEqual(a[i], b[i])
+
+    def test_box_in_any_vertex_order(self):
+        for seed in range(10):
+            points, edges = shuffled(BOX, seed)
+            self.assert_corners(mapping.hexahedron_corners(points, edges), BOX)
+
+    def test_scaled_and_rotated_box(self):
+        corners = transformed(BOX, (2.0, 0.5, 3.0), 0.3, (10.0, -4.0, 1.0))
+        points, edges = shuffled(corners, 1)
+        self.assert_corners(mapping.hexahedron_corners(points, edges), corners)
+
+    def test_twisted_voxel_keeps_its_corners(self):
+        #   Its bounding box is larger than the voxel and would map the struts outside it
+        corners = list(BOX)
+        corners[6] = (1.4, 1.3, 1.2)
+        corners[7] = (-0.1, 1.2, 1.1)
+        points, edges = shuffled(corners, 2)
+        self.assert_corners(mapping.hexahedron_corners(points, edges), corners)
+        struts = mapping.StrutMapping([((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))], ((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))).map_voxel(mapping.hexahedron_corners(points, edges))
+        self.assertEqual(struts, [((0.0, 0.0, 0.0), (1.4, 1.3, 1.2))])
+
+    def test_frame_is_right_handed(self):
+        #   Mirrored box: x runs negative, so the first corner's edges are matched to keep the frame right-handed
+        corners = [(-x, y, z) for x, y, z in BOX]
+        points, edges = shuffled(corners, 3)
+        ordered = mapping.hexahedron_corners(points, edges)
+        u, v, w = [mapping.subtract(ordered[n], ordered[0]) for n in (1, 3, 4)]
+        self.assertGreater(mapping.determinant(u, v, w), 0)
+
+    def test_rejects_other_solids(self):
+        with self.assertRaises(ValueError):
+            mapping.hexahedron_corners(BOX[:6], BOX_EDGES[:9])
+        with self.assertRaises(ValueError):
+            mapping.hexahedron_corners(BOX, BOX_EDGES[:11] + [(0, 6)])
+
+if __name__ == "__main__":
+    unittest.main()
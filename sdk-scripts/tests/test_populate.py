@@ -0,0 +1,66 @@
+"""Unit cell strut radii through the populate stages, including mappings that drop curves."""
+
+from __future__ import division
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from latticetools import export as mesh_export
+from latticetools import populate
+from latticetools.host import LocalHost
+from latticetools.mapping import StrutMapping
+from latticetools.profiling import Profiler
+from latticetools.unitcells import UNIT_BOUNDS, unit_cell
+
+from tests.test_repair import CUBE_FACES, CUBE_VERTICES
+
+STRUT = ((0.0, 0.0, 0.0), (1.0, 1.0, 1.0))
+
+class VoxelRadiiTest(unittest.TestCase):
+
+    def test_struts_in_unit_cell_order(self):
+        unit_radii = populate.unit_strut_radii([2, 1], [0.1, 0.3])
+        self.assertEqual(populate.voxel_radii([STRUT]*3, unit_radii), [0.1, 0.1, 0.3])
+        with self.assertRaises(ValueError):
+            populate.voxel_radii([STRUT]*2, unit_radii)
+
+    def test_dropped_curve_keeps_the_other_radii(self):
+        #   Three unit cell curves of 2, 1 and 1 struts; the first fails to map
+        unit_radii = populate.unit_strut_radii([2, 1, 1], [0.1, 0.2, 0.3])
+        struts = populate.mapped_struts([None, [STRUT], [STRUT]], [2, 1, 1])
+        self.assertEqual(list(struts), [STRUT, STRUT])
+        self.assertEqual(populate.voxel_radii(struts, unit_radii), [0.2, 0.3])
+        struts = populate.mapped_struts([[STRUT, STRUT], None, [STRUT]], [2, 1, 1])
+        self.assertEqual(populate.voxel_radii(struts, unit_radii), [0.1, 0.1, 0.3])
+        self.assertEqual(populate.voxel_radii(populate.mapped_struts([None]*3, [2, 1, 1]), unit_radii), [])
+        with self.assertRaises(ValueError):
+            populate.mapped_struts([[STRUT]], [2, 1, 1])
+
+    def test_generated_lattice_radii_with_a_dropped_curve(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "cube.stl")
+            mesh_export.write_mesh(path, [(4*x, 4*y, 4*z) for x, y, z in CUBE_VERTICES], CUBE_FACES)
+            host = LocalHost()
+            prepared = host.load_primitive(path)
+            core, boundary = host.voxelize(prepared, 2.0)
+        finally:
+            shutil.rmtree(directory)
+        #   Each bcc strut as its own curve, the first dropped from every voxel as a failed BoxMapping drops it
+        struts = unit_cell("bcc")
+        counts = [1]*len(struts)
+        radii = [0.1 + 0.01*n for n in range(len(struts))]
+        strut_mapping = StrutMapping(struts, UNIT_BOUNDS)
+        def map_dropping(voxel):
+            return populate.mapped_struts([None] + [[strut] for strut in strut_mapping.map_voxel(host.voxel_corners(voxel))[1:]], counts)
+        outputs = populate.generate_lattice(
+            host, core, boundary, map_dropping,
+            lambda voxel: (host.voxel_corners(voxel), map_dropping(voxel), None),
+            populate.unit_strut_radii(counts, radii), prepared, None, 1, Profiler("test"))
+        self.assertEqual(set(outputs[5].radii), set(radii[1:]))
+        self.assertEqual(len(outputs[2]), len(outputs[5].radii))
+
+if __name__ == "__main__":
+    unittest.main()
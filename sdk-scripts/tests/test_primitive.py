@@ -0,0 +1,63 @@
+"""Prepared primitives and their registry: lookup, aliases and least recently used eviction."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools import primitive as primitive_registry
+from latticetools.primitive import PreparedPrimitive
+
+from tests.test_repair import CUBE_FACES, CUBE_VERTICES
+
+def cube(key, size = 1.0):
+    return PreparedPrimitive(key, [(size*x, size*y, size*z) for x, y, z in CUBE_VERTICES], CUBE_FACES)
+
+class RegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        primitive_registry.clear()
+
+    def tearDown(self):
+        primitive_registry.clear()
+
+    def test_lookup_and_register(self):
+        self.assertIsNone(primitive_registry.lookup("a"))
+        prepared = primitive_registry.register(cube("a"), "input")
+        self.assertIs(primitive_registry.lookup("a"), prepared)
+        self.assertIs(primitive_registry.lookup("input"), prepared)
+
+    def test_prepare_builds_once_and_registers_the_input_key(self):
+        built = []
+        def build():
+            built.append(1)
+            return cube("cleaned").build()
+        prepared = primitive_registry.prepare("input", build)
+        self.assertIs(primitive_registry.prepare("input", build), prepared)
+        self.assertIs(primitive_registry.prepare("cleaned", build), prepared)
+        self.assertEqual(len(built), 1)
+        self.assertEqual(prepared.bounds, ((0.0, 0.0, 0.0), (1.0, 1.0, 1.0)))
+        self.assertTrue(prepared.is_inside((0.5, 0.5, 0.5)))
+
+    def test_least_recently_used_primitives_are_evicted(self):
+        count = primitive_registry.MAX_PREPARED
+        for n in range(count):
+            primitive_registry.register(cube(n), "alias{}".format(n))
+        #   Aliases do not count against the limit, and a lookup makes a primitive recent
+        self.assertIsNotNone(primitive_registry.lookup(0))
+        primitive_registry.register(cube(count))
+        self.assertIsNone(primitive_registry.lookup(1))
+        self.assertIsNone(primitive_registry.lookup("alias1"))
+        for n in [0, 2, count]:
+            self.assertIsNotNone(primitive_registry.lookup(n))
+        self.assertIsNotNone(primitive_registry.lookup("alias0"))
+
+    def test_subdomains_are_clipped_once(self):
+        prepared = cube("a", 2.0)
+        prepared.symmetry_planes = [((1.0, 1.0, 1.0), (0.0, 0.0, -1.0)), ((1.0, 1.0, 1.0), (-1.0, 0.0, 0.0)), ((1.0, 1.0, 1.0), (0.0, -1.0, 0.0))]
+        octant = prepared.octant
+        self.assertIs(prepared.octant, octant)
+        self.assertEqual(max(max(vertex) for vertex in octant[0]), 1.0)
+        self.assertEqual(max(vertex[2] for vertex in prepared.quarter[0]), 2.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+"""Stage timings: counts, inputs, repeated stages and the timings log record."""
+
+from __future__ import division
+
+import json
+import unittest
+
+from latticetools import profiling
+from latticetools.profiling import Profiler
+
+class ProfilerTest(unittest.TestCase):
+
+    def test_stage_counts_add_up(self):
+        profiler = Profiler("populate")
+        with profiler.stage("trim", struts = 10) as stage:
+            stage.count(sections = 4)
+        with profiler.stage("trim", struts = 5) as stage:
+            stage.count(sections = 2, removed = 1)
+        record = profiler.report()["trim"]
+        self.assertEqual(record["calls"], 2)
+        self.assertEqual(record["input"], "struts")
+        self.assertEqual((record["struts"], record["sections"], record["removed"]), (15, 6, 1))
+        self.assertGreaterEqual(record["wall_seconds"], 0.0)
+        self.assertEqual(list(record)[:7], ["wall_seconds", "cpu_seconds", "memory_delta_mb", "peak_growth_mb", "process_peak_memory_mb", "calls", "input"])
+
+    def test_input_is_named_or_the_only_count(self):
+        profiler = Profiler("mesh")
+        with profiler.stage("mesh", "points", points = 3, struts = 1):
+            pass
+        with profiler.stage("report"):
+            pass
+        with profiler.stage("cut", faces = 8):
+            pass
+        report = profiler.report()
+        self.assertEqual(list(report), ["mesh", "report", "cut"])
+        self.assertEqual(report["mesh"]["input"], "points")
+        self.assertIsNone(report["report"]["input"])
+        self.assertEqual(report["cut"]["input"], "faces")
+
+    def test_stage_is_recorded_when_it_raises(self):
+        profiler = Profiler("segment")
+        with self.assertRaises(ValueError):
+            with profiler.stage("merge", points = 2):
+                raise ValueError("no merge")
+        self.assertEqual(profiler.report()["merge"]["calls"], 1)
+
+    def test_profile_decorator(self):
+        profiler = Profiler("batch")
+        @profiler.profile("square")
+        def square(value):
+            """Square of value."""
+            return value*value
+        self.assertEqual([square(2), square(3)], [4, 9])
+        self.assertEqual(square.__name__, "square")
+        self.assertEqual(profiler.report()["square"]["calls"], 2)
+
+    def test_log_record(self):
+        profiler = Profiler("segment_lattice")
+        with profiler.stage("segment", struts = 2) as stage:
+            stage.count(points = 12)
+        record = profiler.log_record()
+        self.assertEqual(record.keys(), [profiling.TIMINGS])
+        stages = json.loads(record.to_json())[profiling.TIMINGS]["segment_lattice"]
+        self.assertEqual((stages["segment"]["struts"], stages["segment"]["points"]), (2, 12))
+
+if __name__ == "__main__":
+    unittest.main()
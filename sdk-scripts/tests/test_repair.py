@@ -0,0 +1,92 @@
+"""Repair pipeline stages on plain arrays through LocalHost."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools import meshing
+from latticetools import repair as mesh_repair
+from latticetools.host import LocalHost
+from latticetools.profiling import Profiler
+
+CUBE_VERTICES = [(0.0, 0.0, 0.0), (1.0, 0.0, 0.0), (1.0, 1.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0), (1.0, 0.0, 1.0), (1.0, 1.0, 1.0), (0.0, 1.0, 1.0)]
+CUBE_FACES = [(0, 2, 1), (0, 3, 2), (4, 5, 6), (4, 6, 7), (0, 1, 5), (0, 5, 4), (1, 2, 6), (1, 6, 5), (2, 3, 7), (2, 7, 6), (3, 0, 4), (3, 4, 7)]
+
+def repaired(faces, names = None):
+    state = mesh_repair.MeshState((list(CUBE_VERTICES), list(faces)), LocalHost())
+    results, failed, seconds = mesh_repair.repair_pipeline(names).run(state)
+    return state, dict(results), failed
+
+class LocalRepairTest(unittest.TestCase):
+
+    def test_closed_cube_needs_no_repair(self):
+        state, results, failed = repaired(CUBE_FACES)
+        self.assertEqual(results, {"degenerate_faces": False, "quads_to_tris": False, "unified_normals": False, "mesh_flipped": False})
+        self.assertEqual(failed, [])
+        self.assertAlmostEqual(state.volume, 1.0)
+
+    def test_degenerate_faces_are_removed(self):
+        state, results, failed = repaired(CUBE_FACES + [(0, 1, 1), (2, 2, 2)])
+        self.assertIs(results["degenerate_faces"], True)
+        self.assertEqual(len(state.mesh[1]), len(CUBE_FACES))
+
+    def test_quads_are_split(self):
+        #   The bottom as one quad
+        faces = [(0, 3, 2, 1)] + CUBE_FACES[2:]
+        state, results, failed = repaired(faces, ["quads_to_tris"])
+        self.assertIs(results["quads_to_tris"], True)
+        self.assertTrue(all(len(face) == 3 for face in state.mesh[1]))
+        self.assertTrue(state.diagnostics.closed)
+
+    def test_reversed_faces_are_unified(self):
+        faces = list(CUBE_FACES)
+        faces[4] = tuple(reversed(faces[4]))
+        state, results, failed = repaired(faces)
+        self.assertIs(results["unified_normals"], True)
+        self.assertEqual(sorted(state.mesh[1]), sorted(CUBE_FACES))
+        self.assertAlmostEqual(state.volume, 1.0)
+
+    def test_inside_out_mesh_is_flipped(self):
+        state, results, failed = repaired([tuple(reversed(face)) for face in CUBE_FACES])
+        self.assertIs(results["unified_normals"], False)
+        self.assertIs(results["mesh_flipped"], True)
+        self.assertAlmostEqual(state.volume, 1.0)
+
+class FailingHost(LocalHost):
+    """Reports failure from every stage, as Rhino's UnifyNormals does with -1."""
+
+    def unify_normals(self, mesh):
+        return mesh_repair.FAILED, mesh
+
+    def convert_quads(self, mesh):
+        return mesh_repair.FAILED, mesh
+
+class RepairResultTest(unittest.TestCase):
+
+    def finished(self, faces, host = None):
+        mesh = (list(CUBE_VERTICES), list(faces))
+        return meshing.finish_mesh(host or LocalHost(), mesh, None, None, None, Profiler("repair"))
+
+    def test_clean_triangle_mesh_is_not_rewritten(self):
+        state, reports = self.finished(CUBE_FACES)
+        properties = reports[1].get("modified_report")
+        self.assertEqual([properties[name] for name in properties["repair_seconds"]], [False]*4)
+        self.assertEqual(properties["repair_failed"], [])
+        self.assertFalse(meshing.repaired(reports[1]))
+
+    def test_failed_stages_are_reported_but_not_changes(self):
+        faces = [(0, 3, 2, 1)] + CUBE_FACES[2:]
+        faces[4] = tuple(reversed(faces[4]))
+        state, reports = self.finished(faces, FailingHost())
+        properties = reports[1].get("modified_report")
+        self.assertEqual(properties["repair_failed"], ["quads_to_tris", "unified_normals"])
+        self.assertIs(properties["quads_to_tris"], False)
+        self.assertIs(properties["unified_normals"], False)
+        self.assertFalse(meshing.repaired(reports[1]))
+
+    def test_repaired_mesh_is_rewritten(self):
+        state, reports = self.finished(CUBE_FACES + [(0, 1, 1)])
+        self.assertTrue(meshing.repaired(reports[1]))
+
+if __name__ == "__main__":
+    unittest.main()
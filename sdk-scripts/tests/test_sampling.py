@@ -0,0 +1,82 @@
+"""Segment Lattice sampling: radius inputs, merged strut ends and the radius of each point."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools import cache as result_cache
+from latticetools import populate
+from latticetools import sampling
+from latticetools import segment as lattice_segment
+from latticetools.graph import LatticeGraph
+from latticetools.host import LocalHost
+from latticetools.profiling import Profiler
+
+#   Two struts meeting at the origin and one apart from them
+STRUTS = [
+    ((0.0, 0.0, 0.0), (1.0, 0.0, 0.0)),
+    ((0.0, 0.0, 0.0), (0.0, 1.0, 0.0)),
+    ((0.0, 0.0, 2.0), (1.0, 0.0, 2.0))]
+
+class RadiusValuesTest(unittest.TestCase):
+
+    def test_scalars_lists_and_nothing(self):
+        self.assertEqual(lattice_segment.radius_values(0.5), [0.5])
+        self.assertEqual(lattice_segment.radius_values(1), [1.0])
+        self.assertEqual(lattice_segment.radius_values([0.5, None, 2]), [0.5, 2.0])
+        self.assertEqual(lattice_segment.radius_values((0.25,)), [0.25])
+        self.assertEqual(lattice_segment.radius_values(None), [])
+        self.assertEqual(lattice_segment.radius_values([]), [])
+
+    def test_unit_strut_radii_takes_a_scalar(self):
+        self.assertEqual(populate.unit_strut_radii([2, 1], 0.5), [0.5, 0.5, 0.5])
+        self.assertEqual(populate.unit_strut_radii([2, 1], [0.5, 0.25]), [0.5, 0.5, 0.25])
+        self.assertEqual(populate.unit_strut_radii([1], None), [0.0])
+
+class SampleLatticeTest(unittest.TestCase):
+
+    def sample(self, curves, radii, lattice = None):
+        return sampling.sample_lattice(LocalHost(), curves, radii, lattice, None, 1, lattice_segment.FIXED, lattice_segment.DEFAULT_TOLERANCE, None, Profiler("sample"))
+
+    def test_radii_are_aligned_with_merged_points(self):
+        points, offsets, indices, removed, radii = self.sample(STRUTS, [0.1, 0.3, 0.2])
+        self.assertEqual(len(radii), len(points))
+        self.assertEqual(len(indices), offsets[-1])
+        #   The shared origin takes the larger radius of the two struts meeting at it
+        self.assertEqual(removed, 1)
+        self.assertEqual(radii[points.index((0.0, 0.0, 0.0))], 0.3)
+        for i, radius in enumerate([0.1, 0.3, 0.2]):
+            for k in range(offsets[i] + 1, offsets[i + 1] - 1):
+                self.assertEqual(radii[indices[k]], radius)
+
+    def test_graph_radii_take_precedence(self):
+        graph = LatticeGraph.from_struts(STRUTS, radii = [0.4, 0.0, 0.2])
+        points, offsets, indices, removed, radii = self.sample([], [0.1], graph)
+        self.assertEqual(radii[points.index((0.0, 0.0, 0.0))], 0.4)
+        self.assertEqual(radii[points.index((0.0, 1.0, 0.0))], 0.1)
+        self.assertEqual(max(radii), 0.4)
+
+    def test_merged_counts(self):
+        points, offsets, indices, removed, radii = self.sample(STRUTS, [0.5])
+        #   Every strut has its two ends and 0.1 spaced interior samples; only the origin is shared
+        self.assertEqual(offsets, [0, 11, 22, 33])
+        self.assertEqual(removed, 1)
+        self.assertEqual(len(points), 32)
+        self.assertEqual(indices[0], indices[11])
+        self.assertEqual(len(set(indices)), len(points))
+
+    def test_merge_tolerance_is_positive(self):
+        self.assertEqual(lattice_segment.merge_tolerance(0.0), lattice_segment.lattice_graph.DEFAULT_TOLERANCE)
+        self.assertEqual(lattice_segment.merge_tolerance(None), lattice_segment.lattice_graph.DEFAULT_TOLERANCE)
+        self.assertEqual(lattice_segment.merge_tolerance(1.0), lattice_segment.MERGE_FRACTION)
+        #   Nothing to sample, with the component's empty radius, merges nothing
+        self.assertEqual(self.sample([], [0.0]), ([], [0], [], 0, []))
+        self.assertEqual(self.sample([], []), ([], [0], [], 0, []))
+
+    def test_packed_samples_round_trip(self):
+        samples = self.sample(STRUTS, [0.1, 0.3, 0.2])
+        packed = result_cache.decode(result_cache.encode(sampling.pack_samples(*samples)))
+        self.assertEqual(sampling.unpack_samples(packed), samples)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Chunked parallel map: result order, errors and the serial paths."""
+
+from __future__ import division
+
+import threading
+import unittest
+
+from latticetools import scheduler
+
+def square(value):
+    return value*value
+
+def checked(value):
+    if value == 37:
+        raise ValueError("bad item {}".format(value))
+    return value
+
+class SchedulerTest(unittest.TestCase):
+
+    def test_results_keep_input_order(self):
+        items = list(range(101))
+        expected = [square(item) for item in items]
+        for chunk_size in (1, 3, 16, 200, None):
+            self.assertEqual(scheduler.run(square, items, chunk_size = chunk_size, workers = 4), expected)
+        self.assertEqual(scheduler.run(square, iter(items), chunk_size = 7, workers = 3), expected)
+
+    def test_flatten_joins_list_results(self):
+        result = scheduler.run(lambda item: [item]*item if item % 2 else item, range(5), chunk_size = 2, workers = 2, flatten = True)
+        self.assertEqual(result, [0, 1, 2, 3, 3, 3, 4])
+
+    def test_errors_propagate(self):
+        for chunk_size in (1, 8, None):
+            with self.assertRaises(ValueError):
+                scheduler.run(checked, range(100), chunk_size = chunk_size, workers = 4)
+        with self.assertRaises(ValueError):
+            scheduler.run(checked, range(100), workers = 1)
+
+    def test_one_worker_runs_on_the_calling_thread(self):
+        caller = threading.current_thread()
+        for options in ({"workers": 1}, {"workers": 4, "serial": True}):
+            threads = scheduler.run(lambda item: threading.current_thread(), range(20), chunk_size = 2, **options)
+            self.assertTrue(all(thread is caller for thread in threads))
+        self.assertEqual(scheduler.run(square, [], workers = 4), [])
+
+    def test_chunks_and_adaptive_size(self):
+        self.assertEqual(scheduler.chunked(list(range(5)), 2), [[0, 1], [2, 3], [4]])
+        #   0.01 s chunks of 1 ms items, unless that leaves too few chunks per worker
+        self.assertEqual(scheduler.adaptive_chunk_size(0.001, 10000, 2), 10)
+        self.assertEqual(scheduler.adaptive_chunk_size(0.001, 40, 2), 5)
+        self.assertEqual(scheduler.adaptive_chunk_size(0.0, 3, 8), 1)
+
+if __name__ == "__main__":
+    unittest.main()
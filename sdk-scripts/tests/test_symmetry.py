@@ -0,0 +1,60 @@
+"""Symmetry domains: the mirrored mesh of one octant or quarter is the closed, manifold whole part."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools import benchmark
+from latticetools import meshing
+from latticetools.diagnostics import MeshDiagnostics
+from latticetools.symmetry import SymmetryDomain
+from latticetools.unitcells import unit_cell
+
+ORIGIN = (0.0, 0.0, 0.0)
+OCTANT = [(ORIGIN, (0.0, 0.0, -1.0)), (ORIGIN, (-1.0, 0.0, 0.0)), (ORIGIN, (0.0, -1.0, 0.0))]
+
+class SymmetryTest(unittest.TestCase):
+
+    def assertWholePart(self, mesh, volume, places = 9):
+        diagnostics = MeshDiagnostics(*mesh)
+        self.assertTrue(diagnostics.closed)
+        self.assertTrue(diagnostics.manifold)
+        self.assertTrue(diagnostics.oriented)
+        self.assertEqual(diagnostics.disjoint_count, 1)
+        self.assertAlmostEqual(diagnostics.volume, volume, places = places)
+
+    def test_octant_of_a_sphere(self):
+        vertices, faces = benchmark.sphere_mesh(16)
+        domain = SymmetryDomain(OCTANT)
+        self.assertEqual(domain.copies, 8)
+        mirrored = domain.complete(vertices, faces)
+        self.assertWholePart(mirrored, MeshDiagnostics(vertices, faces).volume)
+        #   Every vertex is in one octant, or on the seams shared between them
+        self.assertEqual(len(mirrored[0]), len(set(mirrored[0])))
+
+    def test_quarter_of_a_sphere(self):
+        vertices, faces = benchmark.sphere_mesh(16)
+        domain = SymmetryDomain(OCTANT[1:])
+        self.assertWholePart(domain.complete(vertices, faces), MeshDiagnostics(vertices, faces).volume)
+
+    def test_octant_of_a_lattice(self):
+        #   The body-centred struts of a cell centred on the origin, meshed whole and mirrored from the octant
+        struts = [tuple(tuple(2.0*value - 1.0 for value in point) for point in strut) for strut in unit_cell("bcc")]
+        mesh = meshing.native_mesh(struts, [0.2]*len(struts), 0.05)
+        volume = MeshDiagnostics(*mesh).volume
+        #   The sampling grid is not symmetric about the origin, so the halves differ by a fraction of a voxel
+        self.assertWholePart(SymmetryDomain(OCTANT).complete(*mesh), volume, places = 1)
+
+    def test_domain_contains_and_keeps_voxels(self):
+        domain = SymmetryDomain(OCTANT)
+        self.assertTrue(domain.contains((-1.0, -1.0, -1.0)))
+        self.assertTrue(domain.contains(ORIGIN))
+        self.assertFalse(domain.contains((0.5, -1.0, -1.0)))
+        cube = lambda x, y, z: [(x + dx, y + dy, z + dz) for dz in (0.0, 1.0) for dy in (0.0, 1.0) for dx in (0.0, 1.0)]
+        #   The layer of voxels beyond each plane is kept, the next one is not
+        self.assertTrue(domain.keeps_voxel(cube(-1.0, -1.0, -1.0)))
+        self.assertTrue(domain.keeps_voxel(cube(0.0, -1.0, -1.0)))
+        self.assertFalse(domain.keeps_voxel(cube(1.0, -1.0, -1.0)))
+
+if __name__ == "__main__":
+    unittest.main()
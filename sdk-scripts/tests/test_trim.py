@@ -0,0 +1,58 @@
+"""Strut trimming and voxel classification against a closed primitive."""
+
+from __future__ import division
+
+import unittest
+
+from latticetools import trim as lattice_trim
+
+from tests.test_repair import CUBE_FACES, CUBE_VERTICES
+
+def box(lower, size):
+    x, y, z = lower
+    return [(x + size*dx, y + size*dy, z + size*dz) for dx, dy, dz in ((0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1))]
+
+class TrimTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = lattice_trim.build_index([(2*x, 2*y, 2*z) for x, y, z in CUBE_VERTICES], CUBE_FACES)
+
+    def assert_struts(self, actual, expected):
+        self.assertEqual(len(actual), len(expected))
+        for strut, expected_strut in zip(actual, expected):
+            for point, expected_point in zip(strut, expected_strut):
+                for i in range(3):
+                    self.assertAlmostEqual(point[i], expected_point[i])
+
+    def test_inside_strut_is_kept_whole(self):
+        strut = ((0.5, 0.5, 0.5), (1.5, 1.0, 1.2))
+        self.assertEqual(lattice_trim.trim_strut(self.index, *strut), [strut])
+
+    def test_crossing_strut_is_cut_at_the_surface(self):
+        self.assert_struts(lattice_trim.trim_strut(self.index, (-1.0, 1.0, 1.0), (1.0, 1.0, 1.0)), [((0.0, 1.0, 1.0), (1.0, 1.0, 1.0))])
+        self.assert_struts(lattice_trim.trim_strut(self.index, (-1.0, 0.5, 0.5), (3.0, 0.5, 0.5)), [((0.0, 0.5, 0.5), (2.0, 0.5, 0.5))])
+
+    def test_outside_strut_is_dropped(self):
+        self.assertEqual(lattice_trim.trim_strut(self.index, (3.0, 0.0, 0.0), (4.0, 1.0, 1.0)), [])
+        #   Passes beside the cube, through none of its faces
+        self.assertEqual(lattice_trim.trim_struts(self.index, [((-1.0, 3.0, 1.0), (3.0, 3.0, 1.0))]), [])
+
+    def test_batched_queries_match_single_ones(self):
+        #   Inside, crossing once or twice, outside, along an edge, through a vertex and of zero length
+        struts = [
+            ((0.5, 0.5, 0.5), (1.5, 1.0, 1.2)), ((-1.0, 1.0, 1.0), (1.0, 1.0, 1.0)), ((-1.0, 0.5, 0.5), (3.0, 0.5, 0.5)),
+            ((3.0, 0.0, 0.0), (4.0, 1.0, 1.0)), ((-1.0, 0.0, 0.0), (3.0, 0.0, 0.0)), ((-1.0, -1.0, -1.0), (1.0, 1.0, 1.0)),
+            ((1.0, 1.0, 1.0), (1.0, 1.0, 1.0))]
+        self.assertEqual(self.index.segments_hits(struts), [self.index.segment_hits(*strut) for strut in struts])
+        points = [start for start, end in struts] + [(1.0, 1.0, 1.0), (2.5, 1.0, 1.0), (1.0, 1.0, 1.999)]
+        self.assertEqual(self.index.inside_points(points), [self.index.is_inside(point) for point in points])
+        self.assertEqual(lattice_trim.trim_voxel_struts(self.index, struts), [lattice_trim.trim_strut(self.index, *strut) for strut in struts])
+        self.assertEqual(lattice_trim.trim_voxel_struts(self.index, []), [])
+        self.assertEqual(self.index.inside_points([]), [])
+
+    def test_classify_voxels(self):
+        voxels = [box((0.5, 0.5, 0.5), 1.0), box((1.5, 0.5, 0.5), 1.0), box((3.0, 3.0, 3.0), 1.0)]
+        self.assertEqual(lattice_trim.classify_voxels(self.index, voxels), [lattice_trim.INSIDE, lattice_trim.STRADDLING, lattice_trim.OUTSIDE])
+
+if __name__ == "__main__":
+    unittest.main()